@@ -21,6 +21,16 @@ def create_unique_index() :
         unique=True,
         name="unique_measurement_key"
     )
+
+    # Lignes staging en attente de transformation (run incrémental)
+    staging = db[settings.staging_collection]
+    staging.create_index(
+        [
+            ("dq_checked", 1),
+            ("transformed_at", 1),
+        ],
+        name="pending_transform"
+    )
     
     client.close()
     print("Index unique créé !")
@@ -31,5 +31,8 @@ HOURLY_MEASUREMENTS_SCHEMA = {
 
             "uv_index": {"bsonType": ["double", "null"]},
             "solar_wm2": {"bsonType": ["double", "null"]},
+
+            # Temporal DQ flags ("temperature_C:spike", ...), see quality.temporal_checks
+            "dq_flags": {"bsonType": "array", "items": {"bsonType": "string"}},
         },
 }
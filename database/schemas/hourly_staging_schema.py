@@ -6,8 +6,23 @@ HOURLY_STAGING_SCHEMA = {
         "properties": {
             "id_station": {"bsonType": "string"},
             "s3_key": {"bsonType": "string"},
+            # Sparse documents: only the fields of this source are present
+            "source": {"enum": ["infoclimat", "wunderground", "unknown", None]},
             "dq_checked": {"bsonType": "bool"},
             "error" : {"bsonType": ["bool", "null"]},
+            # DQ check codes of an invalid row, e.g. ["temperature_F:in_range"]
+            "dq_errors": {"bsonType": ["array", "null"], "items": {"bsonType": "string"}},
+
+            # Set by the hourly transform once the row has been written
+            "transformed_at": {"bsonType": ["date", "null"]},
+            # Last transform failure of a row (retried by every run)
+            "transform_error": {"bsonType": ["string", "null"]},
+
+            # Typed numeric values parsed at ingest (field → double)
+            "num": {
+                "bsonType": ["object", "null"],
+                "additionalProperties": {"bsonType": "double"},
+            },
 
             "dh_utc": { "bsonType": ["date", "null"] },
             "time_local": {"bsonType": ["string", "null"]},
@@ -13,8 +13,69 @@ INGESTION_TRACKER_SCHEMA = {
 
             "lines_read": {"bsonType": ["int", "null"]},
             "file_hash": {"bsonType": ["string", "null"]},
+
+            "size_bytes": {"bsonType": ["int", "long", "null"]},
+            "duration_seconds": {"bsonType": ["double", "null"]},
+            "rows_per_sec": {"bsonType": ["double", "null"]},
+
+            "manifest": {
+                "bsonType": ["object", "null"],
+                "properties": {
+                    "source": {"bsonType": "string"},
+                    "row_count": {"bsonType": ["int", "long"]},
+                    "source_rows": {"bsonType": ["int", "long", "null"]},
+                    "station_ids": {"bsonType": "array", "items": {"bsonType": "string"}},
+                    "stations": {
+                        "bsonType": "array",
+                        "items": {
+                            "bsonType": "object",
+                            "properties": {
+                                "id_station": {"bsonType": "string"},
+                                "rows": {"bsonType": ["int", "long"]},
+                            },
+                        },
+                    },
+                    "min_dh_utc": {"bsonType": ["date", "null"]},
+                    "max_dh_utc": {"bsonType": ["date", "null"]},
+                },
+            },
             
             "dq_validated": {"bsonType": "bool"},
             "dq_run_at": {"bsonType": ["date", "null"]},
+            "dq_rows": {"bsonType": ["int", "long", "null"]},
+            "dq_invalid_rows": {"bsonType": ["int", "long", "null"]},
+            # Compact failure summary: check code → count + sample rows
+            "dq_failures": {
+                "bsonType": ["array", "null"],
+                "items": {
+                    "bsonType": "object",
+                    "required": ["check", "count"],
+                    "properties": {
+                        "check": {"bsonType": "string"},
+                        "count": {"bsonType": ["int", "long"]},
+                        "samples": {"bsonType": "array"},
+                    },
+                },
+            },
+
+            # Sampled DQ: decision + error bounds of the failure rate
+            "dq_sampling": {
+                "bsonType": ["object", "null"],
+                "properties": {
+                    "fraction": {"bsonType": "double"},
+                    "total_rows": {"bsonType": ["int", "long"]},
+                    "sampled_rows": {"bsonType": ["int", "long"]},
+                    "failed_rows": {"bsonType": ["int", "long"]},
+                    "failure_rate": {"bsonType": "double"},
+                    "ci_low": {"bsonType": "double"},
+                    "ci_high": {"bsonType": "double"},
+                    "z": {"bsonType": "double"},
+                    "max_failure_rate": {"bsonType": "double"},
+                    "escalated": {"bsonType": "bool"},
+                },
+            },
+
+            "lease_owner": {"bsonType": ["string", "null"]},
+            "lease_expires_at": {"bsonType": ["date", "null"]},
         },
 }
\ No newline at end of file
@@ -1,11 +1,14 @@
 from __future__ import annotations
 from typing import Optional, Dict
-from datetime import datetime
+from datetime import datetime, timedelta
+import threading
 
 from loguru import logger
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from models.ingestion_tracker_model import (
+    FileManifestModel,
     IngestionTrackerModel,
     IngestionTrackerUpdate,
 )
@@ -26,6 +29,10 @@ class IngestionTracker:
         self.collection.create_index("s3_key", unique=True)
         logger.info("Index ensured on ingestion_tracker.s3_key")
 
+        # Zone-map pruning (find_files)
+        self.collection.create_index("manifest.station_ids")
+        self.collection.create_index([("manifest.min_dh_utc", 1), ("manifest.max_dh_utc", 1)])
+
     # ----------------------------------------------------------------------
     # 🔍 LIST ALL KNOWN FILES (S3 keys)
     # ----------------------------------------------------------------------
@@ -87,13 +94,24 @@ class IngestionTracker:
         s3_key: str,
         lines_read: Optional[int],
         file_hash: Optional[str],
+        size_bytes: Optional[int] = None,
+        duration_seconds: Optional[float] = None,
+        manifest: Optional[FileManifestModel] = None,
     ) -> Dict:
 
+        rows_per_sec = None
+        if lines_read is not None and duration_seconds:
+            rows_per_sec = lines_read / duration_seconds
+
         update = IngestionTrackerUpdate(
             success=True,
             error_message=None,
             lines_read=lines_read,
             file_hash=file_hash,
+            size_bytes=size_bytes,
+            duration_seconds=duration_seconds,
+            rows_per_sec=rows_per_sec,
+            manifest=manifest,
         )
 
         payload = self._safe_payload(update)
@@ -137,6 +155,128 @@ class IngestionTracker:
         self.collection.delete_one({"s3_key": s3_key})
         logger.warning(f"[TRACKER] RESET: {s3_key} deleted from ingestion tracking.")
 
+    # ----------------------------------------------------------------------
+    # 📊 HISTORICAL INGEST STATISTICS (for cost-aware scheduling)
+    # ----------------------------------------------------------------------
+    def get_ingest_stats(self) -> Dict[str, dict]:
+        docs = self.collection.find(
+            {"duration_seconds": {"$ne": None}},
+            {"s3_key": 1, "size_bytes": 1, "lines_read": 1, "duration_seconds": 1, "rows_per_sec": 1},
+        )
+        return {d["s3_key"]: d for d in docs}
+
+    # ----------------------------------------------------------------------
+    # 🗺 FILE MANIFESTS (zone maps)
+    # ----------------------------------------------------------------------
+    def get_manifest(self, s3_key: str) -> Optional[Dict]:
+        doc = self.collection.find_one({"s3_key": s3_key}, {"manifest": 1})
+        return doc.get("manifest") if doc else None
+
+    def find_files(
+        self,
+        station_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        source: Optional[str] = None,
+    ) -> list[str]:
+        """
+        S3 keys whose manifest may contain rows for `station_id` within
+        [start, end]. Files without a manifest are always returned (they
+        cannot be pruned safely), and so are files whose time range is
+        unknown (null bounds, e.g. a Wunderground key without a date).
+        """
+        conditions = []
+
+        if station_id is not None:
+            conditions.append({"manifest.station_ids": station_id})
+        if source is not None:
+            conditions.append({"manifest.source": source})
+        if start is not None:
+            conditions.append(
+                {"$or": [{"manifest.max_dh_utc": None}, {"manifest.max_dh_utc": {"$gte": start}}]}
+            )
+        if end is not None:
+            conditions.append(
+                {"$or": [{"manifest.min_dh_utc": None}, {"manifest.min_dh_utc": {"$lte": end}}]}
+            )
+
+        query = {"success": True}
+        if conditions:
+            query["$or"] = [{"manifest": None}, {"$and": conditions}]
+
+        keys = [d["s3_key"] for d in self.collection.find(query, {"s3_key": 1})]
+        logger.info(f"[TRACKER] Manifest pruning kept {len(keys)} file(s)")
+        return keys
+
+    # ----------------------------------------------------------------------
+    # 🔒 LEASES: ATOMIC OWNERSHIP OF A FILE ACROSS WORKERS
+    # ----------------------------------------------------------------------
+    def claim(self, s3_key: str, owner: str, lease_seconds: int = 300) -> Optional[Dict]:
+        """
+        Atomically take (or re-take) the lease on one file.
+
+        Succeeds when the file is unclaimed, its lease has expired, or it is
+        already held by `owner`. Unknown files are registered on the fly.
+        Returns the tracker document, or None if another worker holds it.
+        """
+        now = datetime.utcnow()
+
+        try:
+            doc = self.collection.find_one_and_update(
+                {
+                    "s3_key": s3_key,
+                    "$or": [
+                        {"lease_owner": None},
+                        {"lease_expires_at": {"$lt": now}},
+                        {"lease_owner": owner},
+                    ],
+                },
+                {
+                    "$set": {
+                        "lease_owner": owner,
+                        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    },
+                    "$setOnInsert": {
+                        "first_seen": now,
+                        "last_processed": now,
+                        "success": False,
+                        "dq_validated": False,
+                    },
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # The document exists but the filter did not match → held by someone else
+            doc = None
+
+        if doc is None:
+            logger.info(f"[TRACKER] {s3_key} is leased by another worker → skip")
+            return None
+
+        logger.info(f"[TRACKER] Lease acquired on {s3_key} by {owner}")
+        return doc
+
+    def renew_lease(self, s3_key: str, owner: str, lease_seconds: int = 300) -> bool:
+        """Extend a lease still held by `owner`. False if it was lost."""
+        result = self.collection.update_one(
+            {"s3_key": s3_key, "lease_owner": owner},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}},
+        )
+
+        if result.matched_count == 0:
+            logger.warning(f"[TRACKER] Lease on {s3_key} lost by {owner}")
+            return False
+        return True
+
+    def release_lease(self, s3_key: str, owner: str):
+        """Give a file back (only if `owner` still holds it)."""
+        self.collection.update_one(
+            {"s3_key": s3_key, "lease_owner": owner},
+            {"$set": {"lease_owner": None, "lease_expires_at": None}},
+        )
+        logger.info(f"[TRACKER] Lease released on {s3_key} by {owner}")
+
     # ----------------------------------------------------------------------
     # 📌 FILES STILL NOT FULLY PROCESSED
     # ----------------------------------------------------------------------
@@ -144,3 +284,64 @@ class IngestionTracker:
         docs = list(self.collection.find({"success": False}))
         logger.info(f"[TRACKER] {len(docs)} file(s) pending or failed.")
         return docs
+
+
+class LeaseLostError(RuntimeError):
+    """The lease on a file was taken over by another worker during ingestion."""
+
+
+class LeaseHeartbeat:
+    """
+    Background thread renewing a lease while a file is being ingested.
+
+        with LeaseHeartbeat(tracker, s3_key, owner):
+            ingest_file_to_staging(...)
+
+    The lease is released when the block exits. Call still_held() before
+    committing results: the renewal thread only notices a lost lease at
+    its next tick.
+    """
+
+    def __init__(
+        self,
+        tracker: IngestionTracker,
+        s3_key: str,
+        owner: str,
+        lease_seconds: int = 300,
+        interval: Optional[float] = None,
+    ):
+        self.tracker = tracker
+        self.s3_key = s3_key
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.interval = interval if interval is not None else lease_seconds / 3
+
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.tracker.renew_lease(self.s3_key, self.owner, self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as e:
+                logger.warning(f"[TRACKER] Lease heartbeat failed for {self.s3_key}: {e}")
+
+    def still_held(self) -> bool:
+        """Renews the lease now; False (and lost set) if another worker took it."""
+        if not self.lost and not self.tracker.renew_lease(self.s3_key, self.owner, self.lease_seconds):
+            self.lost = True
+        return not self.lost
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.tracker.release_lease(self.s3_key, self.owner)
@@ -0,0 +1,87 @@
+# ingest/manifest.py
+
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Optional
+import threading
+
+from models.ingestion_tracker_model import FileManifestModel, StationCount
+from transform.transformations import extract_date_from_s3_key, convert_time_local_to_utc
+
+
+class ManifestBuilder:
+    """
+    Accumulates the zone map of one S3 file while its rows are ingested:
+    row count per station and the [min, max] dh_utc time range.
+
+    source_rows counts the rows of the raw file, including those dropped
+    while parsing (reported by S3JSONLReader.parse_line); the volume test
+    compares staging against it instead of re-reading S3.
+
+    InfoClimat rows carry dh_utc. Weather Underground rows only carry a
+    local time, so their range is the whole day encoded in the s3_key
+    (Europe/Paris → UTC), which is a safe superset for pruning.
+    Thread-safe: the staged pipeline feeds it from several validators.
+    """
+
+    def __init__(self, s3_key: str, source: str):
+        self.s3_key = s3_key
+        self.source = source
+
+        self.rows = 0
+        self.source_rows: Optional[int] = None
+        self.stations: dict[str, int] = {}
+        self.min_dh_utc: Optional[datetime] = None
+        self.max_dh_utc: Optional[datetime] = None
+
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def add(self, doc: dict):
+        station = doc.get("id_station")
+        dh_utc = doc.get("dh_utc")
+
+        with self._lock:
+            self.rows += 1
+            self.stations[station] = self.stations.get(station, 0) + 1
+
+            if isinstance(dh_utc, datetime):
+                if self.min_dh_utc is None or dh_utc < self.min_dh_utc:
+                    self.min_dh_utc = dh_utc
+                if self.max_dh_utc is None or dh_utc > self.max_dh_utc:
+                    self.max_dh_utc = dh_utc
+
+    def add_source_rows(self, count: int):
+        with self._lock:
+            self.source_rows = (self.source_rows or 0) + count
+
+    # ------------------------------------------------------------------
+    def _day_range_from_key(self):
+        base_date = extract_date_from_s3_key(self.s3_key)
+        if base_date is None:
+            return None, None
+
+        start = convert_time_local_to_utc("12:00 AM", base_date)
+        end = start + timedelta(days=1) - timedelta(seconds=1)
+        return start.replace(tzinfo=None), end.replace(tzinfo=None)
+
+    # ------------------------------------------------------------------
+    def build(self) -> FileManifestModel:
+        min_dh, max_dh = self.min_dh_utc, self.max_dh_utc
+
+        if min_dh is None and self.rows:
+            min_dh, max_dh = self._day_range_from_key()
+
+        return FileManifestModel(
+            source=self.source,
+            row_count=self.rows,
+            source_rows=self.source_rows,
+            station_ids=sorted(s for s in self.stations if s is not None),
+            stations=[
+                StationCount(id_station=s, rows=n)
+                for s, n in sorted(self.stations.items())
+                if s is not None
+            ],
+            min_dh_utc=min_dh,
+            max_dh_utc=max_dh,
+        )
@@ -0,0 +1,145 @@
+# ingest/numeric_values.py
+
+from __future__ import annotations
+from typing import Iterable, Optional
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# ===============================================================
+# Numeric staging fields (raw strings such as "56.8 °F", "1013.7")
+# nebulosite_okta / temps_omm_code are integer codes → kept raw.
+# ===============================================================
+NUMERIC_FIELDS = (
+    # InfoClimat
+    "temperature_C", "pression_hPa", "humidite_pct", "point_de_rosee_C",
+    "visibilite_m", "vent_moyen_kmh", "vent_rafales_kmh", "vent_direction_deg",
+    "pluie_3h_mm", "pluie_1h_mm", "neige_au_sol_cm",
+    # Weather Underground
+    "temperature_F", "dew_point_F", "humidity_pct", "pressure_inHg",
+    "wind_speed_mph", "wind_gust_mph", "precip_rate_in", "precip_accum_in",
+    "uv_index", "solar_wm2",
+)
+
+# Same cleaning as transform.transformations.safe_float2: every character
+# but digits, ".", "," and "-" is dropped, then "," reads as a decimal
+# point ("14,2" → 14.2, "- 5 °F" → -5.0, "1.2.3" → None). The typed value
+# stored at ingest is therefore exactly what the transform would compute.
+NON_NUMERIC_RE = re.compile(r"[^0-9\.,\-]")
+
+# Unit = non-numeric tail of the string ("56.8 °F" → "°F")
+UNIT_RE = re.compile(r"[0-9.,]\s*([^0-9.,]+?)\s*$")
+
+# Prefix of the typed DataFrame columns built for DQ. A prefix (not a
+# suffix) because pandera matches `regex=` column names from the start:
+# "temperature_C" would also select "temperature_C__num".
+NUM_PREFIX = "num__"
+
+
+def _to_float(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------
+def parse_number_unit(value) -> tuple[Optional[float], Optional[str]]:
+    """
+    "56.8 °F" → (56.8, "°F"), "1013.7" → (1013.7, None), None → (None, None).
+    The number is safe_float2(value) (see NON_NUMERIC_RE).
+    """
+    if value is None:
+        return None, None
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), None
+
+    text = str(value)
+    number = _to_float(NON_NUMERIC_RE.sub("", text).replace(",", "."))
+    if number is None:
+        return None, None
+
+    unit = UNIT_RE.search(text)
+    return number, unit.group(1) if unit else None
+
+
+def extract_numeric(record: dict, fields: Iterable[str] = NUMERIC_FIELDS) -> dict:
+    """
+    Typed values of one staging record, parsed once at ingest:
+    {field: float} for every numeric field that holds a number.
+    Units are constant per field, so only the values are kept.
+    """
+    values = {}
+    for field in fields:
+        number, _ = parse_number_unit(record.get(field))
+        if number is not None:
+            values[field] = number
+    return values
+
+
+# ---------------------------------------------------------------
+def typed_column(field: str) -> str:
+    return f"{NUM_PREFIX}{field}"
+
+
+def parse_numbers(raw: pd.Series) -> pd.Series:
+    """
+    Vectorized parse_number_unit() values of a raw string column.
+    Weather strings repeat a lot ("0.00 in", "5 mph"), so the regex runs
+    once per distinct value and the result is broadcast back to rows.
+    """
+    codes, uniques = pd.factorize(raw.astype("string"))
+    if len(uniques) == 0:
+        return pd.Series(np.nan, index=raw.index, dtype=float)
+
+    cleaned = (
+        pd.Series(uniques, dtype=object)
+        .str.replace(NON_NUMERIC_RE, "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+    parsed = np.array([_to_float(c) for c in cleaned], dtype=float)
+
+    values = np.where(codes >= 0, parsed[codes.clip(min=0)], np.nan)
+    return pd.Series(values, index=raw.index, dtype=float)
+
+
+def add_typed_columns(df: pd.DataFrame, fields: Iterable[str]) -> pd.DataFrame:
+    """
+    Adds a float column `num__<field>` for every field, computed once per
+    frame: typed columns already present are kept as they are, so every
+    check (and a second prepare() of the same frame) reuses them.
+
+    Values come from the `num` sub-document written at ingest when the
+    row has one; rows ingested before typed values existed are parsed
+    from the raw string (see parse_numbers()).
+    """
+    todo = [f for f in fields if typed_column(f) not in df.columns]
+    if not todo:
+        return df
+
+    num = df["num"] if "num" in df.columns else pd.Series([None] * len(df), index=df.index)
+    has_num = num.map(lambda d: isinstance(d, dict)).astype(bool)
+    missing = ~has_num
+
+    # All "num" sub-documents expanded in one go
+    num_frame = (
+        pd.DataFrame.from_records(num[has_num].tolist(), index=num.index[has_num])
+        if has_num.any()
+        else pd.DataFrame(index=df.index[:0])
+    )
+
+    for field in todo:
+        typed = pd.Series(np.nan, index=df.index, dtype=float)
+
+        if field in num_frame.columns:
+            typed[has_num] = num_frame[field].astype(float)
+
+        if missing.any() and field in df.columns:
+            typed[missing] = parse_numbers(df.loc[missing, field])
+
+        df[typed_column(field)] = typed
+
+    return df
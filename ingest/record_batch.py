@@ -0,0 +1,216 @@
+# ingest/record_batch.py
+
+from __future__ import annotations
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+import sys
+import tracemalloc
+
+
+# Fields identical for every row of a file → stored once per batch
+_FILE_FIELDS = ("s3_key", "source")
+
+# Short string values repeat a lot ("0 mph", "0.00 in", "Calm") → shared
+_SHARE_MAX_LEN = 24
+
+
+class StagingBatch:
+    """
+    Compact, struct-of-arrays buffer of validated staging documents.
+
+    A list of 15-30-key dicts costs ~1 KB per hourly row and repeats the
+    same s3_key / id_station / field names on every row. Here:
+
+    - s3_key and source are stored once for the batch
+    - id_station is an index (array 'I') into a table of interned ids
+    - the set of present fields ("layout") is stored once and referenced
+      per row by index (array 'I'); rows only keep a tuple of values
+    - the "num" sub-document is flattened into the same layout
+    - short string values are shared across rows
+
+    Documents are rebuilt (as plain dicts, i.e. BSON-ready) only at the
+    write boundary, through iter_documents() / chunks().
+    """
+
+    __slots__ = (
+        "s3_key", "source",
+        "_station_ids", "_station_index", "_stations",
+        "_layouts", "_layout_index", "_row_layouts",
+        "_values", "_strings",
+    )
+
+    def __init__(self, s3_key: str, source: Optional[str] = None):
+        self.s3_key = sys.intern(s3_key)
+        self.source = source
+
+        self._station_ids: list = []
+        self._station_index: dict = {}
+        self._stations = array("I")
+
+        self._layouts: list[tuple[tuple, tuple]] = []
+        self._layout_index: dict = {}
+        self._row_layouts = array("I")
+
+        self._values: list[tuple] = []
+        self._strings: dict[str, str] = {}
+
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _share(self, value):
+        if isinstance(value, str) and len(value) <= _SHARE_MAX_LEN:
+            return self._strings.setdefault(value, value)
+        return value
+
+    def _station_slot(self, station) -> int:
+        slot = self._station_index.get(station)
+        if slot is None:
+            slot = len(self._station_ids)
+            self._station_ids.append(sys.intern(station) if isinstance(station, str) else station)
+            self._station_index[station] = slot
+        return slot
+
+    def _layout_slot(self, fields: tuple, num_fields: tuple) -> int:
+        key = (fields, num_fields)
+        slot = self._layout_index.get(key)
+        if slot is None:
+            slot = len(self._layouts)
+            self._layouts.append(key)
+            self._layout_index[key] = slot
+        return slot
+
+    # ------------------------------------------------------------------
+    def append(self, doc: dict):
+        """Adds one staging document (as returned by HourlyStagingModel.to_document())."""
+        for field in _FILE_FIELDS:
+            value = doc.get(field)
+            if value is not None and value != getattr(self, field):
+                raise ValueError(
+                    f"StagingBatch for {self.s3_key} got a row with {field}={value!r}"
+                )
+
+        fields = []
+        values = []
+        for field, value in doc.items():
+            if field in _FILE_FIELDS or field in ("id_station", "num"):
+                continue
+            fields.append(field)
+            values.append(self._share(value))
+
+        num = doc.get("num") or {}
+        num_fields = tuple(num)
+        values.extend(num.values())
+
+        self._stations.append(self._station_slot(doc.get("id_station")))
+        self._row_layouts.append(self._layout_slot(tuple(fields), num_fields))
+        self._values.append(tuple(values))
+
+    # ------------------------------------------------------------------
+    def document(self, i: int) -> dict:
+        """Rebuilds row i as a sparse staging document."""
+        fields, num_fields = self._layouts[self._row_layouts[i]]
+        values = self._values[i]
+
+        doc = {"s3_key": self.s3_key}
+        if self.source is not None:
+            doc["source"] = self.source
+
+        station = self._station_ids[self._stations[i]]
+        if station is not None:
+            doc["id_station"] = station
+
+        split = len(fields)
+        doc.update(zip(fields, values[:split]))
+        if num_fields:
+            doc["num"] = dict(zip(num_fields, values[split:]))
+
+        return doc
+
+    def iter_documents(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self.document(i)
+
+    def chunks(self, size: int) -> Iterator[list[dict]]:
+        """Documents as lists of at most `size` (one insert_many each)."""
+        for start in range(0, len(self), size):
+            yield [self.document(i) for i in range(start, min(start + size, len(self)))]
+
+    def station_ids(self) -> list:
+        return list(self._station_ids)
+
+
+# ----------------------------------------------------------------------
+# MEMORY BENCHMARK (python -m ingest.record_batch [rows])
+# ----------------------------------------------------------------------
+def _synthetic_doc(i: int, s3_key: str) -> dict:
+    """Wunderground-shaped staging document, as produced at ingest."""
+    temp = 40 + i % 30
+    return {
+        "s3_key": s3_key,
+        "source": "wunderground",
+        "id_station": "ILAMAD25",
+        "time_local": f"{i % 12 + 1}:{i % 60:02d} {'AM' if i % 2 else 'PM'}",
+        "temperature_F": f"{temp}.{i % 10} °F",
+        "dew_point_F": f"{temp - 5}.{i % 10} °F",
+        "humidity_pct": f"{60 + i % 40} %",
+        "wind_direction_text": "WSW",
+        "wind_speed_mph": f"{i % 15} mph",
+        "wind_gust_mph": f"{i % 15 + 3} mph",
+        "pressure_inHg": f"29.{i % 100:02d} in",
+        "precip_rate_in": "0.00 in",
+        "precip_accum_in": "0.00 in",
+        "uv_index": str(i % 3),
+        "solar_wm2": f"{i % 500}.0 w/m²",
+        "dq_checked": False,
+        "ingested_at": datetime(2024, 10, 1) + timedelta(seconds=i),
+        "num": {
+            "temperature_F": temp + (i % 10) / 10,
+            "dew_point_F": temp - 5 + (i % 10) / 10,
+            "humidity_pct": float(60 + i % 40),
+            "wind_speed_mph": float(i % 15),
+            "wind_gust_mph": float(i % 15 + 3),
+            "pressure_inHg": 29 + (i % 100) / 100,
+            "precip_rate_in": 0.0,
+            "precip_accum_in": 0.0,
+            "uv_index": float(i % 3),
+            "solar_wm2": float(i % 500),
+        },
+    }
+
+
+def measure_memory(rows: int = 1_000_000) -> dict:
+    """
+    Traced memory retained by `rows` synthetic staging rows buffered as
+    a list of dicts vs a StagingBatch (bytes per row).
+    """
+    s3_key = "dataset_meteo/La_Madeleine_011024/synthetic.jsonl"
+    results = {}
+
+    tracemalloc.start()
+
+    base = tracemalloc.get_traced_memory()[0]
+    as_dicts = [_synthetic_doc(i, s3_key) for i in range(rows)]
+    results["dict_bytes_per_row"] = (tracemalloc.get_traced_memory()[0] - base) / rows
+    del as_dicts
+
+    base = tracemalloc.get_traced_memory()[0]
+    batch = StagingBatch(s3_key, "wunderground")
+    for i in range(rows):
+        batch.append(_synthetic_doc(i, s3_key))
+    results["batch_bytes_per_row"] = (tracemalloc.get_traced_memory()[0] - base) / rows
+    del batch
+
+    tracemalloc.stop()
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    stats = measure_memory(n)
+    print(
+        f"{n} rows: dicts {stats['dict_bytes_per_row']:.0f} B/row, "
+        f"StagingBatch {stats['batch_bytes_per_row']:.0f} B/row "
+        f"({stats['dict_bytes_per_row'] / stats['batch_bytes_per_row']:.1f}x smaller)"
+    )
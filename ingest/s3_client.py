@@ -108,6 +108,25 @@ class S3Client:
             logger.error(f"Error listing S3 objects: {e}")
             raise
 
+    # ----------------------------------------------------------------------
+    def list_jsonl_sizes(self) -> dict[str, int]:
+        """Same listing as list_jsonl_files, with object sizes in bytes."""
+        try:
+            paginator = self.s3.get_paginator("list_objects_v2")
+            sizes = {}
+
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.raw_prefix):
+                for obj in page.get("Contents", []):
+                    key = obj["Key"]
+                    if key.endswith(self.file_ext):
+                        sizes[key] = obj.get("Size", 0)
+
+            return sizes
+
+        except ClientError as e:
+            logger.error(f"Error listing S3 objects: {e}")
+            raise
+
     # ----------------------------------------------------------------------
     def stream_jsonl_lines(self, key: str):
         """Stream a JSONL file from S3."""
@@ -126,6 +145,11 @@ class S3Client:
             logger.error(f"Error streaming file {key}: {e}")
             raise
 
+    # ----------------------------------------------------------------------
+    def count_jsonl_lines(self, key: str) -> int:
+        """Count non-empty lines of a JSONL file (1 line = 1 record)."""
+        return sum(1 for _ in self.stream_jsonl_lines(key))
+
     # ======================================================================
     #                          HASH COMPUTATION
     # ======================================================================
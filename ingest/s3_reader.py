@@ -19,7 +19,8 @@ class S3JSONLReader:
         self.s3 = S3Client(config_path=config_path)
 
     # ------------------------------------------------------------------
-    def detect_source(self, key: str) -> str:
+    @staticmethod
+    def detect_source(key: str) -> str:
         """
         Detect the upstream source from the S3 key.
         """
@@ -121,54 +122,80 @@ class S3JSONLReader:
         }
 
     # ------------------------------------------------------------------
-    def iter_records(self, key: str):
+    def parse_line(self, line: str, source: str, key: str, on_source_rows=None) -> list[dict]:
         """
-        Streams JSONL lines from S3, detects the source,
-        extracts _airbyte_data and yields normalized staging dicts.
+        Parses ONE raw JSONL line into zero or more staging dicts.
+        Invalid or empty lines yield an empty list.
+
+        on_source_rows, if given, receives the number of source rows the
+        line holds, dropped ones included: its expanded hourly rows for
+        InfoClimat, else 1 (the same count as an S3 recount of the file).
         """
-        source = self.detect_source(key)
-        logger.info(f"Detected source '{source}' for file: {key}")
+        records, source_rows = self._parse_line(line, source, key)
+        if on_source_rows is not None:
+            on_source_rows(source_rows)
+        return records
 
-        for line in self.s3.stream_jsonl_lines(key):
-            try:
-                raw = json.loads(line)
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON line in {key}: {line[:200]}")
-                continue
+    def _parse_line(self, line: str, source: str, key: str) -> tuple[list[dict], int]:
+        # InfoClimat counts its hourly rows, other sources one row per line
+        line_rows = 0 if source == "infoclimat" else 1
+
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError:
+            logger.error(f"Invalid JSON line in {key}: {line[:200]}")
+            return [], line_rows
+
+        if "_airbyte_data" not in raw:
+            logger.warning(f"Missing _airbyte_data in line for {key}")
+            return [], line_rows
 
-            if "_airbyte_data" not in raw:
-                logger.warning(f"Missing _airbyte_data in line for {key}")
-                continue
+        data = raw["_airbyte_data"]
 
-            data = raw["_airbyte_data"]
+        if source == "wunderground":
+            # each line is already one hourly row
+            return [self.parse_wunderground(data)], line_rows
 
-            if source == "wunderground":
-                # each line is already one hourly row
-                yield self.parse_wunderground(data)
+        if source == "infoclimat":
+            hourly = data.get("hourly", {})
 
-            elif source == "infoclimat":
-                hourly = data.get("hourly", {})
+            if not hourly:
+                logger.warning(f"No 'hourly' block in InfoClimat payload for {key}")
+                return [], 0
 
-                if not hourly:
-                    logger.warning(f"No 'hourly' block in InfoClimat payload for {key}")
+            records = []
+
+            # hourly is a dict: { '07015': [rows...], 'STATIC0010': [rows...], '_params': {...} }
+            for station_code, rows in hourly.items():
+                if station_code == "_params":
+                    continue
+                if not isinstance(rows, list):
+                    logger.warning(
+                        f"Hourly[{station_code}] for {key} is not a list, skipping."
+                    )
                     continue
 
-                # hourly is a dict: { '07015': [rows...], 'STATIC0010': [rows...], '_params': {...} }
-                for station_code, rows in hourly.items():
-                    if station_code == "_params":
-                        continue
-                    if not isinstance(rows, list):
-                        logger.warning(
-                            f"Hourly[{station_code}] for {key} is not a list, skipping."
-                        )
+                line_rows += len(rows)
+                for row in rows:
+                    if not isinstance(row, dict):
                         continue
+                    # row already has id_station + dh_utc + measurements
+                    records.append(self.parse_infoclimat(row))
+
+            return records, line_rows
 
-                    for row in rows:
-                        if not isinstance(row, dict):
-                            continue
-                        # row already has id_station + dh_utc + measurements
-                        yield self.parse_infoclimat(row)
+        # Fallback: just yield raw _airbyte_data
+        return [data], line_rows
 
-            else:
-                # Fallback: just yield raw _airbyte_data
-                yield data
+    # ------------------------------------------------------------------
+    def iter_records(self, key: str, on_source_rows=None):
+        """
+        Streams JSONL lines from S3, detects the source,
+        extracts _airbyte_data and yields normalized staging dicts.
+        on_source_rows: see parse_line.
+        """
+        source = self.detect_source(key)
+        logger.info(f"Detected source '{source}' for file: {key}")
+
+        for line in self.s3.stream_jsonl_lines(key):
+            yield from self.parse_line(line, source, key, on_source_rows)
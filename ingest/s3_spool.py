@@ -0,0 +1,196 @@
+# ingest/s3_spool.py
+
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+
+from loguru import logger
+
+from ingest.s3_client import S3Client
+
+
+class SpooledS3Client:
+    """
+    Drop-in wrapper around S3Client that downloads each object ONCE to a
+    local temp file, then serves every re-read (hashing, line streaming,
+    counting) from an mmap of that file.
+
+    - Spooled files live in a private temp directory removed by close()
+      (or on context-manager exit).
+    - max_bytes is a disk budget: least-recently-used spooled files are
+      evicted to make room; an object larger than the whole budget is
+      never spooled and falls back to direct S3 streaming.
+    - Any attribute not overridden here (list_jsonl_files, bucket, ...)
+      is delegated to the wrapped S3Client.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        client: S3Client,
+        max_bytes: int = 2 * 1024 ** 3,
+        spool_dir: Optional[str] = None,
+    ):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.directory = tempfile.mkdtemp(prefix="s3spool_", dir=spool_dir)
+
+        # key → (path, size), ordered from least to most recently used
+        self._files: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._too_large: set[str] = set()
+        self.used_bytes = 0
+
+        logger.info(f"[SPOOL] Local spool at {self.directory} (budget={max_bytes} bytes)")
+
+    @classmethod
+    def from_env(cls, client: S3Client) -> Optional["SpooledS3Client"]:
+        """Build a spool from env vars; None unless INGEST_SPOOL=true."""
+        if os.getenv("INGEST_SPOOL", "false").lower() != "true":
+            return None
+
+        return cls(
+            client,
+            max_bytes=int(os.getenv("INGEST_SPOOL_MAX_BYTES", 2 * 1024 ** 3)),
+            spool_dir=os.getenv("INGEST_SPOOL_DIR") or None,
+        )
+
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----------------------------------------------------------------------
+    # SPOOL MANAGEMENT
+    # ----------------------------------------------------------------------
+    def _evict_until(self, free_bytes: int):
+        while self._files and self.used_bytes + free_bytes > self.max_bytes:
+            key, _ = next(iter(self._files.items()))
+            self.release(key)
+
+    def _spool(self, key: str) -> Optional[str]:
+        """
+        Returns the local path of the spooled object, downloading it if
+        needed. Returns None when the object does not fit in the budget.
+        """
+        if key in self._files:
+            self._files.move_to_end(key)
+            return self._files[key][0]
+
+        if key in self._too_large:
+            return None
+
+        logger.info(f"[SPOOL] Downloading s3://{self.client.bucket}/{key}")
+
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".jsonl")
+        size = 0
+
+        try:
+            obj = self.client.s3.get_object(Bucket=self.client.bucket, Key=key)
+            body = obj["Body"]
+
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: body.read(self.CHUNK_SIZE), b""):
+                    size += len(chunk)
+
+                    if size > self.max_bytes:
+                        raise _OverBudget()
+
+                    self._evict_until(size)
+                    f.write(chunk)
+
+        except _OverBudget:
+            os.remove(path)
+            self._too_large.add(key)
+            logger.warning(f"[SPOOL] {key} exceeds spool budget → streaming from S3")
+            return None
+
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+
+        self._files[key] = (path, size)
+        self.used_bytes += size
+        return path
+
+    def release(self, key: str):
+        """Delete the local copy of one object (no-op if not spooled)."""
+        entry = self._files.pop(key, None)
+        if entry is None:
+            return
+
+        path, size = entry
+        self.used_bytes -= size
+        if os.path.exists(path):
+            os.remove(path)
+
+    def close(self):
+        """Delete every spooled file and the spool directory."""
+        self._files.clear()
+        self.used_bytes = 0
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # ----------------------------------------------------------------------
+    # S3Client API (served from mmap)
+    # ----------------------------------------------------------------------
+    @staticmethod
+    def _iter_mmap_lines(path: str):
+        if os.path.getsize(path) == 0:
+            return
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw_line in iter(mm.readline, b""):
+                raw_line = raw_line.rstrip(b"\r\n")
+                if not raw_line:
+                    continue
+                yield raw_line
+
+    @staticmethod
+    def _digest(path: str, hasher) -> str:
+        if os.path.getsize(path) > 0:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
+        return hasher.hexdigest()
+
+    def stream_jsonl_lines(self, key: str):
+        path = self._spool(key)
+        if path is None:
+            yield from self.client.stream_jsonl_lines(key)
+            return
+
+        for raw_line in self._iter_mmap_lines(path):
+            yield raw_line.decode("utf-8")
+
+    def count_jsonl_lines(self, key: str) -> int:
+        path = self._spool(key)
+        if path is None:
+            return self.client.count_jsonl_lines(key)
+        return sum(1 for _ in self._iter_mmap_lines(path))
+
+    def compute_file_hash(self, key: str) -> str:
+        path = self._spool(key)
+        if path is None:
+            return self.client.compute_file_hash(key)
+        return self._digest(path, hashlib.sha256())
+
+    def get_md5_from_stream(self, key: str) -> str:
+        path = self._spool(key)
+        if path is None:
+            return self.client.get_md5_from_stream(key)
+        return self._digest(path, hashlib.md5())
+
+
+class _OverBudget(Exception):
+    """Internal: object does not fit in the spool disk budget."""
@@ -0,0 +1,396 @@
+# ingest/staged_pipeline.py
+
+from __future__ import annotations
+from typing import Callable, Iterable, Optional
+import os
+import queue
+import threading
+import time
+
+from loguru import logger
+from pydantic import BaseModel
+
+from ingest.manifest import ManifestBuilder
+from ingest.record_batch import StagingBatch
+from ingest.s3_reader import S3JSONLReader
+from models.hourly_staging_model import HourlyStagingModel
+from ingest.numeric_values import extract_numeric
+
+
+# Marks the end of a stream inside a queue (one per downstream worker)
+_SENTINEL = object()
+
+# How long a blocked put/get waits before re-checking the stop flag
+_POLL_SECONDS = 0.1
+
+
+# ----------------------------------------------------------------------
+# CONFIGURATION
+# ----------------------------------------------------------------------
+class PipelineConfig(BaseModel):
+    """
+    Sizing of the staged ingestion pipeline.
+
+    queue_size bounds every inter-stage queue: when the writer slows down,
+    upstream stages block on put() instead of buffering the whole file.
+    The validator → writer queue carries StagingBatch objects of up to
+    batch_size rows, so it holds queue_size // batch_size batches (same
+    row bound).
+    """
+
+    queue_size: int = 1000
+    parser_workers: int = 1
+    validator_workers: int = 2
+    writer_workers: int = 2
+    batch_size: int = 1000
+
+    @classmethod
+    def from_env(cls) -> Optional["PipelineConfig"]:
+        """
+        Load pipeline sizing from environment variables.
+        Returns None when the staged pipeline is disabled (default).
+        """
+        if os.getenv("INGEST_STAGED_PIPELINE", "false").lower() != "true":
+            return None
+
+        return cls(
+            queue_size=int(os.getenv("INGEST_QUEUE_SIZE", 1000)),
+            parser_workers=int(os.getenv("INGEST_PARSER_WORKERS", 1)),
+            validator_workers=int(os.getenv("INGEST_VALIDATOR_WORKERS", 2)),
+            writer_workers=int(os.getenv("INGEST_WRITER_WORKERS", 2)),
+            batch_size=int(os.getenv("INGEST_BATCH_SIZE", 1000)),
+        )
+
+
+# ----------------------------------------------------------------------
+# PER-STAGE METRICS
+# ----------------------------------------------------------------------
+class StageMetrics:
+    """
+    Thread-safe counters for one pipeline stage.
+    """
+
+    def __init__(self, name: str, workers: int, inbox: Optional[queue.Queue] = None):
+        self.name = name
+        self.workers = workers
+        self.inbox = inbox
+
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._lock = threading.Lock()
+
+    def record(self, items_in: int, items_out: int, seconds: float):
+        with self._lock:
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_seconds += seconds
+
+            if self.inbox is not None:
+                self.max_queue_depth = max(self.max_queue_depth, self.inbox.qsize())
+
+    @property
+    def queue_depth(self) -> int:
+        return self.inbox.qsize() if self.inbox is not None else 0
+
+    @property
+    def throughput(self) -> float:
+        """Items emitted per second of stage wall time."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at
+        return self.items_out / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "throughput_per_s": round(self.throughput, 1),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+# ----------------------------------------------------------------------
+# STAGED PIPELINE: S3 reader → parser → validator → batch writer
+# ----------------------------------------------------------------------
+class StagedIngestionPipeline:
+    """
+    Ingests ONE S3 JSONL file into staging through four threaded stages
+    connected by bounded queues.
+
+    - reader    : streams raw lines from S3 (single thread, sequential body)
+    - parser    : JSON decode + source-specific normalization
+    - validator : station/s3_key injection + HourlyStagingModel validation,
+                  documents buffered in a compact StagingBatch
+    - writer    : fused DQ on each StagingBatch, then insert_many
+
+    Because every queue is bounded, a slow Atlas write propagates back up to
+    the S3 stream and ingestion slows down instead of growing memory.
+    The first exception raised by any stage stops the pipeline and is
+    re-raised by run(); rows already flushed by the writer are kept.
+    """
+
+    def __init__(
+        self,
+        s3_key: str,
+        s3_reader: S3JSONLReader,
+        staging_collection,
+        station_id_override: Optional[str] = None,
+        config: Optional[PipelineConfig] = None,
+        manifest: Optional[ManifestBuilder] = None,
+        dq=None,
+    ):
+        self.s3_key = s3_key
+        self.s3_reader = s3_reader
+        self.staging = staging_collection
+        self.station_id_override = station_id_override
+        self.config = config or PipelineConfig()
+
+        self.source = s3_reader.detect_source(s3_key)
+        self.manifest = manifest
+
+        # Optional fused DQ (IngestTimeDQ): verdicts set on each batch before insert
+        self.dq = dq
+
+        size = self.config.queue_size
+        self.lines_q: queue.Queue = queue.Queue(maxsize=size)
+        self.records_q: queue.Queue = queue.Queue(maxsize=size)
+        # StagingBatch items: bounded in rows like the other queues
+        self.docs_q: queue.Queue = queue.Queue(maxsize=max(1, size // self.config.batch_size))
+
+        self.metrics = {
+            "reader": StageMetrics("reader", 1),
+            "parser": StageMetrics("parser", self.config.parser_workers, self.lines_q),
+            "validator": StageMetrics("validator", self.config.validator_workers, self.records_q),
+            "writer": StageMetrics("writer", self.config.writer_workers, self.docs_q),
+        }
+
+        self._stop = threading.Event()
+        self._errors: list[BaseException] = []
+        self._lock = threading.Lock()
+        self._remaining = {name: m.workers for name, m in self.metrics.items()}
+
+    # ------------------------------------------------------------------
+    # QUEUE HELPERS (stop-aware, never block forever)
+    # ------------------------------------------------------------------
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while True:
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _SENTINEL
+
+    def _fail(self, stage: str, exc: BaseException):
+        with self._lock:
+            self._errors.append(exc)
+        logger.error(f"[PIPELINE] Stage '{stage}' failed for {self.s3_key}: {exc}")
+        self._stop.set()
+
+    def _worker_done(self, stage: str, outbox: Optional[queue.Queue], downstream: int):
+        """The last worker of a stage closes the downstream queue."""
+        with self._lock:
+            self._remaining[stage] -= 1
+            last = self._remaining[stage] == 0
+
+        if last:
+            self.metrics[stage].finished_at = time.perf_counter()
+            if outbox is not None:
+                for _ in range(downstream):
+                    self._put(outbox, _SENTINEL)
+
+    # ------------------------------------------------------------------
+    # STAGE BODIES
+    # ------------------------------------------------------------------
+    def _read(self):
+        metrics = self.metrics["reader"]
+        try:
+            for line in self.s3_reader.s3.stream_jsonl_lines(self.s3_key):
+                metrics.record(1, 1, 0.0)
+                if not self._put(self.lines_q, line):
+                    return
+        except Exception as e:
+            self._fail("reader", e)
+        finally:
+            self._worker_done("reader", self.lines_q, self.config.parser_workers)
+
+    def _parse(self, line: str) -> Iterable[dict]:
+        on_source_rows = self.manifest.add_source_rows if self.manifest is not None else None
+        return self.s3_reader.parse_line(line, self.source, self.s3_key, on_source_rows)
+
+    def _validate(self, record: dict) -> Iterable[dict]:
+        # Inject station ID if inferred from path
+        if self.station_id_override:
+            record["id_station"] = self.station_id_override
+        elif "id_station" not in record:
+            raise ValueError(
+                f"id_station is missing in record and cannot be inferred for file {self.s3_key}"
+            )
+
+        # Inject s3_key for DQ lineage + source discriminator
+        record["s3_key"] = self.s3_key
+        record["source"] = self.source
+
+        # Numeric values parsed once, stored next to the raw strings
+        record["num"] = extract_numeric(record) or None
+
+        doc = HourlyStagingModel.model_validate(record).to_document()
+        if self.manifest is not None:
+            self.manifest.add(doc)
+
+        return [doc]
+
+    def _transform_worker(
+        self,
+        stage: str,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        downstream: int,
+        fn: Callable[[object], Iterable],
+    ):
+        metrics = self.metrics[stage]
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _SENTINEL:
+                    break
+
+                start = time.perf_counter()
+                results = list(fn(item))
+                metrics.record(1, len(results), time.perf_counter() - start)
+
+                for result in results:
+                    if not self._put(outbox, result):
+                        return
+        except Exception as e:
+            self._fail(stage, e)
+        finally:
+            self._worker_done(stage, outbox, downstream)
+
+    def _validate_worker(self):
+        """
+        Validator stage: validated documents are buffered in a StagingBatch
+        and handed to the writers batch_size rows at a time.
+        """
+        metrics = self.metrics["validator"]
+        batch = StagingBatch(self.s3_key, self.source)
+        try:
+            while True:
+                record = self._get(self.records_q)
+                if record is _SENTINEL:
+                    break
+
+                start = time.perf_counter()
+                docs = self._validate(record)
+                for doc in docs:
+                    batch.append(doc)
+                metrics.record(1, len(docs), time.perf_counter() - start)
+
+                if len(batch) >= self.config.batch_size:
+                    if not self._put(self.docs_q, batch):
+                        return
+                    batch = StagingBatch(self.s3_key, self.source)
+
+            # Only hand over the tail if the pipeline ended normally
+            if len(batch) and not self._stop.is_set():
+                self._put(self.docs_q, batch)
+        except Exception as e:
+            self._fail("validator", e)
+        finally:
+            self._worker_done("validator", self.docs_q, self.config.writer_workers)
+
+    def _flush(self, batch: StagingBatch):
+        metrics = self.metrics["writer"]
+        start = time.perf_counter()
+        if self.dq is not None:
+            docs = self.dq.apply(batch)
+        else:
+            docs = list(batch.iter_documents())
+        result = self.staging.insert_many(docs, ordered=False)
+        metrics.record(len(docs), len(result.inserted_ids), time.perf_counter() - start)
+
+    def _write(self):
+        try:
+            # Once stopped, queued batches are dropped: the file's rows
+            # are discarded anyway, writing them would only add deletes
+            while not self._stop.is_set():
+                batch = self._get(self.docs_q)
+                if batch is _SENTINEL or self._stop.is_set():
+                    break
+                self._flush(batch)
+        except Exception as e:
+            self._fail("writer", e)
+        finally:
+            self._worker_done("writer", None, 0)
+
+    # ------------------------------------------------------------------
+    # RUN
+    # ------------------------------------------------------------------
+    def run(self) -> int:
+        """
+        Runs the pipeline to completion.
+        Returns the number of validated records (same meaning as lines_read
+        in the sequential ingestion path).
+        """
+        cfg = self.config
+        threads: list[threading.Thread] = []
+
+        def spawn(stage: str, target, *args):
+            self.metrics[stage].started_at = self.metrics[stage].started_at or time.perf_counter()
+            t = threading.Thread(target=target, args=args, name=f"{stage}-{self.s3_key}", daemon=True)
+            t.start()
+            threads.append(t)
+
+        for _ in range(cfg.writer_workers):
+            spawn("writer", self._write)
+        for _ in range(cfg.validator_workers):
+            spawn("validator", self._validate_worker)
+        for _ in range(cfg.parser_workers):
+            spawn(
+                "parser", self._transform_worker,
+                "parser", self.lines_q, self.records_q, cfg.validator_workers, self._parse,
+            )
+        spawn("reader", self._read)
+
+        for t in threads:
+            t.join()
+
+        self.log_metrics()
+
+        if self._errors:
+            raise self._errors[0]
+
+        return self.metrics["validator"].items_out
+
+    # ------------------------------------------------------------------
+    def snapshot(self) -> list[dict]:
+        """Current metrics of every stage (safe to call while running)."""
+        return [m.snapshot() for m in self.metrics.values()]
+
+    def log_metrics(self):
+        for snap in self.snapshot():
+            logger.info(
+                f"[PIPELINE] {self.s3_key} • {snap['stage']:<9} "
+                f"workers={snap['workers']} in={snap['items_in']} out={snap['items_out']} "
+                f"busy={snap['busy_seconds']}s rate={snap['throughput_per_s']}/s "
+                f"max_queue={snap['max_queue_depth']}"
+            )
@@ -1,12 +1,24 @@
 from __future__ import annotations
+from typing import Optional
+import os
+import socket
+import time
 from loguru import logger
+from pydantic import BaseModel, Field
 
 from config.settings import load_env
 from connectors.mongodb_client import MongoSettings, MongoDBClient
 from ingest.s3_client import S3Client
 from ingest.s3_reader import S3JSONLReader
-from ingest.ingestion_tracker import IngestionTracker
+from ingest.s3_spool import SpooledS3Client
+from ingest.scheduler import build_scheduler
+from ingest.manifest import ManifestBuilder
+from ingest.ingestion_tracker import IngestionTracker, LeaseHeartbeat, LeaseLostError
+from ingest.staged_pipeline import PipelineConfig, StagedIngestionPipeline
 from models.hourly_staging_model import HourlyStagingModel
+from ingest.numeric_values import extract_numeric
+from ingest.record_batch import StagingBatch
+from quality.dq_validator import SCHEMAS, DataQualityValidator, IngestTimeDQ
 
 
 # ----------------------------------------------------------------------
@@ -34,6 +46,76 @@ def resolve_station_id(mongo: MongoDBClient, s3_key: str) -> str:
     return station_id
 
 
+# ----------------------------------------------------------------------
+# SEQUENTIAL PATH: validate everything, then insert in bulk
+# ----------------------------------------------------------------------
+def _ingest_sequential(
+    s3_key: str,
+    s3_reader: S3JSONLReader,
+    staging_collection,
+    station_id_override: Optional[str],
+    manifest: ManifestBuilder,
+    dq: Optional[IngestTimeDQ] = None,
+) -> int:
+    lines_read = 0
+    source = S3JSONLReader.detect_source(s3_key)
+
+    # Compact buffer: documents are rebuilt only when inserted
+    validated_docs = StagingBatch(s3_key, source)
+
+    for record in s3_reader.iter_records(s3_key, manifest.add_source_rows):
+        lines_read += 1
+
+        # Inject station ID if inferred from path
+        if station_id_override:
+            record["id_station"] = station_id_override
+        else:
+            if "id_station" not in record:
+                raise ValueError(
+                    f"id_station is missing in record and cannot be inferred for file {s3_key}"
+                )
+
+        # Inject s3_key for DQ lineage + source discriminator
+        record["s3_key"] = s3_key
+        record["source"] = source
+
+        # Numeric values parsed once, stored next to the raw strings
+        record["num"] = extract_numeric(record) or None
+
+        model = HourlyStagingModel.model_validate(record)
+        doc = model.to_document()
+        manifest.add(doc)
+        validated_docs.append(doc)
+
+    # Insert in bulk
+    if len(validated_docs):
+        inserted = 0
+        batch_size = int(os.getenv("INGEST_BATCH_SIZE", 1000))
+        for chunk in validated_docs.chunks(batch_size):
+            if dq is not None:
+                dq.apply(chunk)
+            result = staging_collection.insert_many(chunk, ordered=False)
+            inserted += len(result.inserted_ids)
+        logger.success(f"Inserted {inserted} rows into staging.")
+
+    return lines_read
+
+
+# ----------------------------------------------------------------------
+# PARTIAL ROWS OF AN EARLIER ATTEMPT
+# ----------------------------------------------------------------------
+def discard_staging_rows(staging_collection, s3_key: str) -> int:
+    """
+    Removes every staging row of one file. A failed attempt may already
+    have inserted some chunks (with their fused DQ verdicts): each
+    attempt starts from an empty file so retries never add copies.
+    """
+    result = staging_collection.delete_many({"s3_key": s3_key})
+    if result.deleted_count:
+        logger.warning(f"🧹 Removed {result.deleted_count} staging row(s) of {s3_key} left by an earlier attempt")
+    return result.deleted_count
+
+
 # ----------------------------------------------------------------------
 # INGEST ONE FILE INTO STAGING
 # ----------------------------------------------------------------------
@@ -42,8 +124,38 @@ def ingest_file_to_staging(
     s3_reader: S3JSONLReader,
     mongo: MongoDBClient,
     tracker: IngestionTracker,
+    pipeline_config: Optional[PipelineConfig] = None,
+    size_bytes: Optional[int] = None,
+    fused_dq: Optional[bool] = None,
+    lease: Optional[LeaseHeartbeat] = None,
+    dq_validator: Optional[DataQualityValidator] = None,
 ):
+    """
+    Ingest one S3 file into staging.
+
+    With pipeline_config, rows flow through the bounded, threaded
+    StagedIngestionPipeline (reader → parser → validator → batch writer)
+    instead of being validated in a single loop and inserted at the end.
+
+    Size, rows and wall time are recorded on the tracker so that later
+    runs can schedule the most expensive files first.
+
+    With fused_dq (default: INGEST_FUSED_DQ), each batch is validated
+    against the source's pandera schema before insert and the file's
+    dq_validated is set before the file is marked successful, so
+    DataQualityValidator has nothing left to do for this file. Pass
+    dq_validator to share one validator across the files of a run.
+
+    With lease (distributed mode), the file is only marked successful if
+    this worker still holds its lease; otherwise LeaseLostError is raised
+    and the tracker is left to the worker that took the file over.
+
+    The file's staging rows are replaced, never appended to: rows of an
+    earlier (failed) attempt are removed first, and the rows of a failed
+    attempt are removed before the failure is recorded.
+    """
     logger.info(f"🚀 Starting ingestion for {s3_key}")
+    started = time.perf_counter()
 
     tracker.start_ingestion(s3_key)
 
@@ -51,58 +163,171 @@ def ingest_file_to_staging(
 
     station_id_override = resolve_station_id(mongo, s3_key)
 
-    validated_docs = []
-    lines_read = 0
-
-    try:
-        for record in s3_reader.iter_records(s3_key):
-            lines_read += 1
+    source = S3JSONLReader.detect_source(s3_key)
+    manifest = ManifestBuilder(s3_key, source)
 
-            # Inject station ID if inferred from path
-            if station_id_override:
-                record["id_station"] = station_id_override
-            else:
-                if "id_station" not in record:
-                    raise ValueError(
-                        f"id_station is missing in record and cannot be inferred for file {s3_key}"
-                    )
+    if fused_dq is None:
+        fused_dq = os.getenv("INGEST_FUSED_DQ", "false").lower() == "true"
 
-            # Inject s3_key for DQ lineage
-            record["s3_key"] = s3_key
+    dq = None
+    if fused_dq and source in SCHEMAS:
+        dq = IngestTimeDQ(dq_validator or DataQualityValidator(mongo), s3_key, source)
 
-            model = HourlyStagingModel.model_validate(record)
-            validated_docs.append(model.model_dump())
-
-        # Insert in bulk
-        if validated_docs:
-            result = staging_collection.insert_many(validated_docs, ordered=False)
-            logger.success(f"Inserted {len(result.inserted_ids)} rows into staging.")
+    try:
+        discard_staging_rows(staging_collection, s3_key)
+
+        if pipeline_config is not None:
+            pipeline = StagedIngestionPipeline(
+                s3_key=s3_key,
+                s3_reader=s3_reader,
+                staging_collection=staging_collection,
+                station_id_override=station_id_override,
+                config=pipeline_config,
+                manifest=manifest,
+                dq=dq,
+            )
+            lines_read = pipeline.run()
+        else:
+            lines_read = _ingest_sequential(
+                s3_key, s3_reader, staging_collection, station_id_override, manifest, dq
+            )
 
         # Compute hash
         file_hash = s3_reader.s3.compute_file_hash(s3_key)
 
+        if lease is not None and not lease.still_held():
+            raise LeaseLostError(f"Lease on {s3_key} lost before commit")
+
+        # Late duplicates + file verdict first: a failure here must not
+        # leave a file marked successful with half-written verdicts
+        if dq is not None:
+            dq.finish()
+
         tracker.mark_success(
             s3_key=s3_key,
             lines_read=lines_read,
             file_hash=file_hash,
+            size_bytes=size_bytes,
+            duration_seconds=time.perf_counter() - started,
+            manifest=manifest.build(),
         )
 
         logger.success(f"✔ Ingestion complete for {s3_key}")
 
+    except LeaseLostError:
+        # The new lease owner decides this file's state
+        logger.error(f"❌ Lease lost during ingestion of {s3_key}: result discarded")
+        raise
+
     except Exception as e:
         logger.error(f"❌ Error during ingestion of {s3_key}: {e}")
+        discard_staging_rows(staging_collection, s3_key)
         tracker.mark_failure(s3_key=s3_key, error_message=str(e))
         raise
 
 
+# ----------------------------------------------------------------------
+# DISTRIBUTED MODE: lease owner for this worker (None = single worker)
+# ----------------------------------------------------------------------
+def resolve_worker_id() -> Optional[str]:
+    if os.getenv("INGEST_DISTRIBUTED", "false").lower() != "true":
+        return None
+    return os.getenv("INGEST_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+# ----------------------------------------------------------------------
+# DECIDE (new / modified / failed / skip) AND INGEST ONE FILE
+# ----------------------------------------------------------------------
+def _ingest_if_needed(
+    s3_key: str,
+    s3_client: S3Client,
+    s3_reader: S3JSONLReader,
+    mongo: MongoDBClient,
+    tracker: IngestionTracker,
+    known_files: Optional[set[str]],
+    pipeline_config: Optional[PipelineConfig],
+    size_bytes: Optional[int] = None,
+    lease: Optional[LeaseHeartbeat] = None,
+    dq_validator: Optional[DataQualityValidator] = None,
+) -> bool:
+    """
+    Returns True if the file was ingested, False if it was skipped.
+
+    known_files=None (distributed mode): the startup snapshot may be stale
+    (another worker may have ingested the file since), so the decision is
+    taken from the tracker document, re-read after the claim.
+    """
+    current_hash = s3_client.compute_file_hash(s3_key)
+    previous_hash = tracker.get_file_hash(s3_key)
+    is_modified = (previous_hash is not None and current_hash != previous_hash)
+    is_success = tracker.was_successful(s3_key)
+
+    if known_files is None:
+        is_new = previous_hash is None and not is_success
+    else:
+        is_new = s3_key not in known_files
+
+    if is_new:
+        logger.info(f"🟦 NEW FILE → ingest: {s3_key}")
+
+    elif is_modified:
+        logger.info(f"🟨 MODIFIED FILE → re-ingest: {s3_key}")
+
+    elif not is_success:
+        logger.info(f"🟧 FAILED → retry: {s3_key}")
+
+    else:
+        logger.info(f"🟩 SKIP: already successfully processed → {s3_key}")
+        return False
+
+    ingest_file_to_staging(
+        s3_key, s3_reader, mongo, tracker, pipeline_config, size_bytes,
+        lease=lease, dq_validator=dq_validator,
+    )
+    return True
+
+
+# ----------------------------------------------------------------------
+# RUN SUMMARY (returned to main.py / Step Functions callback)
+# ----------------------------------------------------------------------
+class FileFailure(BaseModel):
+    s3_key: str
+    error: str
+    attempts: int = 1
+
+
+class IngestionSummary(BaseModel):
+    ingested: list[str] = Field(default_factory=list)
+    skipped: list[str] = Field(default_factory=list)
+    failed: list[FileFailure] = Field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
 # ----------------------------------------------------------------------
 # INGEST ALL NEW OR MODIFIED FILES
 # ----------------------------------------------------------------------
-def ingest_all_staging():
+def ingest_all_staging(continue_on_error: Optional[bool] = None) -> dict:
+    """
+    Ingest every new, modified or previously failed S3 file.
+
+    By default the first failing file aborts the run (exception re-raised).
+    With continue_on_error (or INGEST_CONTINUE_ON_ERROR=true) failures are
+    recorded, the remaining files are ingested, and failed files are retried
+    at the end with exponential backoff (ingestion.max_retries and
+    ingestion.retry_delay_seconds from s3_config.yaml).
+
+    Returns the IngestionSummary as a dict.
+    """
 
     logger.info("🔧 Loading environment...")
     load_env()
 
+    if continue_on_error is None:
+        continue_on_error = os.getenv("INGEST_CONTINUE_ON_ERROR", "false").lower() == "true"
+
     mongo_settings = MongoSettings.from_env()
     mongo = MongoDBClient(mongo_settings)
     mongo.connect()
@@ -110,37 +335,121 @@ def ingest_all_staging():
     s3_client = S3Client()
     s3_reader = S3JSONLReader()
     tracker = IngestionTracker(mongo)
+    pipeline_config = PipelineConfig.from_env()
+
+    retry_cfg = s3_client.config.get("ingestion", {})
+    max_retries = int(retry_cfg.get("max_retries", 3))
+    retry_delay = float(retry_cfg.get("retry_delay_seconds", 2))
+
+    if pipeline_config is not None:
+        logger.info(f"🧵 Staged ingestion pipeline enabled: {pipeline_config.model_dump()}")
+
+    # Fused ingest-time DQ: one validator (and S3 client) for the whole run
+    dq_validator = None
+    if os.getenv("INGEST_FUSED_DQ", "false").lower() == "true":
+        dq_validator = DataQualityValidator(mongo)
+
+    # Optional local spool: each object is downloaded once, then hashed
+    # and re-read from an mmap instead of being fetched from S3 3 times.
+    spool = SpooledS3Client.from_env(s3_client)
+    if spool is not None:
+        s3_client = spool
+        s3_reader.s3 = spool
+
+    # Optional distributed mode: several containers share the file list and
+    # each file is processed by whoever holds its lease in ingestion_tracker.
+    owner = resolve_worker_id()
+    lease_seconds = int(os.getenv("INGEST_LEASE_SECONDS", 300))
+    if owner is not None:
+        logger.info(f"🔒 Distributed ingestion enabled (worker={owner}, lease={lease_seconds}s)")
+
+    summary = IngestionSummary()
+
+    def process(s3_key: str) -> bool:
+        args = (s3_key, s3_client, s3_reader, mongo, tracker)
+
+        try:
+            if owner is None:
+                return _ingest_if_needed(
+                    *args, known_files, pipeline_config, sizes.get(s3_key), dq_validator=dq_validator
+                )
+
+            if tracker.claim(s3_key, owner, lease_seconds) is None:
+                return False
+
+            # Never trust known_files here: decide from the tracker, after the claim
+            with LeaseHeartbeat(tracker, s3_key, owner, lease_seconds) as lease:
+                return _ingest_if_needed(
+                    *args, None, pipeline_config, sizes.get(s3_key), lease=lease, dq_validator=dq_validator
+                )
+
+        except LeaseLostError:
+            # Taken over by another worker, which finishes the file
+            return False
+
+        finally:
+            if spool is not None:
+                spool.release(s3_key)
 
-    s3_files = s3_client.list_jsonl_files()
-    logger.info(f"📂 {len(s3_files)} JSONL files found in S3")
+    try:
+        sizes = s3_client.list_jsonl_sizes()
+        logger.info(f"📂 {len(sizes)} JSONL files found in S3")
 
-    known_files = tracker.list_known_files()
+        # Longest-processing-time-first from the stats of previous runs
+        workers = int(os.getenv("INGEST_EXPECTED_WORKERS", 1))
+        s3_files = build_scheduler(tracker, sizes).plan(list(sizes), workers)
 
-    for s3_key in s3_files:
+        known_files = tracker.list_known_files()
 
-        is_new = s3_key not in known_files
-        current_hash = s3_client.compute_file_hash(s3_key)
-        previous_hash = tracker.get_file_hash(s3_key)
-        is_modified = (previous_hash is not None and current_hash != previous_hash)
-        is_success = tracker.was_successful(s3_key)
+        # ---- First pass ------------------------------------------------
+        deferred: dict[str, FileFailure] = {}
 
-        if is_new:
-            logger.info(f"🟦 NEW FILE → ingest: {s3_key}")
+        for s3_key in s3_files:
+            try:
+                (summary.ingested if process(s3_key) else summary.skipped).append(s3_key)
 
-        elif is_modified:
-            logger.info(f"🟨 MODIFIED FILE → re-ingest: {s3_key}")
+            except Exception as e:
+                if not continue_on_error:
+                    raise
+                logger.warning(f"⏭ Deferring {s3_key} after failure: {e}")
+                deferred[s3_key] = FileFailure(s3_key=s3_key, error=str(e))
 
-        elif not is_success:
-            logger.info(f"🟧 FAILED → retry: {s3_key}")
+        # ---- Deferred retries with exponential backoff -------------------
+        for attempt in range(1, max_retries + 1):
+            if not deferred:
+                break
 
-        else:
-            logger.info(f"🟩 SKIP: already successfully processed → {s3_key}")
-            continue
+            delay = retry_delay * 2 ** (attempt - 1)
+            logger.info(
+                f"🔁 Retry round {attempt}/{max_retries} for {len(deferred)} file(s) in {delay:.0f}s"
+            )
+            time.sleep(delay)
+
+            for s3_key, failure in list(deferred.items()):
+                try:
+                    (summary.ingested if process(s3_key) else summary.skipped).append(s3_key)
+                    del deferred[s3_key]
+
+                except Exception as e:
+                    failure.error = str(e)
+                    failure.attempts += 1
 
-        ingest_file_to_staging(s3_key, s3_reader, mongo, tracker)
+        summary.failed = list(deferred.values())
+
+    finally:
+        if spool is not None:
+            spool.close()
+        mongo.close()
+
+    if summary.ok:
+        logger.info(f"🏁 Staging ingestion complete ({len(summary.ingested)} ingested, {len(summary.skipped)} skipped).")
+    else:
+        logger.error(
+            f"🏁 Staging ingestion finished with {len(summary.failed)} failed file(s): "
+            f"{[f.s3_key for f in summary.failed]}"
+        )
 
-    mongo.close()
-    logger.info("🏁 Staging ingestion complete.")
+    return summary.model_dump()
 
 
 if __name__ == "__main__":
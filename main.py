@@ -1,4 +1,5 @@
 import argparse
+import json
 import time
 import os
 import traceback
@@ -28,6 +29,7 @@ from quality.latency_test import run_latency_test
 from quality.schema_validity_test import run_schema_validity_test
 from quality.uniqueness_test import test_staging_uniqueness
 from quality.volume_test_v2 import run_volume_test_v2
+from quality.temporal_checks import run_temporal_dq_test
 
 
 # ---------------------------------------------------------------------
@@ -68,9 +70,24 @@ heartbeat_active = {"run": False}
 def send_success(token, output):
     sf.send_task_success(
         taskToken=token,
-        output=str(output)
+        output=json.dumps(output, default=str)
     )
 
+def build_output(task_name, result):
+    """
+    Callback payload. Tasks may return a dict of structured results;
+    an ingestion summary with failed files turns the status into
+    'partial_failure' (the task itself completed).
+    """
+    output = {"task": task_name, "status": "success"}
+
+    if isinstance(result, dict):
+        output["result"] = result
+        if result.get("ingestion", {}).get("failed"):
+            output["status"] = "partial_failure"
+
+    return output
+
 def send_failure(token, error):
     sf.send_task_failure(
         taskToken=token,
@@ -91,7 +108,7 @@ def task_pipeline_full():
 
     load_all_stations()
     load_all_metadata()
-    ingest_all_staging()
+    ingestion = ingest_all_staging()
 
     run_all_dq_tests()
 
@@ -103,13 +120,15 @@ def task_pipeline_full():
     run_schema_validity_test()
     test_staging_uniqueness()
     run_volume_test_v2()
+    run_temporal_dq_test()
 
     logger.success("🌤 FULL PIPELINE SUCCESS")
+    return {"ingestion": ingestion}
 
 
 def task_load_all_stations(): load_all_stations()
 def task_load_all_metadata(): load_all_metadata()
-def task_load_staging(): ingest_all_staging()
+def task_load_staging(): return {"ingestion": ingest_all_staging()}
 def task_dq_staging(): run_all_dq_tests()
 def task_transform(): run_hourly_transform()
 
@@ -120,6 +139,7 @@ def task_final_tests():
     run_schema_validity_test()
     test_staging_uniqueness()
     run_volume_test_v2()
+    run_temporal_dq_test()
 
 
 TASKS = {
@@ -200,8 +220,8 @@ def main():
     start_heartbeat_thread(token, args.heartbeat_interval)
 
     try:
-        TASKS[task_name]()
-        send_success(token, {"task": task_name, "status": "success"})
+        result = TASKS[task_name]()
+        send_success(token, build_output(task_name, result))
         logger.success(f"✔ Task {task_name} completed.")
 
     except Exception as e:
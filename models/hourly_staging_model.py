@@ -5,9 +5,22 @@ from typing import Optional
 
 
 class HourlyStagingModel(BaseModel):
+    """
+    Union of the InfoClimat and Weather Underground staging layouts.
+    Stored sparsely via to_document(): only the fields of the row's own
+    source are written, tagged with the `source` discriminator.
+    """
+
     id_station: str
     s3_key: str = Field(...)
+    source: Optional[str] = None
     dq_checked: bool = False
+    dq_errors: Optional[list[str]] = None
+    transformed_at: Optional[datetime] = None
+    transform_error: Optional[str] = None
+
+    # Typed values parsed at ingest: {"temperature_F": 56.8, ...}
+    num: Optional[dict[str, float]] = None
     
     dh_utc: Optional[datetime] = None
     time_local: Optional[str] = None
@@ -45,3 +58,6 @@ class HourlyStagingModel(BaseModel):
     precip_rate_in: Optional[str] = None
     precip_accum_in: Optional[str] = None
 
+    def to_document(self) -> dict:
+        """Sparse staging document: absent (None) fields are not written."""
+        return self.model_dump(exclude_none=True)
@@ -1,7 +1,63 @@
 # models/ingestion_tracker_model.py
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
+
+
+class StationCount(BaseModel):
+    id_station: str
+    rows: int
+
+
+class FileManifestModel(BaseModel):
+    """
+    Zone map of one ingested file, stored under ingestion_tracker.manifest.
+    Lets later stages prune files by station or time range.
+    """
+
+    source: str
+    row_count: int = 0
+    # Rows of the raw file, dropped ones included (None: not recorded)
+    source_rows: Optional[int] = None
+    station_ids: list[str] = Field(default_factory=list)
+    stations: list[StationCount] = Field(default_factory=list)
+    min_dh_utc: Optional[datetime] = None
+    max_dh_utc: Optional[datetime] = None
+
+
+class DQFailureSample(BaseModel):
+    row_id: Any
+    value: Optional[Any] = None
+
+
+class DQFailureModel(BaseModel):
+    """
+    One entry of ingestion_tracker.dq_failures: a DQ check code
+    (see quality.dq_failures.check_code) with its row count and samples.
+    """
+
+    check: str
+    count: int
+    samples: list[DQFailureSample] = Field(default_factory=list)
+
+
+class DQSamplingModel(BaseModel):
+    """
+    ingestion_tracker.dq_sampling: decision of a sampled DQ run
+    (see quality.dq_sampling), with the Wilson interval of the
+    failure rate.
+    """
+
+    fraction: float
+    total_rows: int
+    sampled_rows: int
+    failed_rows: int
+    failure_rate: float
+    ci_low: float
+    ci_high: float
+    z: float
+    max_failure_rate: float
+    escalated: bool
 
 
 class IngestionTrackerModel(BaseModel):
@@ -20,9 +76,22 @@ class IngestionTrackerModel(BaseModel):
 
     lines_read: Optional[int] = None
     file_hash: Optional[str] = None
+
+    size_bytes: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    rows_per_sec: Optional[float] = None
+
+    manifest: Optional[FileManifestModel] = None
     
     dq_validated: bool = False
     dq_run_at: Optional[datetime] = None
+    dq_rows: Optional[int] = None
+    dq_invalid_rows: Optional[int] = None
+    dq_failures: Optional[list[DQFailureModel]] = None
+    dq_sampling: Optional[DQSamplingModel] = None
+
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
 
 
 class IngestionTrackerUpdate(BaseModel):
@@ -36,6 +105,16 @@ class IngestionTrackerUpdate(BaseModel):
 
     lines_read: Optional[int] = None
     file_hash: Optional[str] = None
+
+    size_bytes: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    rows_per_sec: Optional[float] = None
+
+    manifest: Optional[FileManifestModel] = None
     
     dq_validated: Optional[bool] = None
-    dq_run_at: Optional[datetime] = None
\ No newline at end of file
+    dq_run_at: Optional[datetime] = None
+    dq_rows: Optional[int] = None
+    dq_invalid_rows: Optional[int] = None
+    dq_failures: Optional[list[DQFailureModel]] = None
+    dq_sampling: Optional[DQSamplingModel] = None
\ No newline at end of file
@@ -0,0 +1,255 @@
+# quality/compiled_validator.py
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Callable, Optional
+import math
+import re
+
+from ingest.numeric_values import NUM_PREFIX, parse_number_unit
+
+
+# ===============================================================
+# Null / type helpers (pandas semantics on plain Python values)
+# ===============================================================
+def is_null(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    # pd.NaT and friends compare unequal to themselves
+    try:
+        return value != value
+    except Exception:
+        return False
+
+
+def _is_str(value) -> bool:
+    return isinstance(value, str)
+
+
+def _is_naive_datetime(value) -> bool:
+    return isinstance(value, datetime) and value.tzinfo is None
+
+
+def _any(value) -> bool:
+    return True
+
+
+# pandera dtype → (element test, failure label)
+DTYPE_TESTS = {
+    "str": (_is_str, "dtype('str')"),
+    "datetime64[ns]": (_is_naive_datetime, "dtype('datetime64[ns]')"),
+    "float64": (_any, "dtype('float64')"),
+}
+
+
+# ===============================================================
+# Custom pandera checks → compiled equivalents (keyed by error)
+# ===============================================================
+_INTEGER_RE = re.compile(r"\s*[+-]?\d+\s*")
+
+
+def _okta(value) -> bool:
+    text = str(value)
+    if text == "":
+        return True
+    return bool(_INTEGER_RE.fullmatch(text)) and 0 <= int(text) <= 8
+
+
+def _gust_ge_mean_infoclimat(row: dict, typed: dict) -> bool:
+    if is_null(row.get("vent_rafales_kmh")) or is_null(row.get("vent_moyen_kmh")):
+        return True
+    return _ge(typed.get("vent_rafales_kmh"), typed.get("vent_moyen_kmh"))
+
+
+def _gust_ge_mean_wunderground(row: dict, typed: dict) -> bool:
+    return _ge(typed.get("wind_gust_mph"), typed.get("wind_speed_mph"))
+
+
+def _ge(a, b) -> bool:
+    # NaN comparisons are False, as in pandas
+    return a is not None and b is not None and a >= b
+
+
+COLUMN_CHECKS: dict[str, Callable] = {
+    "nebulosite_okta must be an integer between 0 and 8": _okta,
+}
+
+ROW_CHECKS: dict[str, Callable] = {
+    "vent_rafales_kmh must be >= vent_moyen_kmh": _gust_ge_mean_infoclimat,
+    "wind_gust_mph must be >= wind_speed_mph": _gust_ge_mean_wunderground,
+}
+
+# Frame-level uniqueness is compiled from the schema module's UNIQUE_KEY
+UNIQUE_CHECK_PREFIX = "Rows must be unique"
+
+
+def _lookup(registry: dict, error: str):
+    for prefix, fn in registry.items():
+        if error.startswith(prefix):
+            return fn
+    return None
+
+
+def compile_check(check) -> Callable:
+    """pandera Check → predicate on one non-null value."""
+    stats = check.statistics or {}
+
+    if check.name == "in_range":
+        lo, hi = stats["min_value"], stats["max_value"]
+        lo_ok = (lambda v: v >= lo) if stats.get("include_min", True) else (lambda v: v > lo)
+        hi_ok = (lambda v: v <= hi) if stats.get("include_max", True) else (lambda v: v < hi)
+        return lambda v: lo_ok(v) and hi_ok(v)
+
+    if check.name == "greater_than_or_equal_to":
+        lo = stats["min_value"]
+        return lambda v: v >= lo
+
+    if check.name == "isin":
+        allowed = frozenset(stats["allowed_values"])
+        return lambda v: v in allowed
+
+    fn = _lookup(COLUMN_CHECKS, check.error or "")
+    if fn is None:
+        raise ValueError(f"No compiled equivalent for column check {check.error!r}")
+    return fn
+
+
+# ===============================================================
+# Compiled schema
+# ===============================================================
+class CompiledColumn:
+    __slots__ = ("name", "regex", "nullable", "type_ok", "dtype_label", "checks")
+
+    def __init__(self, name: str, column):
+        dtype = str(column.dtype)
+        if dtype not in DTYPE_TESTS:
+            raise ValueError(f"No compiled dtype test for column {name!r} ({dtype})")
+
+        self.name = name
+        # pandera: a truthy `regex` makes the NAME a pattern (re.match on column names)
+        self.regex = re.compile(name) if column.regex else None
+        self.nullable = column.nullable
+        self.type_ok, self.dtype_label = DTYPE_TESTS[dtype]
+        self.checks = [(check.error, compile_check(check)) for check in column.checks]
+
+
+class CompiledSchema:
+    """
+    Pure-Python row-batch validator compiled from a pandera staging
+    schema: same dtypes, nullability, builtin checks (in_range, ge,
+    isin), custom checks (okta, gust >= mean) and row uniqueness.
+
+    validate_rows() returns the same {row_position: [failure, ...]}
+    shape as DataQualityValidator.validate_rows, with pandera's check
+    labels, so verdicts and check codes match. pandera stays the
+    reference: tests/test_quality/test_compiled_validator.py checks
+    parity on generated batches.
+    """
+
+    def __init__(self, schema, unique_key: tuple):
+        self.columns: list[CompiledColumn] = []
+        self.typed_fields: list[str] = []
+
+        for name, column in schema.columns.items():
+            if name.startswith(NUM_PREFIX):
+                self.typed_fields.append(name[len(NUM_PREFIX):])
+            self.columns.append(CompiledColumn(name, column))
+
+        self.row_checks: list[tuple[str, Callable]] = []
+        self.unique_error: Optional[str] = None
+        self.unique_key = tuple(unique_key)
+
+        for check in schema.checks:
+            error = check.error or ""
+            if error.startswith(UNIQUE_CHECK_PREFIX):
+                self.unique_error = error
+                continue
+            fn = _lookup(ROW_CHECKS, error)
+            if fn is None:
+                raise ValueError(f"No compiled equivalent for frame check {error!r}")
+            self.row_checks.append((error, fn))
+
+    # ------------------------------------------------------------------
+    def typed_values(self, row: dict) -> dict:
+        """Same values as add_typed_columns(): "num" wins, else raw parse."""
+        num = row.get("num")
+        if isinstance(num, dict):
+            return {f: num.get(f) for f in self.typed_fields}
+        return {f: parse_number_unit(row.get(f))[0] for f in self.typed_fields}
+
+    def _targets(self, rows: list) -> list[tuple[CompiledColumn, list[str]]]:
+        """Resolves regex-named columns against the batch's columns."""
+        names = {c.name for c in self.columns}
+        for row in rows:
+            names.update(row)
+
+        targets = []
+        for column in self.columns:
+            if column.regex is None:
+                targets.append((column, [column.name]))
+            else:
+                targets.append((column, sorted(n for n in names if column.regex.match(n))))
+        return targets
+
+    # ------------------------------------------------------------------
+    def validate_rows(self, rows: list) -> dict:
+        failures: dict[int, list] = {}
+        targets = self._targets(rows)
+
+        def fail(position, column, check, value):
+            failures.setdefault(position, []).append(
+                {"column": column, "check": check, "failure_case": value}
+            )
+
+        for position, row in enumerate(rows):
+            typed = self.typed_values(row)
+
+            for column, names in targets:
+                for name in names:
+                    if name.startswith(NUM_PREFIX):
+                        value = typed.get(name[len(NUM_PREFIX):])
+                    else:
+                        value = row.get(name)
+
+                    if is_null(value):
+                        if not column.nullable:
+                            fail(position, name, "not_nullable", None)
+                        continue
+
+                    if not column.type_ok(value):
+                        fail(position, name, column.dtype_label, value)
+
+                    for label, predicate in column.checks:
+                        try:
+                            ok = predicate(value)
+                        except (TypeError, ValueError):
+                            ok = False
+                        if not ok:
+                            fail(position, name, label, value)
+
+            for label, predicate in self.row_checks:
+                if not predicate(row, typed):
+                    fail(position, None, label, None)
+
+        if self.unique_error is not None:
+            self._check_unique(rows, fail)
+
+        return failures
+
+    def _check_unique(self, rows: list, fail):
+        positions: dict = {}
+        for position, row in enumerate(rows):
+            key = tuple(_unique_part(row.get(f)) for f in self.unique_key)
+            positions.setdefault(key, []).append(position)
+
+        for dup in positions.values():
+            if len(dup) > 1:
+                for position in dup:
+                    fail(position, None, self.unique_error, None)
+
+
+def _unique_part(value):
+    # pandas.duplicated treats every kind of null as the same value
+    return None if is_null(value) else value
@@ -0,0 +1,148 @@
+# quality/dq_cache.py
+
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Optional
+import hashlib
+import inspect
+import json
+import os
+
+from loguru import logger
+from pymongo.errors import BulkWriteError, OperationFailure
+import pandera
+
+import ingest.numeric_values
+import quality.compiled_validator
+import quality.infoclimat_schema
+import quality.wunderground_schema
+from quality.dq_failures import check_code, to_bson_value
+
+
+# Code that decides a row verdict, per source: any change re-keys the cache
+_VERDICT_CODE = {
+    "infoclimat": (quality.infoclimat_schema, ingest.numeric_values, quality.compiled_validator),
+    "wunderground": (quality.wunderground_schema, ingest.numeric_values, quality.compiled_validator),
+}
+
+
+def schema_version(source: str, engine: str = "pandera") -> str:
+    """
+    Short hash of everything that decides a verdict of `source`: the
+    engine name, the pandera version, and the source code of the
+    schema, numeric parsing and compiled validator modules.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{engine}:{pandera.__version__}".encode("utf-8"))
+    for module in _VERDICT_CODE[source]:
+        digest.update(inspect.getsource(module).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def row_hash(row: dict, fields) -> str:
+    """Content hash of the fields DQ reads (never _id)."""
+    content = {field: row.get(field) for field in fields if field != "_id"}
+    payload = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class VerdictCache:
+    """
+    Row verdicts memoized by content hash, so re-ingested rows (Airbyte
+    re-syncs, retries) are not validated again.
+
+    One document per (schema version, row hash) in a small Mongo
+    collection: {_id: "<version>:<hash>", source, engine, schema_version,
+    failures, created_at}. The version includes the DQ engine, so the
+    pandera and compiled engines never read each other's verdicts. Only row-local failures are cached;
+    uniqueness depends on the file and is always recomputed.
+
+    Eviction: a TTL index on created_at, plus purge_stale_versions()
+    which drops the entries of older schema versions of the same engine.
+    """
+
+    def __init__(self, collection, ttl_days: int = 30, engine: str = "pandera"):
+        self.collection = collection
+        self.ttl_days = ttl_days
+        self.engine = engine
+        self.versions = {source: schema_version(source, engine) for source in _VERDICT_CODE}
+
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            self.collection.create_index("created_at", expireAfterSeconds=ttl_days * 86400)
+        except OperationFailure as e:
+            # TTL index already created with another ttl_days: keep it
+            logger.warning(f"⚠ DQ cache TTL index not updated: {e}")
+        self.collection.create_index("schema_version")
+
+    @classmethod
+    def from_env(cls, db, engine: str = "pandera") -> Optional["VerdictCache"]:
+        """Build the cache from env vars; None unless DQ_VERDICT_CACHE=true."""
+        if os.getenv("DQ_VERDICT_CACHE", "false").lower() != "true":
+            return None
+
+        return cls(
+            db[os.getenv("DQ_CACHE_COLLECTION", "dq_verdict_cache")],
+            ttl_days=int(os.getenv("DQ_CACHE_TTL_DAYS", 30)),
+            engine=engine,
+        )
+
+    # ------------------------------------------------------------------
+    def key(self, source: str, digest: str) -> str:
+        return f"{self.versions[source]}:{digest}"
+
+    def lookup(self, source: str, keys: list) -> dict:
+        """{cache key: cached failures} for the keys already known."""
+        found = {
+            doc["_id"]: doc["failures"]
+            for doc in self.collection.find({"_id": {"$in": list(set(keys))}}, {"failures": 1})
+        }
+        hits = sum(1 for k in keys if k in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def store(self, source: str, entries: dict):
+        """Caches {cache key: row failures} (uniqueness failures excluded)."""
+        if not entries:
+            return
+
+        now = datetime.now(timezone.utc)
+        docs = [
+            {
+                "_id": key,
+                "source": source,
+                "engine": self.engine,
+                "schema_version": self.versions[source],
+                "failures": [
+                    {**f, "failure_case": to_bson_value(f.get("failure_case"))}
+                    for f in failures
+                    if check_code(f.get("column"), f.get("check")) != "unique"
+                ],
+                "created_at": now,
+            }
+            for key, failures in entries.items()
+        ]
+
+        try:
+            self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError:
+            # Another worker cached the same rows first
+            pass
+
+    def purge_stale_versions(self) -> int:
+        """
+        Drops entries of this engine (or written before entries recorded
+        one) under any other schema version; another engine's are kept.
+        """
+        result = self.collection.delete_many(
+            {
+                "engine": {"$in": [self.engine, None]},
+                "schema_version": {"$nin": list(set(self.versions.values()))},
+            }
+        )
+        if result.deleted_count:
+            logger.info(f"🧹 Evicted {result.deleted_count} stale DQ cache entries")
+        return result.deleted_count
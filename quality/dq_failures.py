@@ -0,0 +1,101 @@
+# quality/dq_failures.py
+
+from __future__ import annotations
+from typing import Optional
+import math
+import os
+
+from ingest.numeric_values import NUM_PREFIX
+
+
+# Frame-level checks → short codes (matched on their error message)
+FRAME_CHECK_CODES = {
+    "Rows must be unique": "unique",
+    "vent_rafales_kmh must be >=": "gust_lt_mean",
+    "wind_gust_mph must be >=": "gust_lt_mean",
+}
+
+
+# ---------------------------------------------------------------
+def check_code(column: Optional[str], check: Optional[str]) -> str:
+    """
+    Small, stable code for one pandera failure, stored on staging rows:
+        ("num__temperature_F", "in_range(-100, 140)") → "temperature_F:in_range"
+        ("dh_utc", "not_nullable")                    → "dh_utc:not_nullable"
+        (None, "Rows must be unique for (...)")       → "unique"
+    """
+    check = str(check or "unknown")
+
+    if column is None or (isinstance(column, float) and math.isnan(column)):
+        for prefix, code in FRAME_CHECK_CODES.items():
+            if check.startswith(prefix):
+                return code
+        return "frame"
+
+    column = str(column)
+    if column.startswith(NUM_PREFIX):
+        column = column[len(NUM_PREFIX):]
+
+    name = check.split("(", 1)[0].strip() or "check"
+    if " " in name:
+        # Custom checks report their error message
+        for prefix, code in FRAME_CHECK_CODES.items():
+            if check.startswith(prefix):
+                return code
+        name = "custom"
+
+    return f"{column}:{name}"
+
+
+def to_bson_value(value):
+    """Failure values as plain Mongo-safe scalars (numpy → Python, NaN → None)."""
+    if hasattr(value, "item"):
+        try:
+            value = value.item()
+        except (ValueError, AttributeError):
+            pass
+
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+# ---------------------------------------------------------------
+class FailureSummary:
+    """
+    Compact per-file aggregate of DQ failures:
+    check code → count + a few sample (row_id, column, value).
+    Stored on the ingestion_tracker document as `dq_failures`.
+    """
+
+    def __init__(self, max_samples: Optional[int] = None):
+        self.max_samples = max_samples or int(os.getenv("DQ_FAILURE_SAMPLES", 5))
+        self.checks: dict[str, dict] = {}
+
+    def add(self, row_id, failures: list) -> list[str]:
+        """Records the failures of one row and returns its (sorted) check codes."""
+        codes = []
+
+        for failure in failures:
+            code = check_code(failure.get("column"), failure.get("check"))
+            if code in codes:
+                continue
+            codes.append(code)
+
+            entry = self.checks.setdefault(code, {"count": 0, "samples": []})
+            entry["count"] += 1
+            if len(entry["samples"]) < self.max_samples:
+                entry["samples"].append(
+                    {"row_id": row_id, "value": to_bson_value(failure.get("failure_case"))}
+                )
+
+        return sorted(codes)
+
+    def to_documents(self) -> list[dict]:
+        """Most frequent check first; queryable with {"dq_failures.check": ...}."""
+        return [
+            {"check": code, "count": entry["count"], "samples": entry["samples"]}
+            for code, entry in sorted(self.checks.items(), key=lambda kv: -kv[1]["count"])
+        ]
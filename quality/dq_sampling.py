@@ -0,0 +1,99 @@
+# quality/dq_sampling.py
+
+from __future__ import annotations
+from typing import Optional
+import math
+import os
+
+from pydantic import BaseModel
+
+
+def wilson_interval(failures: int, n: int, z: float = 1.96) -> tuple[float, float]:
+    """Wilson score interval of a failure proportion (failures out of n)."""
+    if n == 0:
+        return 0.0, 1.0
+
+    p = failures / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class SamplingConfig(BaseModel):
+    """
+    Sampled DQ for trusted backfills (disabled by default: fresh data is
+    always fully validated).
+
+    For the files of `sources`, DQ validates a random `fraction` of the
+    rows (at least min_rows). Unless the upper bound of the failure
+    rate's confidence interval is within max_failure_rate, the file is
+    escalated to full validation; otherwise sampled rows keep their own
+    verdict and the others are accepted as valid. Uniqueness is only
+    checked among sampled rows.
+    """
+
+    fraction: float
+    max_failure_rate: float = 0.001
+    min_rows: int = 1000
+    z: float = 1.96   # 95% confidence
+    sources: tuple[str, ...] = ("infoclimat",)
+
+    @classmethod
+    def from_env(cls) -> Optional["SamplingConfig"]:
+        """
+        Build from env vars; None unless 0 < DQ_SAMPLE_FRACTION < 1.
+
+        Files smaller than min_acceptable_rows() are always fully
+        validated: a clean sample can only be accepted once it is that
+        large. At z=1.96 that floor depends on DQ_SAMPLE_MAX_FAILURE_RATE:
+            0.001 (default) → 3838 rows
+            0.01            →  381 rows
+            0.05            →   73 rows
+        """
+        fraction = float(os.getenv("DQ_SAMPLE_FRACTION", 1.0))
+        if not 0 < fraction < 1:
+            return None
+
+        return cls(
+            fraction=fraction,
+            max_failure_rate=float(os.getenv("DQ_SAMPLE_MAX_FAILURE_RATE", 0.001)),
+            min_rows=int(os.getenv("DQ_SAMPLE_MIN_ROWS", 1000)),
+            sources=tuple(
+                s.strip() for s in os.getenv("DQ_SAMPLE_SOURCES", "infoclimat").split(",") if s.strip()
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    def min_acceptable_rows(self) -> int:
+        """
+        Smallest sample a clean file can be accepted from: with 0 failures
+        the Wilson upper bound is z² / (n + z²), above max_failure_rate
+        for any smaller n.
+        """
+        z2 = self.z * self.z
+        return math.ceil(z2 * (1 - self.max_failure_rate) / self.max_failure_rate)
+
+    def sample_size(self, total_rows: int) -> Optional[int]:
+        """Rows to sample, or None when the file is small enough to check fully."""
+        size = max(self.min_rows, self.min_acceptable_rows(), math.ceil(total_rows * self.fraction))
+        return size if size < total_rows else None
+
+    def decide(self, failed_rows: int, sampled_rows: int, total_rows: int) -> dict:
+        """Sampling decision stored on the tracker as `dq_sampling`."""
+        rate = failed_rows / sampled_rows if sampled_rows else 0.0
+        low, high = wilson_interval(failed_rows, sampled_rows, self.z)
+
+        return {
+            "fraction": self.fraction,
+            "total_rows": total_rows,
+            "sampled_rows": sampled_rows,
+            "failed_rows": failed_rows,
+            "failure_rate": rate,
+            "ci_low": low,
+            "ci_high": high,
+            "z": self.z,
+            "max_failure_rate": self.max_failure_rate,
+            # The true rate may be as high as ci_high: escalate on the bound
+            "escalated": high > self.max_failure_rate,
+        }
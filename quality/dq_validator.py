@@ -2,15 +2,36 @@
 import pandas as pd
 from datetime import datetime, timezone
 from loguru import logger
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+import atexit
+import multiprocessing
+import os
+import threading
 import time
 
+from bson import ObjectId
 from pandera.errors import SchemaErrors
 
 from connectors.mongodb_client import MongoDBClient, MongoSettings
 from ingest.s3_reader import S3JSONLReader
 
-from quality.infoclimat_schema import infoclimat_schema
-from quality.wunderground_schema import wunderground_schema
+from ingest.numeric_values import NUM_PREFIX
+from ingest.record_batch import StagingBatch
+from quality.dq_cache import VerdictCache, row_hash
+from quality.dq_failures import FailureSummary, check_code
+from quality.dq_sampling import SamplingConfig
+from quality.compiled_validator import CompiledSchema, is_null
+from quality.infoclimat_schema import (
+    infoclimat_schema,
+    prepare as prepare_infoclimat,
+    UNIQUE_KEY as INFOCLIMAT_UNIQUE_KEY,
+)
+from quality.wunderground_schema import (
+    wunderground_schema,
+    prepare as prepare_wunderground,
+    UNIQUE_KEY as WUNDERGROUND_UNIQUE_KEY,
+)
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -20,17 +41,200 @@ SCHEMAS = {
     "wunderground": wunderground_schema,
 }
 
+# Pre-validation step: typed "num__<field>" columns used by range checks
+PREPARE = {
+    "infoclimat": prepare_infoclimat,
+    "wunderground": prepare_wunderground,
+}
+
+UNIQUE_KEYS = {
+    "infoclimat": INFOCLIMAT_UNIQUE_KEY,
+    "wunderground": WUNDERGROUND_UNIQUE_KEY,
+}
+
+# Pure-Python equivalents of the pandera schemas (DQ_ENGINE=compiled)
+COMPILED = {source: CompiledSchema(SCHEMAS[source], UNIQUE_KEYS[source]) for source in SCHEMAS}
+
+ENGINES = ("pandera", "compiled")
+
+
+# Row verdict fields written on staging (invalid rows also get their
+# check codes in "dq_errors", see quality.dq_failures)
+VALID_VERDICT = {"dq_checked": True, "error": None}
+INVALID_VERDICT = {"dq_checked": False, "error": True}
+
+# Failure of a row duplicated by a later chunk
+UNIQUE_FAILURE = {"column": None, "check": "Rows must be unique", "failure_case": None}
+
+
+def _is_unique_failure(failure: dict) -> bool:
+    return check_code(failure.get("column"), failure.get("check")) == "unique"
+
+
+def projection(source: str) -> dict:
+    """Staging fields DQ needs: raw schema columns, unique key, "num", _id."""
+    fields = [c for c in SCHEMAS[source].columns if not c.startswith(NUM_PREFIX)]
+    fields += list(UNIQUE_KEYS[source]) + ["num"]
+    return {field: 1 for field in fields}   # _id is always returned
+
+
+def duplicate_positions(rows: list, unique_key: tuple) -> set:
+    """Positions of every row sharing its unique key (all nulls are equal)."""
+    positions: dict = {}
+    for position, row in enumerate(rows):
+        key = tuple(None if is_null(row.get(f)) else row.get(f) for f in unique_key)
+        positions.setdefault(key, []).append(position)
+    return {p for dup in positions.values() if len(dup) > 1 for p in dup}
+
+
+class FileVerdicts:
+    """
+    Per-file state while its rows are validated chunk by chunk.
+
+    Uniqueness across chunks is kept in `seen` (one small key tuple per
+    row): a later duplicate is invalid and also invalidates the first
+    row, whose _id goes to `late_invalid` if it was already judged valid.
+    Failures are aggregated into a compact FailureSummary.
+    Thread-safe, so concurrent writers of one file can share it.
+    """
+
+    def __init__(self, s3_key: str, source: str):
+        self.s3_key = s3_key
+        self.source = source
+        self.unique_key = UNIQUE_KEYS[source]
+
+        self.rows = 0
+        self.seen: dict = {}           # unique key → _id of its first row
+        self.invalid: set = set()
+        self.late_invalid: dict = {}   # earlier rows duplicated by a later chunk → codes
+        self.summary = FailureSummary()
+
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------
+    def add_chunk(self, chunk: list, failures: dict) -> tuple[list, dict]:
+        """
+        Records a validated chunk ({position: [failure, ...]}) and returns
+        (valid_ids, {invalid_id: check codes}).
+        """
+        valid_ids = []
+        invalid = {}
+
+        with self._lock:
+            self.rows += len(chunk)
+
+            for position, row in enumerate(chunk):
+                row_id = row["_id"]
+                key = tuple(row.get(field) for field in self.unique_key)
+
+                # Within a chunk the schema already flags duplicates; across
+                # chunks the verdict must not depend on where chunks split,
+                # whatever other checks the later row fails
+                first_id = self.seen.setdefault(key, row_id)
+                if first_id != row_id:
+                    row_failures = failures.setdefault(position, [])
+                    if not any(_is_unique_failure(f) for f in row_failures):
+                        row_failures.append(UNIQUE_FAILURE)
+                    if first_id not in self.invalid:
+                        self.late_invalid[first_id] = self.summary.add(first_id, [UNIQUE_FAILURE])
+                        self.invalid.add(first_id)
+
+                if position in failures:
+                    invalid[row_id] = self.summary.add(row_id, failures[position])
+                    self.invalid.add(row_id)
+                else:
+                    valid_ids.append(row_id)
+
+        return valid_ids, invalid
+
+    # ---------------------------------------------------------
+    def result(self) -> dict:
+        return {
+            "s3_key": self.s3_key,
+            "rows": self.rows,
+            "invalid_rows": len(self.invalid),
+            "dq_validated": not self.invalid,
+            "failures": self.summary.to_documents(),
+        }
+
+
 class DataQualityValidator:
 
-    def __init__(self, mongo: MongoDBClient):
+    def __init__(
+        self,
+        mongo: MongoDBClient,
+        write_batch_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        engine: Optional[str] = None,
+        cache: Optional[VerdictCache] = None,
+        sampling: Optional[SamplingConfig] = None,
+    ):
         self.mongo = mongo
+        # "pandera" (reference) or "compiled" (no DataFrame per batch)
+        self.engine = engine or os.getenv("DQ_ENGINE", "pandera")
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown DQ engine {self.engine!r} (expected one of {ENGINES})")
+        # Max _ids per update_many when writing row verdicts
+        self.write_batch_size = write_batch_size or int(os.getenv("DQ_WRITE_BATCH_SIZE", 1000))
+        # Rows validated per DataFrame (the cursor is streamed chunk by chunk)
+        self.chunk_size = chunk_size or int(os.getenv("DQ_CHUNK_SIZE", 10000))
         self.db = mongo.get_database()
         self.staging = self.db[mongo.settings.staging_collection]
         self.ingestion = self.db[mongo.settings.ingestion_tracker_collection]
+        # Row verdicts memoized by content hash (DQ_VERDICT_CACHE=true)
+        self.cache = cache if cache is not None else VerdictCache.from_env(self.db, engine=self.engine)
+        # Sampled DQ for trusted backfills (DQ_SAMPLE_FRACTION), off by default
+        self.sampling = sampling if sampling is not None else SamplingConfig.from_env()
         self.s3_reader = S3JSONLReader()
 
     # ---------------------------------------------------------
-    def run(self):
+    def worker_config(self) -> dict:
+        """Picklable settings of this validator, rebuilt in pool workers."""
+        return {
+            "write_batch_size": self.write_batch_size,
+            "chunk_size": self.chunk_size,
+            "engine": self.engine,
+            "cache": (
+                {"collection": self.cache.collection.name, "ttl_days": self.cache.ttl_days}
+                if self.cache is not None
+                else None
+            ),
+            "sampling": self.sampling.model_dump() if self.sampling is not None else None,
+        }
+
+    @classmethod
+    def from_config(cls, mongo: MongoDBClient, config: dict) -> "DataQualityValidator":
+        """Validator with the same settings as the one that built `config`."""
+        validator = cls(
+            mongo,
+            write_batch_size=config["write_batch_size"],
+            chunk_size=config["chunk_size"],
+            engine=config["engine"],
+        )
+        # Set explicitly: None must disable them, not fall back to the env
+        cache = config["cache"]
+        validator.cache = (
+            VerdictCache(
+                validator.db[cache["collection"]], ttl_days=cache["ttl_days"], engine=validator.engine
+            )
+            if cache is not None
+            else None
+        )
+        sampling = config["sampling"]
+        validator.sampling = SamplingConfig(**sampling) if sampling is not None else None
+        return validator
+
+    # ---------------------------------------------------------
+    def run(self, workers: Optional[int] = None):
+        """
+        Validates every pending file. With workers > 1 (or DQ_WORKERS),
+        files are spread across a process pool; see run_parallel().
+        """
+        workers = workers or int(os.getenv("DQ_WORKERS", 1))
+
+        if self.cache is not None:
+            self.cache.purge_stale_versions()
+
         pending = list(
             self.ingestion.find(
                 {
@@ -46,13 +250,59 @@ class DataQualityValidator:
 
         logger.info(f"📌 {len(pending)} file(s) pending DQ")
 
-        for file_entry in pending:
-            s3_key = file_entry["s3_key"]
-            source = self.s3_reader.detect_source(s3_key)
+        jobs = [
+            (file_entry["s3_key"], self.s3_reader.detect_source(file_entry["s3_key"]))
+            for file_entry in pending
+        ]
 
+        if workers > 1 and len(jobs) > 1:
+            self.run_parallel(jobs, workers)
+            return
+
+        for s3_key, source in jobs:
             logger.info(f"🔍 Validating file: {s3_key} (source={source})")
             self.validate_file(s3_key, source)
 
+    # ---------------------------------------------------------
+    def run_parallel(self, jobs: list, workers: int):
+        """
+        Validates files in a process pool (pandas/pandera are CPU-bound).
+
+        Each worker process opens its own Mongo connection and writes the
+        row verdicts of the files it owns (disjoint s3_keys). File-level
+        results come back to this process, which is the only writer of
+        ingestion_tracker. A file whose worker fails stays pending and is
+        retried on the next run. Workers get this validator's settings
+        (chunk sizes, engine, cache, sampling), so results match run().
+        """
+        workers = min(workers, len(jobs))
+        logger.info(f"⚙ DQ on {len(jobs)} file(s) with {workers} worker process(es)")
+
+        # spawn: never fork a process that already holds a MongoClient
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.worker_config(),),
+        ) as pool:
+            futures = {
+                pool.submit(_check_file_in_worker, s3_key, source): s3_key
+                for s3_key, source in jobs
+            }
+
+            for future in as_completed(futures):
+                s3_key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"❌ DQ worker failed for {s3_key}: {e}")
+                    continue
+
+                if result is not None:
+                    self.record_file_result(result)
+
     # ---------------------------------------------------------
     @staticmethod
     def stringify_keys(obj):
@@ -64,78 +314,398 @@ class DataQualityValidator:
         return obj
 
     # ---------------------------------------------------------
-    def validate_file(self, s3_key: str, source: str):
+    @staticmethod
+    def align_columns(df: pd.DataFrame, schema) -> pd.DataFrame:
+        """
+        Staging documents are sparse (absent fields are not stored):
+        add every schema column missing from the frame as an all-null
+        object column so nullable checks behave as if it were None.
+        """
+        for col in schema.columns:
+            if col not in df.columns:
+                df[col] = None
+        return df
+
+    # ---------------------------------------------------------
+    def build_frame(self, rows: list, source: str) -> pd.DataFrame:
+        """Frame of `rows` (RangeIndex = position in `rows`) ready for the schema."""
+        df = self.align_columns(PREPARE[source](pd.DataFrame(rows)), SCHEMAS[source])
+        for col in UNIQUE_KEYS[source]:
+            if col not in df.columns:
+                df[col] = None
+        return df
 
+    # ---------------------------------------------------------
+    @staticmethod
+    def failures_by_row(failure_cases: pd.DataFrame) -> tuple[dict, bool]:
+        """
+        Groups pandera failure_cases by row position.
+        Returns ({row_position: [failure, ...]}, has_frame_level_failures).
+        Failures without an index (e.g. a column dtype) cannot be mapped
+        to a row.
+        """
+        by_row: dict[int, list] = {}
+        frame_level = False
+
+        for case in failure_cases.to_dict("records"):
+            index = case.get("index")
+            if index is None or pd.isna(index):
+                frame_level = True
+                continue
+            by_row.setdefault(int(index), []).append(
+                {
+                    "column": case.get("column"),
+                    "check": case.get("check"),
+                    "failure_case": case.get("failure_case"),
+                }
+            )
+
+        return by_row, frame_level
+
+    # ---------------------------------------------------------
+    def validate_rows_individually(self, rows: list, source: str) -> dict:
+        """Slow path: one-row frames. Used only when whole-file failures
+        cannot be attributed to rows."""
+        schema = SCHEMAS[source]
+        by_row = {}
+
+        for position, row in enumerate(rows):
+            try:
+                schema.validate(self.build_frame([row], source), lazy=True)
+            except SchemaErrors as exc:
+                # Everything in a one-row frame belongs to that row
+                cases = exc.failure_cases.assign(index=0)
+                by_row[position] = self.failures_by_row(cases)[0][0]
+
+        return by_row
+
+    # ---------------------------------------------------------
+    def validate_rows(self, rows: list, source: str) -> dict:
+        """
+        Validates all rows in ONE schema.validate call over a whole-file
+        frame and returns {row_position: failures} for the invalid rows.
+        Frame-level checks (uniqueness, gust >= mean) are row-wise, so
+        duplicates across the file are now caught.
+
+        With the "compiled" engine the same verdicts come from the
+        pure-Python CompiledSchema, without building a DataFrame.
+        """
+        if self.engine == "compiled":
+            return COMPILED[source].validate_rows(rows)
+
+        schema = SCHEMAS[source]
+
+        try:
+            schema.validate(self.build_frame(rows, source), lazy=True)
+            return {}
+        except SchemaErrors as exc:
+            by_row, frame_level = self.failures_by_row(exc.failure_cases)
+
+        if frame_level:
+            logger.warning("⚠ Frame-level DQ failures → falling back to row-by-row validation")
+            return self.validate_rows_individually(rows, source)
+
+        return by_row
+
+    # ---------------------------------------------------------
+    def write_verdicts(self, valid_ids: list, invalid) -> int:
+        """
+        Writes row verdicts with one update_many per batch of _ids
+        (instead of one update_one per row). `invalid` is a list of _ids
+        or {_id: check codes}; rows sharing the same codes are written
+        together. Returns the round-trips made.
+        """
+        if not isinstance(invalid, dict):
+            invalid = {row_id: [] for row_id in invalid}
+
+        groups: dict[tuple, list] = {}
+        for row_id, codes in invalid.items():
+            groups.setdefault(tuple(codes), []).append(row_id)
+
+        updates = [(valid_ids, {"$set": VALID_VERDICT, "$unset": {"dq_errors": ""}})]
+        for codes, ids in groups.items():
+            fields = {**INVALID_VERDICT, "dq_errors": list(codes)} if codes else INVALID_VERDICT
+            updates.append((ids, {"$set": fields}))
+
+        round_trips = 0
+        for ids, update in updates:
+            for start in range(0, len(ids), self.write_batch_size):
+                self.staging.update_many(
+                    {"_id": {"$in": ids[start:start + self.write_batch_size]}},
+                    update,
+                )
+                round_trips += 1
+
+        return round_trips
+
+    # ---------------------------------------------------------
+    def iter_chunks(self, cursor):
+        """Streams a cursor as lists of at most chunk_size documents."""
+        chunk = []
+        for doc in cursor:
+            chunk.append(doc)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    # ---------------------------------------------------------
+    def check_file(self, s3_key: str, source: str) -> Optional[dict]:
+        """
+        Validates the staging rows of one file and writes their verdicts.
+        Returns the file-level result (not yet stored on the tracker), or
+        None when there is nothing to validate.
+
+        The cursor is projected on the fields DQ needs and validated in
+        chunks of chunk_size rows, so memory does not grow with the file.
+        """
         schema = SCHEMAS.get(source)
         if schema is None:
             logger.error(f"❌ Schema not found for source: {source}")
-            return
+            return None
 
-        rows = list(self.staging.find({"s3_key": s3_key}))
-        if not rows:
+        sampling = None
+        if self.sampling is not None and source in self.sampling.sources:
+            result, sampling = self.check_file_sampled(s3_key, source)
+            if result is not None:
+                return result
+
+        result = self.check_file_full(s3_key, source)
+        if result is not None and sampling is not None:
+            result["sampling"] = sampling   # escalated
+        return result
+
+    # ---------------------------------------------------------
+    def check_file_full(self, s3_key: str, source: str) -> Optional[dict]:
+        """Validates every staging row of one file (see check_file)."""
+        cursor = self.staging.find({"s3_key": s3_key}, projection(source))
+        cursor = cursor.batch_size(self.chunk_size)
+
+        state = FileVerdicts(s3_key, source)
+
+        for chunk in self.iter_chunks(cursor):
+            valid_ids, invalid = self.judge(chunk, state)
+            self.write_verdicts(valid_ids, invalid)
+
+        if not state.rows:
             logger.warning(f"⚠ No staging rows for {s3_key}")
-            return
+            return None
 
-        valid_count = 0
-        invalid_count = 0
+        if state.late_invalid:
+            self.write_verdicts([], state.late_invalid)
 
-        for row in rows:
-            row_id = row["_id"]
-            df = pd.DataFrame([row])
+        if self.cache is not None:
+            logger.debug(f"♻ DQ cache: {self.cache.hits} hit(s), {self.cache.misses} miss(es) so far")
 
-            try:
-                schema.validate(df, lazy=True)
-
-                # row is valid
-                self.staging.update_one(
-                    {"_id": row_id},
-                    {
-                        "$set": {
-                            "dq_checked": True,
-                            "error": None,
-                        }
-                    }
-                )
-                valid_count += 1
+        return state.result()
 
-            except SchemaErrors as exc:
-                invalid_count += 1
-
-                # extract error messages
-                failure_dict = exc.failure_cases.to_dict()
-
-                # 🔥 Clean numeric keys → strings (Mongo-safe)
-                clean_error = self.stringify_keys(failure_dict)
-
-                self.staging.update_one(
-                    {"_id": row_id},
-                    {
-                        "$set": {
-                            "dq_checked": False,
-                            "error": True,
-                        }
-                    }
-                )
+    # ---------------------------------------------------------
+    def check_file_sampled(self, s3_key: str, source: str) -> tuple[Optional[dict], Optional[dict]]:
+        """
+        Validates a random sample of the file ($sample, server side).
+        Returns (result, sampling decision); result is None when the file
+        must be fully validated: too small to sample, or escalated
+        because the sampled failure rate is above the threshold.
+        """
+        total = self.staging.count_documents({"s3_key": s3_key})
+        size = self.sampling.sample_size(total)
+        if size is None:
+            logger.info(f"🔍 {s3_key}: {total} rows, too small to sample → full validation")
+            return None, None
+
+        cursor = self.staging.aggregate(
+            [
+                {"$match": {"s3_key": s3_key}},
+                {"$sample": {"size": size}},
+                {"$project": projection(source)},
+            ],
+            allowDiskUse=True,
+        )
+
+        state = FileVerdicts(s3_key, source)
+        invalid: dict = {}
+        for chunk in self.iter_chunks(cursor):
+            invalid.update(self.judge(chunk, state)[1])
+        invalid.update(state.late_invalid)
 
-                logger.debug(f"❌ Row {row_id} failed: {clean_error}")
+        decision = self.sampling.decide(len(state.invalid), state.rows, total)
+        rate = f"{decision['failure_rate']:.4%} [{decision['ci_low']:.4%}, {decision['ci_high']:.4%}]"
 
-        # FILE LEVEL
-        file_valid = (invalid_count == 0)
+        if decision["escalated"]:
+            logger.warning(f"⚠ {s3_key}: sampled failure rate {rate} → full validation")
+            return None, decision
+
+        logger.info(f"🎲 {s3_key}: {state.rows}/{total} rows sampled, failure rate {rate}")
+
+        # Accept the file, then the sampled invalid rows keep their verdict
+        self.staging.update_many(
+            {"s3_key": s3_key}, {"$set": VALID_VERDICT, "$unset": {"dq_errors": ""}}
+        )
+        self.write_verdicts([], invalid)
+
+        # dq_rows covers the whole file; the sample size is in dq_sampling
+        result = state.result()
+        result["rows"] = total
+        result["sampling"] = decision
+        return result, decision
+
+    # ---------------------------------------------------------
+    def judge(self, chunk: list, state: "FileVerdicts") -> tuple[list, dict]:
+        """
+        Validates one chunk of a file and returns its (valid_ids,
+        {invalid_id: check codes}). Uniqueness across chunks and the
+        failure summary live in `state`.
+        """
+        if self.cache is not None:
+            failures = self.validate_rows_cached(chunk, state.source)
+        else:
+            failures = self.validate_rows(chunk, state.source)
+        return state.add_chunk(chunk, failures)
+
+    # ---------------------------------------------------------
+    def validate_rows_cached(self, rows: list, source: str) -> dict:
+        """
+        validate_rows() through the verdict cache: rows whose content
+        hash is known reuse their cached failures, only the others are
+        validated (and cached). Uniqueness is file-dependent, so it is
+        never cached and is recomputed here over the whole chunk.
+        """
+        fields = projection(source)
+        keys = [self.cache.key(source, row_hash(row, fields)) for row in rows]
+        known = self.cache.lookup(source, keys)
+
+        missing = [p for p, key in enumerate(keys) if key not in known]
+        fresh = self.validate_rows([rows[p] for p in missing], source) if missing else {}
+
+        computed = {}
+        for i, position in enumerate(missing):
+            computed[keys[position]] = fresh.get(i, [])
+        self.cache.store(source, computed)
+
+        failures = {}
+        for position, key in enumerate(keys):
+            row_failures = [
+                f for f in known.get(key, computed.get(key, []))
+                if check_code(f.get("column"), f.get("check")) != "unique"
+            ]
+            if row_failures:
+                failures[position] = row_failures
+
+        for position in duplicate_positions(rows, UNIQUE_KEYS[source]):
+            failures.setdefault(position, []).append(UNIQUE_FAILURE)
+
+        return failures
+
+    # ---------------------------------------------------------
+    def record_file_result(self, result: dict):
+        """FILE LEVEL: stores the verdict of one file on ingestion_tracker."""
+        s3_key = result["s3_key"]
 
         self.ingestion.update_one(
             {"s3_key": s3_key},
             {
                 "$set": {
-                    "dq_validated": file_valid,
+                    "dq_validated": result["dq_validated"],
                     "dq_run_at": datetime.now(timezone.utc),
+                    "dq_rows": result["rows"],
+                    "dq_invalid_rows": result["invalid_rows"],
+                    # check code → count + sample rows (see quality.dq_failures)
+                    "dq_failures": result["failures"],
+                    # Sampled DQ decision and error bounds (None = full check)
+                    "dq_sampling": result.get("sampling"),
                 }
             }
         )
 
-        if file_valid:
+        if result["dq_validated"]:
             logger.success(f"🎉 File {s3_key} VALID")
         else:
-            logger.error(f"❌ File {s3_key} INVALID ({invalid_count} bad rows)")
+            top = ", ".join(f"{f['check']}={f['count']}" for f in result["failures"][:5])
+            logger.error(f"❌ File {s3_key} INVALID ({result['invalid_rows']} bad rows: {top})")
+
+    # ---------------------------------------------------------
+    def validate_file(self, s3_key: str, source: str) -> Optional[dict]:
+        result = self.check_file(s3_key, source)
+        if result is not None:
+            self.record_file_result(result)
+        return result
+
+
+# ---------------------------------------------------------
+# FUSED INGEST-TIME DQ
+# ---------------------------------------------------------
+class IngestTimeDQ:
+    """
+    Validates staging documents batch by batch right before they are
+    inserted, so rows land in staging with dq_checked / error already
+    set and the file's dq_validated is stored at the end of ingestion:
+    no read-back and no verdict update pass over staging.
+
+    Only rows invalidated afterwards by a duplicate in a later batch are
+    updated (see FileVerdicts).
+    """
+
+    def __init__(self, validator: DataQualityValidator, s3_key: str, source: str):
+        self.validator = validator
+        self.state = FileVerdicts(s3_key, source)
+
+    def apply(self, docs) -> list:
+        """
+        Sets the verdict fields on `docs` (in place) and returns them.
+        A StagingBatch is rebuilt into documents once, here, at the
+        write boundary.
+        """
+        if isinstance(docs, StagingBatch):
+            docs = list(docs.iter_documents())
+
+        for doc in docs:
+            # _id assigned here (pymongo would do it on insert) to track duplicates
+            doc.setdefault("_id", ObjectId())
+
+        _, invalid = self.validator.judge(docs, self.state)
+
+        for doc in docs:
+            codes = invalid.get(doc["_id"])
+            if codes is None:
+                doc.update(VALID_VERDICT)
+            else:
+                doc.update(INVALID_VERDICT, dq_errors=codes)
+
+        return docs
+
+    def finish(self) -> Optional[dict]:
+        """After the last insert: late duplicates + file-level verdict."""
+        if self.state.late_invalid:
+            self.validator.write_verdicts([], self.state.late_invalid)
+
+        if not self.state.rows:
+            return None
+
+        result = self.state.result()
+        self.validator.record_file_result(result)
+        return result
+
+
+# ---------------------------------------------------------
+# PROCESS-POOL WORKERS (one Mongo connection per process)
+# ---------------------------------------------------------
+_WORKER: Optional[DataQualityValidator] = None
+
+
+def _init_worker(config: dict):
+    global _WORKER
+
+    mongo = MongoDBClient(MongoSettings.from_env())
+    mongo.connect()
+    atexit.register(mongo.close)
+
+    _WORKER = DataQualityValidator.from_config(mongo, config)
+
+
+def _check_file_in_worker(s3_key: str, source: str) -> Optional[dict]:
+    logger.info(f"🔍 Validating file: {s3_key} (source={source}, pid={os.getpid()})")
+    return _WORKER.check_file(s3_key, source)
 
 
 def run_all_dq_tests():
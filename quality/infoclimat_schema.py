@@ -1,15 +1,37 @@
 # quality/infoclimat_schema.py
 
+import pandas as pd
 import pandera.pandas as pa
 from pandera.pandas import Column, Check
 
+from ingest.numeric_values import add_typed_columns, typed_column as num
+
 
 # ===============================================================
-# Helpers
+# Typed numeric columns, parsed once per validated frame
 # ===============================================================
-def to_float(series):
-    """Extract numeric part and convert to float (no unit expected here)."""
-    return series.str.extract(r"(-?\d+(\.\d+)?)")[0].astype(float)
+# Range-checked fields → typed float columns "num__<field>".
+# Values come from the ingest-time "num" sub-document, or are parsed
+# once by prepare(); every range and gust check reuses them instead of
+# re-running a regex.
+NUMERIC_CHECKED = [
+    "temperature_C", "pression_hPa", "humidite_pct", "point_de_rosee_C",
+    "vent_moyen_kmh", "vent_rafales_kmh", "visibilite_m", "neige_au_sol_cm",
+    "vent_direction_deg", "pluie_3h_mm", "pluie_1h_mm",
+]
+
+
+# Rows must be unique on this key (also tracked across DQ chunks)
+UNIQUE_KEY = ("id_station", "dh_utc")
+
+
+def prepare(df):
+    """Adds the typed columns the schema checks run on."""
+    return add_typed_columns(df, NUMERIC_CHECKED)
+
+
+def typed(checks=None):
+    return Column(float, nullable=True, checks=checks)
 
 
 # ===============================================================
@@ -17,6 +39,7 @@ def to_float(series):
 # ===============================================================
 REGEX_DATETIME = r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$"
 REGEX_NUMBER = r"^-?\d+(\.\d+)?$"    # pure numeric (no units in Infoclimat)
+REGEX_INTEGER = r"\s*[+-]?\d+\s*"     # what int() accepts
 
 
 # ===============================================================
@@ -34,28 +57,24 @@ infoclimat_schema = pa.DataFrameSchema(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: (to_float(s) >= -60) & (to_float(s) <= 60)),
         ),
 
         "pression_hPa": Column(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: (to_float(s) >= 850) & (to_float(s) <= 1100)),
         ),
 
         "humidite_pct": Column(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: (to_float(s) >= 0) & (to_float(s) <= 100)),
         ),
 
         "point_de_rosee_C": Column(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: (to_float(s) >= -60) & (to_float(s) <= 60)),
         ),
 
         # ----------------------------------------------------------
@@ -77,7 +96,6 @@ infoclimat_schema = pa.DataFrameSchema(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: s.isna() | (to_float(s) >= 0)),
         ),
         
         
@@ -85,17 +103,18 @@ infoclimat_schema = pa.DataFrameSchema(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: s.isna() | (to_float(s) >= 0)),
         ),
         
         "nebulosite_okta": Column(
             str,
             nullable=True,
             checks=Check(
-                lambda s: s[s.notna() & (s != "")]
-                .astype(int)
-                .between(0, 8)
-                .all(),
+                lambda s: s.isna()
+                | (s == "")
+                | (
+                    s.astype("string").str.fullmatch(REGEX_INTEGER).fillna(False).astype(bool)
+                    & pd.to_numeric(s, errors="coerce").between(0, 8)
+                ),
                 error="nebulosite_okta must be an integer between 0 and 8 when not null",
             ),
         ),
@@ -105,7 +124,6 @@ infoclimat_schema = pa.DataFrameSchema(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: (to_float(s) >= 0) & (to_float(s) <= 360)),
         ),
 
         # ----------------------------------------------------------
@@ -115,14 +133,12 @@ infoclimat_schema = pa.DataFrameSchema(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: s.isna() | (to_float(s) >= 0)),
         ),
 
         "pluie_1h_mm": Column(
             str,
             nullable=True,
             regex=REGEX_NUMBER,
-            checks=Check(lambda s: s.isna() | (to_float(s) >= 0)),
         ),
         
         "temps_omm_code": Column(
@@ -130,6 +146,21 @@ infoclimat_schema = pa.DataFrameSchema(
             nullable=True,
         ), 
 
+        # ----------------------------------------------------------
+        # Typed values (see prepare())
+        # ----------------------------------------------------------
+        num("temperature_C"): typed(Check.in_range(-60, 60)),
+        num("pression_hPa"): typed(Check.in_range(850, 1100)),
+        num("humidite_pct"): typed(Check.in_range(0, 100)),
+        num("point_de_rosee_C"): typed(Check.in_range(-60, 60)),
+        num("vent_moyen_kmh"): typed(),
+        num("vent_rafales_kmh"): typed(),
+        num("visibilite_m"): typed(Check.ge(0)),
+        num("neige_au_sol_cm"): typed(Check.ge(0)),
+        num("vent_direction_deg"): typed(Check.in_range(0, 360)),
+        num("pluie_3h_mm"): typed(Check.ge(0)),
+        num("pluie_1h_mm"): typed(Check.ge(0)),
+
     },
     
     checks=[
@@ -137,16 +168,14 @@ infoclimat_schema = pa.DataFrameSchema(
             lambda df: (
                 df["vent_rafales_kmh"].isna()
                 | df["vent_moyen_kmh"].isna()
-                | (to_float(df["vent_rafales_kmh"]) >= to_float(df["vent_moyen_kmh"]))
+                | (df[num("vent_rafales_kmh")] >= df[num("vent_moyen_kmh")])
             ),
             error="vent_rafales_kmh must be >= vent_moyen_kmh when both present",
         ),
         
+        # Row-level: every row of a duplicated key fails
         Check(
-            lambda df: df[["id_station", "dh_utc"]]
-            .drop_duplicates()
-            .shape[0]
-            == df.shape[0],
+            lambda df: ~df.duplicated(subset=list(UNIQUE_KEY), keep=False),
             error="Rows must be unique for (id_station, dh_utc)",
         ),
     ],    
@@ -0,0 +1,225 @@
+# quality/temporal_checks.py
+
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Optional
+import os
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pydantic import BaseModel
+
+from connectors.mongodb_client import MongoDBClient, MongoSettings
+
+from dotenv import load_dotenv
+load_dotenv()
+
+
+# ----------------------------------------------------------------------
+# RULES
+# ----------------------------------------------------------------------
+class TemporalRules(BaseModel):
+    """
+    Thresholds of the per-station time-series checks.
+
+    - spike    : robust z-score |x - rolling median| / (1.4826 * rolling
+                 MAD) above z_threshold (centered window of window_hours)
+    - flatline : the same value repeated over at least flatline_hours
+                 consecutive hourly readings
+    - step     : change between two readings at most one hour apart
+                 larger than max_step[field]
+    """
+
+    fields: tuple[str, ...] = ("temperature_C", "pression_hPa")
+    window_hours: int = 7
+    min_periods: int = 4
+    z_threshold: float = 5.0
+    # Floor of the robust scale, so stable series do not flag noise
+    min_scale: dict[str, float] = {"temperature_C": 0.5, "pression_hPa": 0.5}
+    flatline_hours: int = 12
+    max_step: dict[str, float] = {"temperature_C": 10.0, "pression_hPa": 6.0}
+
+    @classmethod
+    def from_env(cls) -> "TemporalRules":
+        return cls(
+            window_hours=int(os.getenv("DQ_TEMPORAL_WINDOW_HOURS", 7)),
+            z_threshold=float(os.getenv("DQ_TEMPORAL_Z_THRESHOLD", 5.0)),
+            flatline_hours=int(os.getenv("DQ_TEMPORAL_FLATLINE_HOURS", 12)),
+        )
+
+
+_HOUR = pd.Timedelta(hours=1)
+
+
+# ----------------------------------------------------------------------
+# VECTORIZED CHECKS (one pass per station, no per-row Python)
+# ----------------------------------------------------------------------
+def _rolling_median(values: pd.Series, stations: pd.Series, rules: TemporalRules) -> pd.Series:
+    rolled = values.groupby(stations, sort=False).rolling(
+        rules.window_hours, center=True, min_periods=rules.min_periods
+    ).median()
+    return rolled.reset_index(level=0, drop=True)
+
+
+def spike_mask(df: pd.DataFrame, field: str, rules: TemporalRules) -> pd.Series:
+    values = df[field]
+    stations = df["id_station"]
+
+    median = _rolling_median(values, stations, rules)
+    mad = _rolling_median((values - median).abs(), stations, rules)
+    scale = np.maximum(1.4826 * mad, rules.min_scale.get(field, 0.0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (values - median).abs() / scale
+    return (z > rules.z_threshold).fillna(False)
+
+
+def flatline_mask(df: pd.DataFrame, field: str, gap: pd.Series, rules: TemporalRules) -> pd.Series:
+    values = df[field]
+    new_station = df["id_station"].ne(df["id_station"].shift())
+
+    # A run breaks on a new station, a new value, a null or a time gap
+    breaks = new_station | values.ne(values.shift()) | values.isna() | (gap > _HOUR)
+    run_id = breaks.cumsum()
+    run_length = run_id.map(run_id.value_counts())
+
+    return (run_length >= rules.flatline_hours) & values.notna()
+
+
+def step_mask(df: pd.DataFrame, field: str, gap: pd.Series, rules: TemporalRules) -> pd.Series:
+    limit = rules.max_step.get(field)
+    if limit is None:
+        return pd.Series(False, index=df.index)
+
+    values = df[field]
+    same_station = df["id_station"].eq(df["id_station"].shift())
+    jump = values.diff().abs()
+
+    # Flags the reading after the jump
+    return (same_station & (gap <= _HOUR) & (jump > limit)).fillna(False)
+
+
+def detect_anomalies(df: pd.DataFrame, rules: Optional[TemporalRules] = None) -> pd.DataFrame:
+    """
+    Flags of every temporal check on a frame of hourly readings
+    (id_station, dh_utc and the numeric `rules.fields`, e.g. a batch of
+    hourly_measurements or a transformed staged batch).
+
+    Returns one boolean column per "<field>:<check>" code (spike,
+    flatline, step), aligned on df's index.
+    """
+    rules = rules or TemporalRules()
+
+    ordered = df.sort_values(["id_station", "dh_utc"], kind="stable")
+    gap = ordered["dh_utc"].diff().where(
+        ordered["id_station"].eq(ordered["id_station"].shift())
+    )
+
+    flags = {}
+    for field in rules.fields:
+        if field not in ordered.columns:
+            continue
+        frame = ordered.assign(**{field: pd.to_numeric(ordered[field], errors="coerce")})
+        flags[f"{field}:spike"] = spike_mask(frame, field, rules)
+        flags[f"{field}:flatline"] = flatline_mask(frame, field, gap, rules)
+        flags[f"{field}:step"] = step_mask(frame, field, gap, rules)
+
+    return pd.DataFrame(flags, index=ordered.index).reindex(df.index)
+
+
+def anomaly_codes(flags: pd.DataFrame) -> pd.Series:
+    """Per-row sorted list of the flagged codes (rows without flags dropped)."""
+    if flags.empty:
+        return pd.Series(dtype=object)
+
+    stacked = flags.stack()
+    stacked = stacked[stacked]
+    return stacked.reset_index(level=1).groupby(level=0)["level_1"].agg(sorted)
+
+
+# ----------------------------------------------------------------------
+# STAGE OVER hourly_measurements
+# ----------------------------------------------------------------------
+class TemporalDQ:
+    """
+    Runs the temporal checks station by station over hourly_measurements
+    and stores the flagged codes on each row as `dq_flags` (rows are
+    flagged, not removed: a spike may be a real storm).
+
+    With `since`, only rows from `since` on are (re)flagged; one window
+    of earlier readings is loaded as context for the rolling statistics.
+    """
+
+    def __init__(self, mongo: MongoDBClient, rules: Optional[TemporalRules] = None):
+        self.rules = rules or TemporalRules.from_env()
+        self.db = mongo.get_database()
+        self.final = self.db[mongo.settings.final_collection]
+
+    # ---------------------------------------------------------
+    def load_station(self, station: str, since: Optional[datetime] = None) -> pd.DataFrame:
+        query: dict = {"id_station": station}
+        if since is not None:
+            query["dh_utc"] = {"$gte": since - timedelta(hours=self.rules.window_hours)}
+
+        fields = {"_id": 1, "id_station": 1, "dh_utc": 1, **{f: 1 for f in self.rules.fields}}
+        docs = list(self.final.find(query, fields).sort("dh_utc", 1))
+
+        df = pd.DataFrame(docs, columns=list(fields))
+        df["dh_utc"] = pd.to_datetime(df["dh_utc"])
+        return df
+
+    # ---------------------------------------------------------
+    def check_station(self, station: str, since: Optional[datetime] = None) -> int:
+        """Flags one station; returns the number of flagged rows."""
+        df = self.load_station(station, since)
+        if df.empty:
+            return 0
+
+        codes = anomaly_codes(detect_anomalies(df, self.rules))
+
+        scope: dict = {"id_station": station, "dq_flags": {"$exists": True}}
+        if since is not None:
+            scope["dh_utc"] = {"$gte": since}
+            in_scope = (df["dh_utc"] >= since)[codes.index]
+            codes = codes[in_scope.to_numpy()]
+
+        # Reset then set, grouped by code set (one update_many each)
+        self.final.update_many(scope, {"$unset": {"dq_flags": ""}})
+
+        groups: dict[tuple, list] = {}
+        for row_id, row_codes in zip(df.loc[codes.index, "_id"], codes):
+            groups.setdefault(tuple(row_codes), []).append(row_id)
+
+        for row_codes, ids in groups.items():
+            self.final.update_many({"_id": {"$in": ids}}, {"$set": {"dq_flags": list(row_codes)}})
+
+        return len(codes)
+
+    # ---------------------------------------------------------
+    def run(self, stations: Optional[list] = None, since: Optional[datetime] = None) -> dict:
+        stations = stations or sorted(self.final.distinct("id_station"))
+        flagged = {station: self.check_station(station, since) for station in stations}
+
+        total = sum(flagged.values())
+        if total:
+            logger.warning(f"⚠ Temporal DQ flagged {total} row(s): {flagged}")
+        else:
+            logger.success("✔ Temporal DQ: no spike, flatline or step change.")
+        return flagged
+
+
+def run_temporal_dq_test():
+    logger.info("\n🔍 Running Test 7: Temporal consistency per station")
+
+    settings = MongoSettings.from_env()
+    mongo = MongoDBClient(settings)
+    mongo.connect()
+
+    TemporalDQ(mongo).run()
+
+    mongo.close()
+
+
+if __name__ == "__main__":
+    run_temporal_dq_test()
@@ -2,8 +2,10 @@
 
 from connectors.mongodb_client import MongoDBClient, MongoSettings
 from ingest.s3_reader import S3JSONLReader
+from ingest.s3_spool import SpooledS3Client
 from loguru import logger
 import json
+import os
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -39,77 +41,107 @@ def run_volume_test_v2():
 
     staging = mongo.get_collection("hourly_staging")
     final = mongo.get_collection("hourly_measurements")
+    tracker = mongo.get_collection(settings.ingestion_tracker_collection)
+
+    # Expected counts come from the raw source rows counted at ingestion
+    # (manifest.source_rows) when recorded; VOLUME_TEST_FROM_S3=true forces
+    # an independent recount from S3. manifest.row_count is NOT used: it
+    # counts the rows written to staging, i.e. staging itself.
+    from_s3 = os.getenv("VOLUME_TEST_FROM_S3", "false").lower() == "true"
+    manifests = {
+        d["s3_key"]: d["manifest"]
+        for d in tracker.find({"manifest": {"$ne": None}}, {"s3_key": 1, "manifest": 1})
+    }
 
     reader = S3JSONLReader()
 
+    # Same local spool as ingestion (INGEST_SPOOL=true): S3 recounts read
+    # from an mmap of the downloaded object, released after each file
+    spool = SpooledS3Client.from_env(reader.s3)
+    if spool is not None:
+        reader.s3 = spool
+
     s3_keys = staging.distinct("s3_key")
 
-    for s3_key in s3_keys:
+    try:
+        for s3_key in s3_keys:
+            check_file_volume(reader, staging, final, manifests, from_s3, s3_key)
+            if spool is not None:
+                spool.release(s3_key)
+    finally:
+        if spool is not None:
+            spool.close()
 
-        logger.info(f"\n📦 Volume check for {s3_key}")
+    mongo.close()
+    logger.success("\n🏁 Volume Test V2 complete.")
 
-        # -------------------------------------------------------
-        # 1️⃣ Expected count directly from S3 raw files
-        # -------------------------------------------------------
-        if "InfoClimat" in s3_key:
-            expected_total = count_infoclimat_from_jsonl(reader, s3_key)
-        else:
-            # 1 row = 1 line
-            expected_total = sum(1 for _ in reader.s3.stream_jsonl_lines(s3_key))
-
-        # -------------------------------------------------------
-        # 2️⃣ Staging counts (with dq_checked split)
-        # -------------------------------------------------------
-        staging_total = staging.count_documents({"s3_key": s3_key})
-        staging_valid = staging.count_documents({"s3_key": s3_key, "dq_checked": True})
-        staging_invalid = staging.count_documents({"s3_key": s3_key, "dq_checked": False})
-
-        # -------------------------------------------------------
-        # 3️⃣ Final count (only valid rows must pass)
-        # -------------------------------------------------------
-        final_count = final.count_documents({"s3_key": s3_key})
-
-        # -------------------------------------------------------
-        # LOGGING DETAILS
-        # -------------------------------------------------------
-        logger.info(f"  • Expected rows in S3       = {expected_total}")
-        logger.info(f"  • STAGING total rows        = {staging_total}")
-        logger.info(f"     ↳ dq_checked = True      = {staging_valid}")
-        logger.info(f"     ↳ dq_checked = False     = {staging_invalid}")
-        logger.info(f"  • FINAL rows                = {final_count}")
-
-        # -------------------------------------------------------
-        # VALIDATION RULES
-        # -------------------------------------------------------
-
-        # RULE A — staging_total must match S3 total
-        if staging_total != expected_total:
-            logger.warning(f"⚠️ STAGING mismatch: expected={expected_total}, got={staging_total}")
-        else:
-            logger.success("✔ STAGING raw volume matches S3")
 
-        # RULE B — final must match staging_valid
-        if final_count != staging_valid:
-            logger.error(
-                f"❌ FINAL mismatch: final={final_count} but staging_valid={staging_valid}"
-            )
+def check_file_volume(reader, staging, final, manifests: dict, from_s3: bool, s3_key: str):
+    """Rules A–C for one file (logged, never raised)."""
+    logger.info(f"\n📦 Volume check for {s3_key}")
+
+    # -------------------------------------------------------
+    # 1️⃣ Expected count (manifest, else directly from S3 raw files)
+    # -------------------------------------------------------
+    source_rows = manifests.get(s3_key, {}).get("source_rows")
+    if not from_s3 and source_rows is not None:
+        expected_total = source_rows
+    elif "InfoClimat" in s3_key:
+        expected_total = count_infoclimat_from_jsonl(reader, s3_key)
+    else:
+        # 1 row = 1 line
+        expected_total = reader.s3.count_jsonl_lines(s3_key)
+
+    # -------------------------------------------------------
+    # 2️⃣ Staging counts (with dq_checked split)
+    # -------------------------------------------------------
+    staging_total = staging.count_documents({"s3_key": s3_key})
+    staging_valid = staging.count_documents({"s3_key": s3_key, "dq_checked": True})
+    staging_invalid = staging.count_documents({"s3_key": s3_key, "dq_checked": False})
+
+    # -------------------------------------------------------
+    # 3️⃣ Final count (only valid rows must pass)
+    # -------------------------------------------------------
+    final_count = final.count_documents({"s3_key": s3_key})
+
+    # -------------------------------------------------------
+    # LOGGING DETAILS
+    # -------------------------------------------------------
+    logger.info(f"  • Expected rows (source)    = {expected_total}")
+    logger.info(f"  • STAGING total rows        = {staging_total}")
+    logger.info(f"     ↳ dq_checked = True      = {staging_valid}")
+    logger.info(f"     ↳ dq_checked = False     = {staging_invalid}")
+    logger.info(f"  • FINAL rows                = {final_count}")
+
+    # -------------------------------------------------------
+    # VALIDATION RULES
+    # -------------------------------------------------------
+
+    # RULE A — staging_total must match S3 total
+    if staging_total != expected_total:
+        logger.warning(f"⚠️ STAGING mismatch: expected={expected_total}, got={staging_total}")
+    else:
+        logger.success("✔ STAGING raw volume matches S3")
+
+    # RULE B — final must match staging_valid
+    if final_count != staging_valid:
+        logger.error(
+            f"❌ FINAL mismatch: final={final_count} but staging_valid={staging_valid}"
+        )
+    else:
+        logger.success("✔ FINAL volume matches staging_valid")
+
+    # RULE C — invalid rows must NEVER appear in final
+    if staging_invalid > 0:
+        invalid_any_in_final = final.count_documents({
+            "s3_key": s3_key,
+            "dq_checked": False  # should not exist in final
+        })
+
+        if invalid_any_in_final > 0:
+            logger.error(f"❌ ERROR: invalid rows detected in FINAL for {s3_key}")
         else:
-            logger.success("✔ FINAL volume matches staging_valid")
-
-        # RULE C — invalid rows must NEVER appear in final
-        if staging_invalid > 0:
-            invalid_any_in_final = final.count_documents({
-                "s3_key": s3_key,
-                "dq_checked": False  # should not exist in final
-            })
-
-            if invalid_any_in_final > 0:
-                logger.error(f"❌ ERROR: invalid rows detected in FINAL for {s3_key}")
-            else:
-                logger.success("✔ Invalid staging rows correctly excluded from final")
-
-    mongo.close()
-    logger.success("\n🏁 Volume Test V2 complete.")
+            logger.success("✔ Invalid staging rows correctly excluded from final")
 
 
 if __name__ == "__main__":
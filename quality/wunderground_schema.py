@@ -4,17 +4,33 @@ import pandera.pandas as pa
 from pandera.pandas import Column, Check
 import re
 
+from ingest.numeric_values import add_typed_columns, typed_column as num
+
 
 # ===============================================================
-# Helper: Extract numeric part from unit-based strings
-# Example: "56.8 °F" → 56.8
-#          "87 %" → 87
-#          "5 mph" → 5
+# Typed numeric columns, parsed once per validated frame
 # ===============================================================
-def to_float(series):
-    """Extract numeric part from values like '11 mph', '85 %', '29.47 in'."""
-    numeric = series.str.extract(r"(-?\d+(\.\d+)?)")[0]
-    return numeric.astype(float)
+# Range-checked fields → typed float columns "num__<field>".
+# Values come from the ingest-time "num" sub-document, or are parsed
+# once by prepare(); every range and gust check reuses them instead of
+# re-running a regex.
+NUMERIC_CHECKED = [
+    "temperature_F", "dew_point_F", "humidite_pct", "pressure_inHg",
+    "wind_speed_mph", "wind_gust_mph",
+]
+
+
+# Rows must be unique on this key (also tracked across DQ chunks)
+UNIQUE_KEY = ("id_station", "time_local")
+
+
+def prepare(df):
+    """Adds the typed columns the schema checks run on."""
+    return add_typed_columns(df, NUMERIC_CHECKED)
+
+
+def typed(checks=None):
+    return Column(float, nullable=True, checks=checks)
 
 
 # ===============================================================
@@ -61,29 +77,24 @@ wunderground_schema = pa.DataFrameSchema(
             str,
             nullable=True,
             regex=REGEX_TEMPERATURE_F,
-            checks=Check(lambda s: (to_float(s) >= -100) & (to_float(s) <= 140)),
         ),
         
         "dew_point_F": Column(
             str,
             nullable=True,
             regex=REGEX_TEMPERATURE_F,
-            checks=Check(lambda s: (to_float(s) >= -95) & (to_float(s) <= 95)),
         ),
 
         "humidite_pct": Column(
             str,
             nullable=True,
             regex=REGEX_HUMIDITY_PCT,
-            checks=Check(lambda s: (to_float(s) >= 0) & (to_float(s) <= 100)),
         ),
 
         "pressure_inHg": Column(
             str,
             nullable=True,
             regex=REGEX_PRESSURE_IN,
-            checks=Check(lambda s: (to_float(s) >= 850/33.864) & (to_float(s) <= 1100/33.864)),
-            # GE expects pressure 850–1100 hPa; 1 inHg = 33.864 hPa
         ),
 
         "wind_speed_mph": Column(
@@ -131,6 +142,17 @@ wunderground_schema = pa.DataFrameSchema(
             checks=Check.isin(WIND_DIR_ALLOWED),
         ),
 
+        # -----------------------------------------------------------
+        # Typed values (see prepare())
+        # -----------------------------------------------------------
+        num("temperature_F"): typed(Check.in_range(-100, 140)),
+        num("dew_point_F"): typed(Check.in_range(-95, 95)),
+        num("humidite_pct"): typed(Check.in_range(0, 100)),
+        # GE expects pressure 850–1100 hPa; 1 inHg = 33.864 hPa
+        num("pressure_inHg"): typed(Check.in_range(850/33.864, 1100/33.864)),
+        num("wind_speed_mph"): typed(),
+        num("wind_gust_mph"): typed(),
+
         # -----------------------------------------------------------
         # Technical / ingestion fields
         # -----------------------------------------------------------
@@ -143,13 +165,10 @@ wunderground_schema = pa.DataFrameSchema(
     # ---------------------------------------------------------------
     checks=[
         # ----------------------------------------------
-        # Unicité GE: (id_station, time_local)
+        # Unicité GE: (id_station, time_local)  (ROW-LEVEL)
         # ----------------------------------------------
         Check(
-            lambda df: df[["id_station", "time_local"]]
-            .drop_duplicates()
-            .shape[0]
-            == df.shape[0],
+            lambda df: ~df.duplicated(subset=list(UNIQUE_KEY), keep=False),
             error="Rows must be unique for (id_station, time_local)",
         ),
 
@@ -157,7 +176,7 @@ wunderground_schema = pa.DataFrameSchema(
         # wind_gust_mph ≥ wind_speed_mph  (ROW-LEVEL)
         # ----------------------------------------------
         Check(
-            lambda df: to_float(df["wind_gust_mph"]) >= to_float(df["wind_speed_mph"]),
+            lambda df: df[num("wind_gust_mph")] >= df[num("wind_speed_mph")],
             error="wind_gust_mph must be >= wind_speed_mph",
         ),
     ],
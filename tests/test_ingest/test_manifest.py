@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from ingest.manifest import ManifestBuilder
+
+
+def test_manifest_infoclimat_counts_and_range():
+    m = ManifestBuilder("InfoClimat_2024.jsonl", "infoclimat")
+
+    m.add({"id_station": "07015", "dh_utc": datetime(2024, 10, 5, 1)})
+    m.add({"id_station": "07015", "dh_utc": datetime(2024, 10, 5, 0)})
+    m.add({"id_station": "STATIC0010", "dh_utc": datetime(2024, 10, 6, 23)})
+
+    out = m.build()
+
+    assert out.source == "infoclimat"
+    assert out.row_count == 3
+    assert out.station_ids == ["07015", "STATIC0010"]
+    assert {s.id_station: s.rows for s in out.stations} == {"07015": 2, "STATIC0010": 1}
+    assert out.min_dh_utc == datetime(2024, 10, 5, 0)
+    assert out.max_dh_utc == datetime(2024, 10, 6, 23)
+
+
+def test_manifest_wunderground_uses_day_from_key():
+    m = ManifestBuilder("sources/Ichtegem_011024/data.jsonl", "wunderground")
+    m.add({"id_station": "IICHTE19", "dh_utc": None, "time_local": "12:04 AM"})
+
+    out = m.build()
+
+    # 1 Oct 2024 00:00 Europe/Paris (CEST) = 30 Sep 22:00 UTC
+    assert out.min_dh_utc == datetime(2024, 9, 30, 22, 0)
+    assert out.max_dh_utc == datetime(2024, 10, 1, 21, 59, 59)
+
+
+def test_manifest_empty_file():
+    out = ManifestBuilder("x.jsonl", "unknown").build()
+    assert out.row_count == 0
+    assert out.source_rows is None
+    assert out.min_dh_utc is None
+
+
+def test_manifest_source_rows_include_dropped_rows():
+    m = ManifestBuilder("InfoClimat_2024.jsonl", "infoclimat")
+    m.add_source_rows(3)
+    m.add_source_rows(0)
+    m.add({"id_station": "07015", "dh_utc": datetime(2024, 10, 5, 1)})
+
+    out = m.build()
+    assert (out.row_count, out.source_rows) == (1, 3)
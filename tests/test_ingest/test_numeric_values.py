@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+import pandas as pd
+
+from ingest.numeric_values import (
+    add_typed_columns,
+    parse_numbers,
+    extract_numeric,
+    parse_number_unit,
+    typed_column,
+)
+from transform.transformations import safe_float2, transform_document, transform_infoclimat
+
+
+def test_parse_number_unit():
+    assert parse_number_unit("56.8 °F") == (56.8, "°F")
+    assert parse_number_unit("-3") == (-3.0, None)
+    assert parse_number_unit("14,2") == (14.2, None)
+    assert parse_number_unit("") == (None, None)
+    assert parse_number_unit(None) == (None, None)
+    assert parse_number_unit(7) == (7.0, None)
+
+
+def test_extract_numeric_skips_missing_and_codes():
+    record = {
+        "temperature_F": "56.8 °F",
+        "pressure_inHg": "29.92 in",
+        "wind_gust_mph": "",
+        "nebulosite_okta": "5",
+    }
+    assert extract_numeric(record) == {"temperature_F": 56.8, "pressure_inHg": 29.92}
+
+
+# Raw strings seen in (or derived from) staging, valid or not
+RAW_CORPUS = [
+    "10", "-4.5", "1013.7", "56.8 °F", "29.92 in", "0.00 in", "87 %", "5 mph",
+    "12 w/m²", "3 UV", "14,2", "1 013,25 hPa", "- 5 °F", "-5 °F", "1.2.3",
+    "1.", ".5", "-.5", "-", "--5", "5-", "007", "-0", "abc", "", "   ", "N/A",
+    "12:04 AM", "1,013.25", " 7 ",
+]
+
+
+@pytest.mark.parametrize("raw", RAW_CORPUS)
+def test_parse_number_unit_matches_safe_float2(raw):
+    assert parse_number_unit(raw)[0] == safe_float2(raw)
+
+
+def test_parse_numbers_matches_scalar_parse():
+    raw = pd.Series(RAW_CORPUS + [None], dtype=object)
+    expected = [parse_number_unit(v)[0] for v in raw]
+
+    out = parse_numbers(raw).tolist()
+    assert [None if v != v else v for v in out] == expected
+
+
+def test_add_typed_columns_prefers_num_then_raw():
+    df = pd.DataFrame([
+        {"temperature_C": "999", "num": {"temperature_C": 10.0}},   # typed value wins
+        {"temperature_C": "-2.5", "num": None},                     # legacy row → parsed
+        {"temperature_C": None},
+    ])
+
+    out = add_typed_columns(df, ["temperature_C", "pression_hPa"])
+
+    col = typed_column("temperature_C")
+    assert out[col].tolist()[:2] == [10.0, -2.5]
+    assert np.isnan(out[col].iloc[2])
+    assert out[typed_column("pression_hPa")].isna().all()
+
+
+def test_transform_uses_typed_values():
+    doc = {"id_station": "IC001", "temperature_C": "ignored", "num": {"temperature_C": 12.5}}
+    assert transform_infoclimat(doc)["temperature_C"] == 12.5
+
+    doc = {"s3_key": "x", "temperature_F": "ignored", "num": {"temperature_F": 32.0}}
+    assert transform_document(doc)["temperature_C"] == pytest.approx(0.0)
+
+
+def test_parse_numbers_repeated_and_missing_values():
+    raw = pd.Series(["5 mph", None, "5 mph", "12,5", "n/a"], index=[10, 11, 12, 13, 14])
+    out = parse_numbers(raw)
+
+    assert out.index.tolist() == [10, 11, 12, 13, 14]
+    assert out[10] == 5.0 and out[12] == 5.0 and out[13] == 12.5
+    assert np.isnan(out[11]) and np.isnan(out[14])
+
+
+def test_add_typed_columns_computed_once_per_frame():
+    df = pd.DataFrame([{"temperature_C": "10"}])
+    add_typed_columns(df, ["temperature_C"])
+
+    # Cached typed column is reused, the raw value is not parsed again
+    df.loc[0, "temperature_C"] = "20"
+    add_typed_columns(df, ["temperature_C"])
+
+    assert df[typed_column("temperature_C")].tolist() == [10.0]
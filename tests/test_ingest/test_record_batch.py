@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from ingest.record_batch import StagingBatch, _synthetic_doc, measure_memory
+
+
+KEY = "dataset_meteo/Ichtegem_011024/file.jsonl"
+
+
+def make_docs():
+    return [
+        {
+            "s3_key": KEY, "source": "wunderground", "id_station": "STICH",
+            "time_local": "12:04 AM", "temperature_F": "50 °F", "dq_checked": False,
+            "ingested_at": datetime(2024, 10, 1), "num": {"temperature_F": 50.0},
+        },
+        # Different layout, no num, other station
+        {
+            "s3_key": KEY, "source": "wunderground", "id_station": "OTHER",
+            "time_local": "1:04 AM", "dq_checked": False,
+        },
+        {
+            "s3_key": KEY, "source": "wunderground", "id_station": "STICH",
+            "time_local": "2:04 AM", "temperature_F": "51 °F", "dq_checked": False,
+            "ingested_at": datetime(2024, 10, 1), "num": {"temperature_F": 51.0},
+        },
+    ]
+
+
+def test_round_trip_preserves_documents():
+    batch = StagingBatch(KEY, "wunderground")
+    docs = make_docs()
+    for d in docs:
+        batch.append(d)
+
+    assert len(batch) == 3
+    assert list(batch.iter_documents()) == docs
+    assert batch.station_ids() == ["STICH", "OTHER"]
+
+
+def test_chunks():
+    batch = StagingBatch(KEY, "wunderground")
+    for d in make_docs():
+        batch.append(d)
+
+    assert [len(c) for c in batch.chunks(2)] == [2, 1]
+
+
+def test_rejects_row_from_another_file():
+    batch = StagingBatch(KEY, "wunderground")
+    with pytest.raises(ValueError):
+        batch.append({**make_docs()[0], "s3_key": "other.jsonl"})
+
+
+def test_shared_values():
+    batch = StagingBatch(KEY, "wunderground")
+    for i in range(3):
+        batch.append(_synthetic_doc(i, KEY))
+
+    a, b = batch.document(0), batch.document(2)
+    assert a["precip_rate_in"] is b["precip_rate_in"]
+    assert a["s3_key"] is b["s3_key"]
+
+
+def test_batch_uses_less_memory_than_dicts():
+    stats = measure_memory(rows=2000)
+    assert stats["batch_bytes_per_row"] < stats["dict_bytes_per_row"]
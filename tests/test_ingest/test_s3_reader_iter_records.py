@@ -50,3 +50,27 @@ def test_iter_records_invalid_json(monkeypatch, fake_s3):
 
     records = list(r.iter_records("file.jsonl"))
     assert records == []
+
+
+def test_iter_records_counts_dropped_source_rows(monkeypatch, fake_s3):
+    r = S3JSONLReader()
+    counts = []
+
+    fake_s3.lines = [
+        json.dumps({"_airbyte_data": {"hourly": {
+            "07015": [{"id_station": "07015"}, "not a row", {"id_station": "07015"}],
+            "_params": {},
+        }}}).encode(),
+        b"not a json",
+    ]
+    monkeypatch.setattr(r, "s3", fake_s3)
+    records = list(r.iter_records("InfoClimat_2024.jsonl", counts.append))
+
+    # Same count as the volume test's S3 recount: 3 hourly rows
+    assert len(records) == 2
+    assert sum(counts) == 3
+
+    counts.clear()
+    fake_s3.lines = [json.dumps({"_airbyte_data": {"Time": "01:00 AM"}}).encode(), b"not a json"]
+    assert len(list(r.iter_records("Ichtegem_2024.jsonl", counts.append))) == 1
+    assert sum(counts) == 2
@@ -0,0 +1,107 @@
+import os
+import pytest
+
+from ingest.s3_client import S3Client
+from ingest.s3_spool import SpooledS3Client
+
+
+KEY = "raw/infoclimat_2024_01.jsonl"
+
+
+class CountingS3:
+    """Wraps the Moto client and counts get_object calls."""
+
+    def __init__(self, s3):
+        self._s3 = s3
+        self.get_calls = 0
+
+    def get_object(self, **kw):
+        self.get_calls += 1
+        return self._s3.get_object(**kw)
+
+    def __getattr__(self, name):
+        return getattr(self._s3, name)
+
+
+@pytest.fixture
+def client(moto_s3_with_jsonl):
+    s3, bucket = moto_s3_with_jsonl
+    c = S3Client()
+    c.s3 = CountingS3(s3)
+    c.bucket = bucket
+    return c
+
+
+def test_spool_downloads_once(client):
+    with SpooledS3Client(client) as spool:
+        digest = spool.compute_file_hash(KEY)
+        lines = list(spool.stream_jsonl_lines(KEY))
+        count = spool.count_jsonl_lines(KEY)
+
+    assert client.s3.get_calls == 1
+    assert len(lines) == 2
+    assert count == 2
+
+
+def test_spool_matches_s3_client(client):
+    with SpooledS3Client(client) as spool:
+        assert spool.compute_file_hash(KEY) == client.compute_file_hash(KEY)
+        assert spool.get_md5_from_stream(KEY) == client.get_md5_from_stream(KEY)
+        assert list(spool.stream_jsonl_lines(KEY)) == list(client.stream_jsonl_lines(KEY))
+
+
+def test_spool_delegates_listing(client):
+    client.raw_prefix = "raw/"
+    with SpooledS3Client(client) as spool:
+        assert sorted(spool.list_jsonl_files()) == sorted(client.list_jsonl_files())
+
+
+def test_spool_cleans_up(client):
+    spool = SpooledS3Client(client)
+    spool.compute_file_hash(KEY)
+    directory = spool.directory
+
+    assert os.listdir(directory)
+
+    spool.release(KEY)
+    assert spool.used_bytes == 0
+    assert not os.listdir(directory)
+
+    spool.close()
+    assert not os.path.exists(directory)
+
+
+def test_spool_over_budget_falls_back_to_s3(client):
+    with SpooledS3Client(client, max_bytes=10) as spool:
+        lines = list(spool.stream_jsonl_lines(KEY))
+        lines_again = list(spool.stream_jsonl_lines(KEY))
+
+        assert spool.used_bytes == 0
+        assert lines == lines_again
+        assert len(lines) == 2
+
+
+def test_spool_evicts_lru_within_budget(client):
+    other = "raw/wunderground_ichtegem_2024.jsonl"
+
+    with SpooledS3Client(client) as spool:
+        size_a = len(client.s3.get_object(Bucket=client.bucket, Key=KEY)["Body"].read())
+        spool.max_bytes = size_a + 5
+
+        spool.compute_file_hash(KEY)
+        spool.compute_file_hash(other)
+
+        assert KEY not in spool._files
+        assert other in spool._files
+        assert spool.used_bytes <= spool.max_bytes
+
+
+def test_spool_from_env(client, monkeypatch):
+    monkeypatch.delenv("INGEST_SPOOL", raising=False)
+    assert SpooledS3Client.from_env(client) is None
+
+    monkeypatch.setenv("INGEST_SPOOL", "true")
+    monkeypatch.setenv("INGEST_SPOOL_MAX_BYTES", "1234")
+    spool = SpooledS3Client.from_env(client)
+    assert spool.max_bytes == 1234
+    spool.close()
@@ -0,0 +1,66 @@
+import pytest
+
+from ingest.scheduler import IngestScheduler, DEFAULT_BYTES_PER_SEC, build_scheduler
+
+
+# -------------------------------------------------------------------
+# Cost estimation
+# -------------------------------------------------------------------
+
+def test_estimate_uses_own_history_rescaled():
+    history = {"InfoClimat_01.jsonl": {"size_bytes": 1000, "duration_seconds": 10.0}}
+    sched = IngestScheduler(history, {"InfoClimat_01.jsonl": 2000})
+
+    assert sched.estimate_seconds("InfoClimat_01.jsonl") == pytest.approx(20.0)
+
+
+def test_estimate_uses_source_throughput_for_new_files():
+    history = {
+        "InfoClimat_01.jsonl": {"size_bytes": 1000, "duration_seconds": 10.0},   # 100 B/s
+        "Ichtegem_010124/a.jsonl": {"size_bytes": 1000, "duration_seconds": 1.0}, # 1000 B/s
+    }
+    sizes = {"InfoClimat_02.jsonl": 500, "Ichtegem_020124/b.jsonl": 500}
+    sched = IngestScheduler(history, sizes)
+
+    assert sched.estimate_seconds("InfoClimat_02.jsonl") == pytest.approx(5.0)
+    assert sched.estimate_seconds("Ichtegem_020124/b.jsonl") == pytest.approx(0.5)
+
+
+def test_estimate_without_history_uses_default_rate():
+    sched = IngestScheduler({}, {"x.jsonl": DEFAULT_BYTES_PER_SEC * 3})
+    assert sched.estimate_seconds("x.jsonl") == pytest.approx(3.0)
+
+
+# -------------------------------------------------------------------
+# LPT ordering + ETA
+# -------------------------------------------------------------------
+
+def test_order_longest_first():
+    sizes = {"a.jsonl": 10, "b.jsonl": 1000, "c.jsonl": 100}
+    sched = IngestScheduler({}, sizes)
+
+    assert sched.order(list(sizes)) == ["b.jsonl", "c.jsonl", "a.jsonl"]
+
+
+def test_lpt_reduces_makespan():
+    # Classic case: small files first leave one worker with the big file at the end
+    sizes = {"s1": 1, "s2": 1, "s3": 1, "s4": 1, "big": 4}
+    sched = IngestScheduler({}, {k: v * DEFAULT_BYTES_PER_SEC for k, v in sizes.items()})
+
+    naive = sched.makespan(list(sizes), workers=2)
+    lpt = sched.makespan(sched.order(list(sizes)), workers=2)
+
+    assert naive == pytest.approx(6.0)
+    assert lpt == pytest.approx(4.0)
+
+
+def test_build_scheduler_from_tracker(tracker):
+    tracker.start_ingestion("A.jsonl")
+    tracker.mark_success("A.jsonl", lines_read=100, file_hash="H",
+                         size_bytes=1000, duration_seconds=4.0)
+
+    doc = tracker.collection.find_one({"s3_key": "A.jsonl"})
+    assert doc["rows_per_sec"] == pytest.approx(25.0)
+
+    sched = build_scheduler(tracker, {"A.jsonl": 1000})
+    assert sched.estimate_seconds("A.jsonl") == pytest.approx(4.0)
@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+import pytest
+
+from ingest.record_batch import StagingBatch
+from ingest.s3_reader import S3JSONLReader
+from ingest.staged_pipeline import PipelineConfig, StagedIngestionPipeline
+from loaders.load_staging import ingest_file_to_staging
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+
+class FakeStreamS3:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def stream_jsonl_lines(self, key):
+        for l in self.lines:
+            yield l
+
+    def compute_file_hash(self, key):
+        return "HASH"
+
+
+class SlowCollection:
+    """insert_many with a simulated Atlas latency (thread-safe)."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def insert_many(self, docs, ordered=True):
+        time.sleep(self.delay)
+        with self._lock:
+            self.batches.append(list(docs))
+
+        class R:
+            inserted_ids = list(range(len(docs)))
+
+        return R()
+
+    @property
+    def docs(self):
+        return [d for b in self.batches for d in b]
+
+
+def wunderground_lines(n):
+    return [
+        json.dumps({"_airbyte_data": {"Time": f"{i % 12 + 1}:00 AM", "Temperature": "50 °F"}})
+        for i in range(n)
+    ]
+
+
+def make_reader(monkeypatch, lines):
+    r = S3JSONLReader()
+    monkeypatch.setattr(r, "s3", FakeStreamS3(lines))
+    return r
+
+
+# -------------------------------------------------------------------
+# Pipeline behaviour
+# -------------------------------------------------------------------
+
+def test_pipeline_writes_all_rows(monkeypatch):
+    reader = make_reader(monkeypatch, wunderground_lines(25))
+    coll = SlowCollection()
+
+    pipeline = StagedIngestionPipeline(
+        "Ichtegem_2024.jsonl", reader, coll,
+        station_id_override="STICH",
+        config=PipelineConfig(queue_size=4, parser_workers=2, validator_workers=2,
+                              writer_workers=2, batch_size=10),
+    )
+
+    assert pipeline.run() == 25
+    assert len(coll.docs) == 25
+    assert all(d["id_station"] == "STICH" for d in coll.docs)
+    assert all(d["s3_key"] == "Ichtegem_2024.jsonl" for d in coll.docs)
+    assert all(d["num"] == {"temperature_F": 50.0} for d in coll.docs)
+    assert max(len(b) for b in coll.batches) <= 10
+
+    stages = {s["stage"]: s for s in pipeline.snapshot()}
+    assert stages["reader"]["items_out"] == 25
+    assert stages["writer"]["items_out"] == 25
+
+
+def test_pipeline_hands_staging_batches_to_the_writer(monkeypatch):
+    reader = make_reader(monkeypatch, wunderground_lines(25))
+    coll = SlowCollection()
+    received = []
+
+    class SpyDQ:
+        def apply(self, batch):
+            received.append(batch)
+            docs = list(batch.iter_documents())
+            for doc in docs:
+                doc["dq_checked"] = True
+            return docs
+
+    pipeline = StagedIngestionPipeline(
+        "Ichtegem_2024.jsonl", reader, coll, station_id_override="STICH",
+        config=PipelineConfig(queue_size=40, validator_workers=1, writer_workers=1, batch_size=10),
+        dq=SpyDQ(),
+    )
+
+    assert pipeline.run() == 25
+    assert all(isinstance(b, StagingBatch) for b in received)
+    assert [len(b) for b in received] == [10, 10, 5]
+    assert pipeline.docs_q.maxsize == 4          # 40 rows / 10 per batch
+    assert len(coll.docs) == 25 and all(d["dq_checked"] for d in coll.docs)
+
+
+def test_pipeline_infoclimat_expands_rows(monkeypatch):
+    line = json.dumps({
+        "_airbyte_data": {
+            "hourly": {
+                "07015": [{"id_station": "07015", "temperature": "11"}] * 3,
+                "_params": {},
+            }
+        }
+    })
+    reader = make_reader(monkeypatch, [line, line])
+    coll = SlowCollection()
+
+    pipeline = StagedIngestionPipeline("InfoClimat_2024.jsonl", reader, coll)
+
+    assert pipeline.run() == 6
+    assert {d["id_station"] for d in coll.docs} == {"07015"}
+
+
+def test_pipeline_backpressure_bounds_queues(monkeypatch):
+    """A slow writer must keep every queue within its bound."""
+    reader = make_reader(monkeypatch, wunderground_lines(40))
+    coll = SlowCollection(delay=0.02)
+
+    cfg = PipelineConfig(queue_size=3, writer_workers=1, batch_size=2)
+    pipeline = StagedIngestionPipeline(
+        "Ichtegem_2024.jsonl", reader, coll, station_id_override="STICH", config=cfg,
+    )
+
+    assert pipeline.run() == 40
+    for snap in pipeline.snapshot():
+        assert snap["max_queue_depth"] <= cfg.queue_size
+
+
+def test_pipeline_error_is_reraised(monkeypatch):
+    """Missing id_station (no override) stops the pipeline with ValueError."""
+    reader = make_reader(monkeypatch, wunderground_lines(10))
+    coll = SlowCollection()
+
+    pipeline = StagedIngestionPipeline("UnknownCity.jsonl", reader, coll)
+
+    with pytest.raises(ValueError):
+        pipeline.run()
+
+
+def test_pipeline_stop_drops_queued_batches(monkeypatch):
+    """After a failure elsewhere, the writer must not insert the queued rows."""
+    reader = make_reader(monkeypatch, wunderground_lines(20))
+    coll = SlowCollection()
+
+    pipeline = StagedIngestionPipeline(
+        "Ichtegem_2024.jsonl", reader, coll, station_id_override="STICH",
+        config=PipelineConfig(queue_size=20, writer_workers=1, batch_size=2),
+    )
+
+    insert_many = coll.insert_many
+
+    def insert_then_fail(docs, ordered=True):
+        result = insert_many(docs, ordered)
+        pipeline._fail("validator", RuntimeError("boom"))
+        return result
+
+    coll.insert_many = insert_then_fail
+
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+    assert len(coll.batches) == 1
+
+
+def test_pipeline_config_from_env(monkeypatch):
+    monkeypatch.delenv("INGEST_STAGED_PIPELINE", raising=False)
+    assert PipelineConfig.from_env() is None
+
+    monkeypatch.setenv("INGEST_STAGED_PIPELINE", "true")
+    monkeypatch.setenv("INGEST_WRITER_WORKERS", "4")
+    cfg = PipelineConfig.from_env()
+    assert cfg.writer_workers == 4
+
+
+# -------------------------------------------------------------------
+# Integration with ingest_file_to_staging
+# -------------------------------------------------------------------
+
+def test_ingest_file_to_staging_staged(monkeypatch, fake_mongo, tracker):
+    stations = fake_mongo.get_collection(fake_mongo.settings.stations_collection)
+    stations.insert_one({"city": "Ichtegem", "id": "STICH"})
+
+    reader = make_reader(monkeypatch, wunderground_lines(5))
+
+    ingest_file_to_staging(
+        "Ichtegem_2024.jsonl", reader, fake_mongo, tracker,
+        pipeline_config=PipelineConfig(writer_workers=1),
+    )
+
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    assert staging.count_documents({"id_station": "STICH"}) == 5
+
+    doc = tracker.collection.find_one({"s3_key": "Ichtegem_2024.jsonl"})
+    assert doc["success"] is True
+    assert doc["lines_read"] == 5
+    assert doc["manifest"]["row_count"] == 5
+    assert doc["manifest"]["source_rows"] == 5
+    assert doc["manifest"]["station_ids"] == ["STICH"]
@@ -102,3 +102,140 @@ def test_get_pending_or_failed(fake_mongo):
     docs = tracker.get_pending_or_failed()
     keys = {d["s3_key"] for d in docs}
     assert keys == {"A", "C"}
+
+
+# ============================================================
+# Leases (distributed workers)
+# ============================================================
+
+def test_claim_registers_unknown_file(fake_mongo):
+    tracker = IngestionTracker(fake_mongo)
+
+    doc = tracker.claim("A", owner="w1", lease_seconds=60)
+
+    assert doc["lease_owner"] == "w1"
+    assert doc["success"] is False
+    assert "first_seen" in doc
+
+
+def test_claim_held_by_other_worker(fake_mongo):
+    tracker = IngestionTracker(fake_mongo)
+
+    assert tracker.claim("A", owner="w1") is not None
+    assert tracker.claim("A", owner="w2") is None
+    # Re-entrant for the current owner
+    assert tracker.claim("A", owner="w1") is not None
+
+
+def test_claim_expired_lease(fake_mongo):
+    from datetime import datetime, timedelta
+
+    tracker = IngestionTracker(fake_mongo)
+    tracker.collection.insert_one({
+        "s3_key": "A",
+        "lease_owner": "dead-worker",
+        "lease_expires_at": datetime.utcnow() - timedelta(seconds=1),
+    })
+
+    doc = tracker.claim("A", owner="w2")
+    assert doc["lease_owner"] == "w2"
+
+
+def test_lease_heartbeat_detects_takeover(fake_mongo):
+    from datetime import datetime, timedelta
+    from ingest.ingestion_tracker import LeaseHeartbeat
+
+    tracker = IngestionTracker(fake_mongo)
+    tracker.claim("A", owner="w1", lease_seconds=60)
+
+    with LeaseHeartbeat(tracker, "A", "w1", lease_seconds=60, interval=60) as hb:
+        assert hb.still_held() is True
+
+        # w1 stalls past its lease, w2 takes the file over
+        tracker.collection.update_one(
+            {"s3_key": "A"}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        tracker.claim("A", owner="w2")
+
+        assert hb.still_held() is False
+        assert hb.lost is True
+
+    # w2's lease survives w1's exit
+    assert tracker.collection.find_one({"s3_key": "A"})["lease_owner"] == "w2"
+
+
+def test_renew_and_release_lease(fake_mongo):
+    tracker = IngestionTracker(fake_mongo)
+    tracker.claim("A", owner="w1", lease_seconds=1)
+
+    assert tracker.renew_lease("A", "w1", lease_seconds=60) is True
+    assert tracker.renew_lease("A", "w2") is False
+
+    tracker.release_lease("A", "w1")
+    doc = tracker.collection.find_one({"s3_key": "A"})
+    assert doc["lease_owner"] is None
+    assert tracker.claim("A", owner="w2") is not None
+
+
+def test_lease_heartbeat_renews_then_releases(fake_mongo):
+    import time
+    from ingest.ingestion_tracker import LeaseHeartbeat
+
+    tracker = IngestionTracker(fake_mongo)
+    tracker.claim("A", owner="w1", lease_seconds=60)
+    first = tracker.collection.find_one({"s3_key": "A"})["lease_expires_at"]
+
+    with LeaseHeartbeat(tracker, "A", "w1", lease_seconds=60, interval=0.01) as hb:
+        time.sleep(0.05)
+        renewed = tracker.collection.find_one({"s3_key": "A"})["lease_expires_at"]
+
+    assert renewed >= first
+    assert hb.lost is False
+    assert tracker.collection.find_one({"s3_key": "A"})["lease_owner"] is None
+
+
+# ============================================================
+# Manifests / zone-map pruning
+# ============================================================
+
+def test_find_files_prunes_by_station_and_time(fake_mongo):
+    from datetime import datetime
+    from models.ingestion_tracker_model import FileManifestModel
+
+    tracker = IngestionTracker(fake_mongo)
+
+    def add(key, stations, lo, hi):
+        tracker.start_ingestion(key)
+        tracker.mark_success(key, lines_read=1, file_hash="H", manifest=FileManifestModel(
+            source="infoclimat", row_count=1, station_ids=stations,
+            min_dh_utc=lo, max_dh_utc=hi,
+        ))
+
+    add("jan.jsonl", ["07015"], datetime(2024, 1, 1), datetime(2024, 1, 31))
+    add("feb.jsonl", ["07015", "STATIC0010"], datetime(2024, 2, 1), datetime(2024, 2, 29))
+    tracker.collection.insert_one({"s3_key": "legacy.jsonl", "success": True})
+
+    assert set(tracker.find_files(station_id="STATIC0010")) == {"feb.jsonl", "legacy.jsonl"}
+    assert set(tracker.find_files(start=datetime(2024, 2, 10))) == {"feb.jsonl", "legacy.jsonl"}
+    assert set(tracker.find_files(end=datetime(2024, 1, 15))) == {"jan.jsonl", "legacy.jsonl"}
+
+    assert tracker.get_manifest("jan.jsonl")["station_ids"] == ["07015"]
+
+
+def test_find_files_keeps_manifests_without_time_range(fake_mongo):
+    from datetime import datetime
+    from ingest.manifest import ManifestBuilder
+
+    tracker = IngestionTracker(fake_mongo)
+
+    # Wunderground key without an /Ichtegem_DDMMYY/ folder: no dh_utc range
+    manifest = ManifestBuilder("dataset_meteo/Ichtegem/data.jsonl", "wunderground")
+    manifest.add({"id_station": "IICHTE19", "dh_utc": None})
+    assert manifest.build().max_dh_utc is None
+
+    tracker.start_ingestion("undated.jsonl")
+    tracker.mark_success("undated.jsonl", lines_read=1, file_hash="H", manifest=manifest.build())
+
+    assert tracker.find_files(start=datetime(2024, 2, 10)) == ["undated.jsonl"]
+    assert tracker.find_files(end=datetime(2024, 1, 15)) == ["undated.jsonl"]
+    assert tracker.find_files(station_id="OTHER", start=datetime(2024, 2, 10)) == []
@@ -60,8 +60,9 @@ class FakeTracker:
     def start_ingestion(self, key):
         self.started.append(key)
 
-    def mark_success(self, s3_key, lines_read, file_hash):
+    def mark_success(self, s3_key, lines_read, file_hash, **stats):
         self.success.append((s3_key, lines_read, file_hash))
+        self.stats = stats
 
     def mark_failure(self, s3_key, error_message):
         self.failed.append((s3_key, error_message))
@@ -72,8 +73,10 @@ class FakeReader:
         self._records = records
         self._hash = file_hash
 
-    def iter_records(self, key):
+    def iter_records(self, key, on_source_rows=None):
         for r in self._records:
+            if on_source_rows is not None:
+                on_source_rows(1)
             yield r
 
     @property
@@ -119,6 +122,9 @@ def test_ingest_file_to_staging_ok(fake_mongo):
     assert len(docs) == 2
     assert docs[0]["id_station"] == "STICH"
     assert docs[0]["s3_key"] == "Ichtegem_2025.jsonl"
+    assert docs[0]["source"] == "wunderground"
+    # Sparse: absent measurements are not written
+    assert "pression_hPa" not in docs[0]
 
     # Tracker
     assert tracker.started == ["Ichtegem_2025.jsonl"]
@@ -173,3 +179,270 @@ def test_ingest_file_to_staging_model_validation_error(fake_mongo):
         )
 
     assert tracker.failed
+
+
+def test_retry_replaces_rows_of_a_partially_written_attempt(fake_mongo, monkeypatch):
+    import mongomock
+
+    monkeypatch.setenv("INGEST_BATCH_SIZE", "1")
+    fake_mongo.get_collection(fake_mongo.settings.stations_collection).insert_one(
+        {"city": "Ichtegem", "id": "STICH"}
+    )
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+
+    insert_many = mongomock.collection.Collection.insert_many
+    calls = {"n": 0}
+
+    def fail_on_second_chunk(self, docs, *args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("connection reset")
+        return insert_many(self, docs, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "insert_many", fail_on_second_chunk)
+
+    records = [{"temperature_C": str(t)} for t in (10, 11, 12)]
+    tracker = FakeTracker()
+
+    with pytest.raises(RuntimeError):
+        ingest_file_to_staging("Ichtegem_2025.jsonl", FakeReader(records), fake_mongo, tracker)
+    # The chunk written before the failure is gone
+    assert staging.count_documents({"s3_key": "Ichtegem_2025.jsonl"}) == 0
+
+    # Leftovers from a crashed attempt are removed too
+    staging.insert_one({"s3_key": "Ichtegem_2025.jsonl", "id_station": "STICH", "temperature_C": "10"})
+
+    ingest_file_to_staging("Ichtegem_2025.jsonl", FakeReader(records), fake_mongo, tracker)
+    assert staging.count_documents({"s3_key": "Ichtegem_2025.jsonl"}) == 3
+
+
+# ============================================================
+# ingest_all_staging — continue-on-error + deferred retries
+# ============================================================
+
+@pytest.fixture
+def patched_ingest_all(monkeypatch, fake_mongo):
+    """
+    Wire ingest_all_staging to fake Mongo / S3 and a scripted
+    ingest_file_to_staging. Returns the list of attempted keys.
+    """
+    import loaders.load_staging as ls
+
+    class FakeClient:
+        config = {"ingestion": {"max_retries": 2, "retry_delay_seconds": 1}}
+
+        def __init__(self, *a, **kw):
+            pass
+
+        def list_jsonl_sizes(self):
+            return {"good.jsonl": 10, "bad.jsonl": 20, "flaky.jsonl": 30}
+
+        def compute_file_hash(self, key):
+            return "H"
+
+    fake_mongo.connect = lambda: None
+    fake_mongo.close = lambda: None
+
+    monkeypatch.setattr(ls, "load_env", lambda: None)
+    monkeypatch.setattr(ls.MongoSettings, "from_env", classmethod(lambda cls: None))
+    monkeypatch.setattr(ls, "MongoDBClient", lambda settings: fake_mongo)
+    monkeypatch.setattr(ls, "S3Client", FakeClient)
+    monkeypatch.setattr(ls, "S3JSONLReader", lambda: None)
+    monkeypatch.setattr(ls.time, "sleep", lambda s: sleeps.append(s))
+
+    attempts = []
+    sleeps = []
+    flaky_calls = {"n": 0}
+
+    def fake_ingest(s3_key, s3_reader, mongo, tracker, pipeline_config=None, size_bytes=None, **kwargs):
+        attempts.append(s3_key)
+        if s3_key == "bad.jsonl":
+            raise RuntimeError("corrupted object")
+        if s3_key == "flaky.jsonl":
+            flaky_calls["n"] += 1
+            if flaky_calls["n"] == 1:
+                raise RuntimeError("timeout")
+        tracker.start_ingestion(s3_key)
+        tracker.mark_success(s3_key, lines_read=1, file_hash="H")
+
+    monkeypatch.setattr(ls, "ingest_file_to_staging", fake_ingest)
+
+    return ls, attempts, sleeps
+
+
+def test_ingest_all_staging_continue_on_error(patched_ingest_all):
+    ls, attempts, sleeps = patched_ingest_all
+
+    summary = ls.ingest_all_staging(continue_on_error=True)
+
+    assert set(summary["ingested"]) == {"good.jsonl", "flaky.jsonl"}
+    assert [f["s3_key"] for f in summary["failed"]] == ["bad.jsonl"]
+    assert summary["failed"][0]["attempts"] == 3
+    assert summary["failed"][0]["error"] == "corrupted object"
+
+    # Exponential backoff: 1s then 2s
+    assert sleeps == [1, 2]
+    # Good file ingested once, never retried
+    assert attempts.count("good.jsonl") == 1
+
+
+def test_ingest_all_staging_fail_fast_by_default(patched_ingest_all, monkeypatch):
+    ls, attempts, _ = patched_ingest_all
+    monkeypatch.delenv("INGEST_CONTINUE_ON_ERROR", raising=False)
+
+    with pytest.raises(RuntimeError):
+        ls.ingest_all_staging()
+
+
+def test_distributed_worker_rechecks_tracker_after_claim(patched_ingest_all, monkeypatch, fake_mongo):
+    ls, attempts, _ = patched_ingest_all
+    monkeypatch.setenv("INGEST_DISTRIBUTED", "true")
+    monkeypatch.setenv("INGEST_WORKER_ID", "w2")
+
+    # Stale startup snapshot: another worker ingested good.jsonl since
+    monkeypatch.setattr(ls.IngestionTracker, "list_known_files", lambda self: set())
+    fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).insert_one(
+        {"s3_key": "good.jsonl", "success": True, "file_hash": "H"}
+    )
+
+    summary = ls.ingest_all_staging(continue_on_error=True)
+
+    assert "good.jsonl" not in attempts
+    assert "good.jsonl" in summary["skipped"]
+
+
+def test_ingest_file_to_staging_aborts_when_lease_lost(fake_mongo):
+    from ingest.ingestion_tracker import LeaseLostError
+
+    fake_mongo.get_collection(fake_mongo.settings.stations_collection).insert_one(
+        {"city": "Ichtegem", "id": "STICH"}
+    )
+
+    class LostLease:
+        def still_held(self):
+            return False
+
+    tracker = FakeTracker()
+    with pytest.raises(LeaseLostError):
+        ingest_file_to_staging(
+            "Ichtegem_2025.jsonl", FakeReader([{"temperature_C": "10"}]), fake_mongo, tracker,
+            lease=LostLease(),
+        )
+
+    # Neither success nor failure: the new owner's tracker state is kept
+    assert tracker.success == []
+    assert tracker.failed == []
+
+
+# ============================================================
+# Fused ingest-time DQ
+# ============================================================
+
+def wunderground_record(time_local, temperature="50 °F"):
+    return {
+        "time_local": time_local,
+        "temperature_F": temperature,
+        "wind_speed_mph": "5 mph",
+        "wind_gust_mph": "10 mph",
+    }
+
+
+@pytest.mark.parametrize("staged", [False, True])
+def test_ingest_file_to_staging_fused_dq(fake_mongo, monkeypatch, staged):
+    from ingest.staged_pipeline import PipelineConfig
+
+    monkeypatch.setenv("INGEST_BATCH_SIZE", "2")
+    fake_mongo.get_collection(fake_mongo.settings.stations_collection).insert_one(
+        {"city": "Ichtegem", "id": "STICH"}
+    )
+    tracker_coll = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+    tracker_coll.insert_one({"s3_key": "Ichtegem_2025.jsonl", "success": True})
+
+    records = [
+        wunderground_record("1:04 AM"),
+        wunderground_record("2:04 AM", temperature="500 °F"),   # out of range
+        wunderground_record("3:04 AM"),
+        wunderground_record("1:04 AM"),                         # duplicate, later batch
+    ]
+
+    class StreamReader(FakeReader):
+        def parse_line(self, line, source, key, on_source_rows=None):
+            return [dict(self._records[int(line)])]
+
+        @property
+        def s3(self):
+            outer = self
+
+            class H:
+                def stream_jsonl_lines(self, key):
+                    return iter(str(i) for i in range(len(outer._records)))
+
+                def compute_file_hash(self, key):
+                    return "HASH"
+
+            return H()
+
+    reader = StreamReader(records)
+    monkeypatch.setattr(reader, "detect_source", lambda key: "wunderground", raising=False)
+
+    config = PipelineConfig(writer_workers=1, batch_size=2) if staged else None
+    ingest_file_to_staging(
+        "Ichtegem_2025.jsonl", reader, fake_mongo, FakeTracker(),
+        pipeline_config=config, fused_dq=True,
+    )
+
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    verdicts = sorted((d["time_local"], d["dq_checked"]) for d in staging.find({}))
+    assert verdicts == [
+        ("1:04 AM", False), ("1:04 AM", False), ("2:04 AM", False), ("3:04 AM", True),
+    ]
+    assert tracker_coll.find_one({"s3_key": "Ichtegem_2025.jsonl"})["dq_validated"] is False
+
+
+def test_fused_dq_failure_does_not_leave_a_successful_file(fake_mongo, monkeypatch):
+    import loaders.load_staging as ls
+
+    fake_mongo.get_collection(fake_mongo.settings.stations_collection).insert_one(
+        {"city": "Ichtegem", "id": "STICH"}
+    )
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+
+    def broken_finish(self):
+        raise RuntimeError("dq_validated write failed")
+
+    monkeypatch.setattr(ls.IngestTimeDQ, "finish", broken_finish)
+    monkeypatch.setattr(ls.S3JSONLReader, "detect_source", staticmethod(lambda key: "wunderground"))
+
+    tracker = FakeTracker()
+    with pytest.raises(RuntimeError):
+        ingest_file_to_staging(
+            "Ichtegem_2025.jsonl", FakeReader([wunderground_record("1:04 AM")]), fake_mongo, tracker,
+            fused_dq=True,
+        )
+
+    # Failed, not successful: re-ingested from scratch next time, no duplicates
+    assert tracker.success == []
+    assert tracker.failed
+    assert staging.count_documents({}) == 0
+
+
+def test_fused_dq_reuses_the_run_validator(fake_mongo, monkeypatch):
+    import loaders.load_staging as ls
+    from quality.dq_validator import DataQualityValidator
+
+    fake_mongo.get_collection(fake_mongo.settings.stations_collection).insert_one(
+        {"city": "Ichtegem", "id": "STICH"}
+    )
+    monkeypatch.setattr(ls.S3JSONLReader, "detect_source", staticmethod(lambda key: "wunderground"))
+
+    shared = DataQualityValidator(fake_mongo)
+    monkeypatch.setattr(ls, "DataQualityValidator", lambda *a, **k: pytest.fail("validator rebuilt per file"))
+
+    for key in ("Ichtegem_2025.jsonl", "Ichtegem_2026.jsonl"):
+        ingest_file_to_staging(
+            key, FakeReader([wunderground_record("1:04 AM")]), fake_mongo, FakeTracker(),
+            fused_dq=True, dq_validator=shared,
+        )
+
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    assert staging.count_documents({"dq_checked": True}) == 2
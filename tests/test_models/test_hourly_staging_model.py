@@ -29,3 +29,20 @@ def test_boundary_time():
         time_local="23:59"
     )
     assert m.time_local == "23:59"
+
+def test_to_document_is_sparse():
+    m = HourlyStagingModel(
+        id_station="ST",
+        s3_key="x",
+        source="wunderground",
+        temperature_F="50 °F",
+    )
+    doc = m.to_document()
+
+    assert doc == {
+        "id_station": "ST",
+        "s3_key": "x",
+        "source": "wunderground",
+        "dq_checked": False,
+        "temperature_F": "50 °F",
+    }
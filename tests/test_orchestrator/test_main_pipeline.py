@@ -186,3 +186,21 @@ def test_pipeline_transform_only(mock_tasks):
 def test_pipeline_load_and_metadata(mock_tasks):
     run_main(["--task", "load_metadata"])
     assert TASKS["load_metadata"].called
+
+
+# --------------------------------------------------------------------
+# 6) Callback payload
+# --------------------------------------------------------------------
+
+def test_build_output_partial_failure():
+    result = {"ingestion": {"ingested": ["a"], "skipped": [], "failed": [{"s3_key": "b"}]}}
+
+    out = orchestrator.build_output("ingest_all_staging", result)
+
+    assert out["status"] == "partial_failure"
+    assert out["result"] == result
+
+
+def test_build_output_without_result():
+    out = orchestrator.build_output("transform", None)
+    assert out == {"task": "transform", "status": "success"}
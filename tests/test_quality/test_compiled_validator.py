@@ -0,0 +1,142 @@
+"""
+Parity between the pandera schemas (reference) and the compiled
+pure-Python validator: same invalid rows, same check codes.
+"""
+import random
+from datetime import datetime
+
+import pytest
+
+from quality.compiled_validator import CompiledSchema
+from quality.dq_failures import check_code
+from quality.dq_validator import COMPILED, SCHEMAS, DataQualityValidator
+
+
+@pytest.fixture
+def reference():
+    dq = DataQualityValidator.__new__(DataQualityValidator)
+    dq.engine = "pandera"
+    return dq
+
+
+# -------------------------------------------------------------------
+# Generated rows (string / None values only: no whole-column dtype
+# failure, so pandera validates the batch in one frame)
+# -------------------------------------------------------------------
+
+POOLS = {
+    "infoclimat": {
+        "temperature_C": ["10", "-4.5", "75", "-61", "abc", "", None],
+        "pression_hPa": ["1013.2", "849", "1101", None],
+        "humidite_pct": ["50", "101", "0", None],
+        "point_de_rosee_C": ["5", "70", None],
+        "vent_moyen_kmh": ["10", "20", "", None],
+        "vent_rafales_kmh": ["15", "5", "", None],
+        "visibilite_m": ["10000", "-1", None],
+        "neige_au_sol_cm": ["0", "-2", None],
+        "nebulosite_okta": ["0", "8", "9", "5.5", " 3 ", "x", "", None],
+        "vent_direction_deg": ["180", "361", "0", None],
+        "pluie_3h_mm": ["1", "-0.5", None],
+        "pluie_1h_mm": ["0", None],
+        "temps_omm_code": ["SKC", "61", None],
+    },
+    "wunderground": {
+        "time_local": ["12:04 AM", "1:04 AM", "2:04 AM", None],
+        "temperature_F": ["50 °F", "141 °F", "-101 °F", "°F", None],
+        "dew_point_F": ["40 °F", "96 °F", None],
+        "humidite_pct": ["50 %", "101 %", None],
+        "pressure_inHg": ["29.92 in", "20.00 in", "35.00 in", None],
+        "wind_speed_mph": ["5 mph", "12 mph", "", None],
+        "wind_gust_mph": ["10 mph", "3 mph", "", None],
+        "precip_rate_in": ["0.00 in", None],
+        "uv_index": ["1", None],
+        "solar_wm2": ["12.0 w/m²", None],
+        "wind_direction_text": ["WSW", "North", "Calm", "", None],
+    },
+}
+
+
+def make_row(rng, source, i):
+    row = {"_id": i, "s3_key": rng.choice(["k", "k", None]), "id_station": rng.choice(["A", "B", None])}
+
+    if source == "infoclimat":
+        row["dh_utc"] = rng.choice([datetime(2024, 1, 1, h) for h in range(3)] + [None])
+
+    for field, pool in POOLS[source].items():
+        if rng.random() < 0.8:   # sparse: some fields absent
+            row[field] = rng.choice(pool)
+
+    # Half the rows carry ingest-time typed values
+    if rng.random() < 0.5:
+        from ingest.numeric_values import extract_numeric
+        row["num"] = extract_numeric(row) or None
+
+    return row
+
+
+def codes_by_row(failures):
+    return {
+        pos: sorted({check_code(f.get("column"), f.get("check")) for f in fs})
+        for pos, fs in failures.items()
+    }
+
+
+# -------------------------------------------------------------------
+# Parity
+# -------------------------------------------------------------------
+
+@pytest.mark.parametrize("source", ["infoclimat", "wunderground"])
+@pytest.mark.parametrize("seed", range(6))
+def test_parity_generated_batches(reference, source, seed):
+    rng = random.Random(seed)
+    rows = [make_row(rng, source, i) for i in range(rng.randint(1, 40))]
+
+    expected = reference.validate_rows(rows, source)
+    actual = COMPILED[source].validate_rows(rows)
+
+    assert codes_by_row(actual) == codes_by_row(expected)
+
+
+@pytest.mark.parametrize(
+    "source,row",
+    [
+        ("infoclimat", {"dh_utc": "2024-01-01 00:00:00", "temperature_C": "10"}),
+        ("infoclimat", {"dh_utc": datetime(2024, 1, 1), "temperature_C": 10}),
+        ("infoclimat", {"dh_utc": datetime(2024, 1, 1), "nebulosite_okta": 4}),
+        ("infoclimat", {"dh_utc": datetime(2024, 1, 1), "temperature_C": float("nan")}),
+        ("wunderground", {"id_station": "A", "s3_key": "k", "wind_direction_text": 7}),
+        ("wunderground", {"id_station": "A", "s3_key": "k", "temperature_F": 200.0}),
+        ("wunderground", {"id_station": 3, "s3_key": "k"}),
+    ],
+)
+def test_parity_wrong_types(reference, source, row):
+    rows = [{"_id": 0, **row}]
+
+    expected = reference.validate_rows(rows, source)
+    actual = COMPILED[source].validate_rows(rows)
+
+    assert codes_by_row(actual) == codes_by_row(expected)
+
+
+def test_unknown_custom_check_is_rejected():
+    import pandera.pandas as pa
+
+    schema = pa.DataFrameSchema(
+        {"x": pa.Column(str, checks=pa.Check(lambda s: s != "", error="x must not be empty"))}
+    )
+    with pytest.raises(ValueError):
+        CompiledSchema(schema, ("x",))
+
+
+def test_dq_engine_compiled(fake_mongo):
+    dq = DataQualityValidator(fake_mongo, engine="compiled")
+    rows = [
+        {"_id": 1, "s3_key": "k", "id_station": "A", "time_local": "1:04 AM",
+         "wind_speed_mph": "5 mph", "wind_gust_mph": "10 mph"},
+        {"_id": 2, "s3_key": "k", "id_station": "A", "time_local": "1:04 AM",
+         "wind_speed_mph": "5 mph", "wind_gust_mph": "10 mph"},
+    ]
+    assert set(dq.validate_rows(rows, "wunderground")) == {0, 1}
+
+    with pytest.raises(ValueError):
+        DataQualityValidator(fake_mongo, engine="nope")
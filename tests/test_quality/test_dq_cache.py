@@ -0,0 +1,208 @@
+import pytest
+from datetime import datetime
+
+from quality.dq_cache import VerdictCache, row_hash, schema_version
+from quality.dq_validator import DataQualityValidator, projection
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+
+def infoclimat_rows(s3_key, temperatures):
+    return [
+        {
+            "s3_key": s3_key,
+            "id_station": "ST01",
+            "dh_utc": datetime(2024, 1, 1, hour),
+            "temperature_C": temp,
+        }
+        for hour, temp in enumerate(temperatures)
+    ]
+
+
+@pytest.fixture
+def cache(fake_mongo):
+    return VerdictCache(fake_mongo.get_collection("dq_verdict_cache"))
+
+
+@pytest.fixture
+def dq(fake_mongo, cache):
+    return DataQualityValidator(fake_mongo, cache=cache)
+
+
+def verdicts(fake_mongo, s3_key):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    return [
+        (doc["dq_checked"], doc.get("dq_errors"))
+        for doc in staging.find({"s3_key": s3_key}, sort=[("dh_utc", 1)])
+    ]
+
+
+def count_validations(dq, monkeypatch):
+    calls = []
+    original = dq.validate_rows
+
+    def spy(rows, source):
+        calls.append(len(rows))
+        return original(rows, source)
+
+    monkeypatch.setattr(dq, "validate_rows", spy)
+    return calls
+
+
+# -------------------------------------------------------------------
+# Keys
+# -------------------------------------------------------------------
+
+def test_row_hash_ignores_id_and_unread_fields():
+    fields = projection("infoclimat")
+    row = infoclimat_rows("k", ["10"])[0]
+
+    assert row_hash({**row, "_id": 1, "ingested_at": 1}, fields) == row_hash(row, fields)
+    assert row_hash({**row, "temperature_C": "11"}, fields) != row_hash(row, fields)
+
+
+def test_schema_version_is_stable_per_source():
+    assert schema_version("infoclimat") == schema_version("infoclimat")
+    assert schema_version("infoclimat") != schema_version("wunderground")
+
+
+def test_schema_version_covers_engine_and_pandera(monkeypatch):
+    import pandera
+    import quality.dq_cache as dq_cache
+
+    pandera_key = schema_version("infoclimat")
+    assert schema_version("infoclimat", "compiled") != pandera_key
+
+    monkeypatch.setattr(pandera, "__version__", "0.0.0")
+    assert schema_version("infoclimat") != pandera_key
+    monkeypatch.undo()
+
+    # Compiled validator source changed
+    original = dq_cache.inspect.getsource
+    monkeypatch.setattr(
+        dq_cache.inspect, "getsource",
+        lambda module: original(module) + ("#" if module.__name__ == "quality.compiled_validator" else ""),
+    )
+    assert schema_version("infoclimat") != pandera_key
+
+
+def test_validator_cache_follows_engine(fake_mongo, monkeypatch):
+    monkeypatch.setenv("DQ_VERDICT_CACHE", "true")
+
+    pandera_dq = DataQualityValidator(fake_mongo, engine="pandera")
+    compiled_dq = DataQualityValidator(fake_mongo, engine="compiled")
+
+    assert compiled_dq.cache.engine == "compiled"
+    assert compiled_dq.cache.versions["infoclimat"] != pandera_dq.cache.versions["infoclimat"]
+
+
+# -------------------------------------------------------------------
+# Re-ingested file
+# -------------------------------------------------------------------
+
+def test_reingested_rows_reuse_cached_verdicts(dq, fake_mongo, cache, monkeypatch):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    staging.insert_many(infoclimat_rows("infoclimat_a.jsonl", ["10", "99", "12"]))
+
+    first = dq.validate_file("infoclimat_a.jsonl", "infoclimat")
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # Same rows again (Airbyte re-sync) → no schema validation at all
+    calls = count_validations(dq, monkeypatch)
+    staging.insert_many(infoclimat_rows("infoclimat_b.jsonl", ["10", "99", "12"]))
+    second = dq.validate_file("infoclimat_b.jsonl", "infoclimat")
+
+    assert calls == []
+    assert cache.hits == 3
+    assert second["invalid_rows"] == first["invalid_rows"] == 1
+    assert second["failures"][0]["check"] == "temperature_C:in_range"
+    assert verdicts(fake_mongo, "infoclimat_b.jsonl") == [
+        (True, None),
+        (False, ["temperature_C:in_range"]),
+        (True, None),
+    ]
+
+
+def test_only_changed_rows_are_validated(dq, fake_mongo, monkeypatch):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    staging.insert_many(infoclimat_rows("infoclimat_a.jsonl", ["10", "11", "12"]))
+    dq.validate_file("infoclimat_a.jsonl", "infoclimat")
+
+    calls = count_validations(dq, monkeypatch)
+    staging.insert_many(infoclimat_rows("infoclimat_b.jsonl", ["10", "11", "13"]))
+    dq.validate_file("infoclimat_b.jsonl", "infoclimat")
+
+    assert calls == [1]
+
+
+def test_uniqueness_is_never_served_from_cache(dq, fake_mongo):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    staging.insert_many(infoclimat_rows("infoclimat_a.jsonl", ["10"]))
+    dq.validate_file("infoclimat_a.jsonl", "infoclimat")
+
+    # The cached row is valid on its own, but duplicated in this file
+    staging.insert_many(infoclimat_rows("infoclimat_b.jsonl", ["10"]) + infoclimat_rows("infoclimat_b.jsonl", ["10"]))
+    result = dq.validate_file("infoclimat_b.jsonl", "infoclimat")
+
+    assert result["invalid_rows"] == 2
+    assert verdicts(fake_mongo, "infoclimat_b.jsonl") == [(False, ["unique"])] * 2
+
+
+def test_cached_path_matches_uncached_verdicts(fake_mongo, cache):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    rows = infoclimat_rows("infoclimat_a.jsonl", ["10", "99", None, "abc"])
+    rows.append(dict(rows[0]))     # duplicate key
+    rows[2]["dh_utc"] = None       # not nullable
+    staging.insert_many(rows)
+
+    plain = DataQualityValidator(fake_mongo).check_file("infoclimat_a.jsonl", "infoclimat")
+    expected = verdicts(fake_mongo, "infoclimat_a.jsonl")
+
+    cached = DataQualityValidator(fake_mongo, cache=cache)
+    for _ in range(2):   # cold, then warm
+        result = cached.check_file("infoclimat_a.jsonl", "infoclimat")
+        assert result["invalid_rows"] == plain["invalid_rows"]
+        assert verdicts(fake_mongo, "infoclimat_a.jsonl") == expected
+
+
+# -------------------------------------------------------------------
+# Invalidation / eviction
+# -------------------------------------------------------------------
+
+def test_schema_change_invalidates_cache(dq, fake_mongo, cache, monkeypatch):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    staging.insert_many(infoclimat_rows("infoclimat_a.jsonl", ["10"]))
+    dq.validate_file("infoclimat_a.jsonl", "infoclimat")
+
+    monkeypatch.setitem(cache.versions, "infoclimat", "new-schema")
+    calls = count_validations(dq, monkeypatch)
+    dq.validate_file("infoclimat_a.jsonl", "infoclimat")
+
+    assert calls == [1]
+    assert cache.purge_stale_versions() == 1
+    assert cache.collection.count_documents({}) == 1
+
+
+def test_purge_keeps_other_engine_entries(dq, fake_mongo, cache):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    staging.insert_many(infoclimat_rows("infoclimat_a.jsonl", ["10"]))
+    dq.validate_file("infoclimat_a.jsonl", "infoclimat")
+
+    compiled = VerdictCache(cache.collection, engine="compiled")
+    assert compiled.purge_stale_versions() == 0
+    assert cache.collection.count_documents({"engine": "pandera"}) == 1
+
+
+def test_ttl_index_and_from_env(fake_mongo, cache, monkeypatch):
+    indexes = cache.collection.index_information()
+    assert any(ix.get("expireAfterSeconds") == 30 * 86400 for ix in indexes.values())
+
+    monkeypatch.delenv("DQ_VERDICT_CACHE", raising=False)
+    assert VerdictCache.from_env(fake_mongo.get_database()) is None
+
+    monkeypatch.setenv("DQ_VERDICT_CACHE", "true")
+    monkeypatch.setenv("DQ_CACHE_COLLECTION", "dq_cache_7d")
+    monkeypatch.setenv("DQ_CACHE_TTL_DAYS", "7")
+    assert VerdictCache.from_env(fake_mongo.get_database()).ttl_days == 7
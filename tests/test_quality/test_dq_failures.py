@@ -0,0 +1,38 @@
+import numpy as np
+
+from quality.dq_failures import FailureSummary, check_code, to_bson_value
+
+
+def test_check_code():
+    assert check_code("num__temperature_F", "in_range(-100, 140)") == "temperature_F:in_range"
+    assert check_code("dh_utc", "not_nullable") == "dh_utc:not_nullable"
+    assert check_code("temperature_C", "dtype('str')") == "temperature_C:dtype"
+    assert check_code(None, "Rows must be unique for (id_station, dh_utc)") == "unique"
+    assert check_code(None, "wind_gust_mph must be >= wind_speed_mph") == "gust_lt_mean"
+    assert check_code("nebulosite_okta", "nebulosite_okta must be an integer") == "nebulosite_okta:custom"
+
+
+def test_to_bson_value():
+    assert to_bson_value(np.float64(1.5)) == 1.5
+    assert type(to_bson_value(np.int64(3))) is int
+    assert to_bson_value(float("nan")) is None
+    assert to_bson_value(("a", 1)) == "('a', 1)"
+
+
+def test_failure_summary_counts_and_samples():
+    summary = FailureSummary(max_samples=2)
+    range_failure = {"column": "num__temperature_F", "check": "in_range(-100, 140)", "failure_case": 500.0}
+
+    for row_id in range(3):
+        codes = summary.add(row_id, [range_failure, range_failure])
+    summary.add(9, [{"column": None, "check": "Rows must be unique for (...)"}])
+
+    assert codes == ["temperature_F:in_range"]
+    assert summary.to_documents() == [
+        {
+            "check": "temperature_F:in_range",
+            "count": 3,
+            "samples": [{"row_id": 0, "value": 500.0}, {"row_id": 1, "value": 500.0}],
+        },
+        {"check": "unique", "count": 1, "samples": [{"row_id": 9, "value": None}]},
+    ]
@@ -0,0 +1,180 @@
+import pytest
+from datetime import datetime, timedelta
+
+from quality.dq_sampling import SamplingConfig, wilson_interval
+from quality.dq_validator import DataQualityValidator
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+
+S3_KEY = "InfoClimat/backfill_2019.jsonl"
+
+
+def load_file(fake_mongo, rows, bad_every=None):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    start = datetime(2019, 1, 1)
+    staging.insert_many([
+        {
+            "s3_key": S3_KEY,
+            "id_station": "ST01",
+            "dh_utc": start + timedelta(hours=i),
+            "temperature_C": "99" if bad_every and i % bad_every == 0 else "10",
+            "dq_checked": False,
+        }
+        for i in range(rows)
+    ])
+    fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).insert_one(
+        {"s3_key": S3_KEY, "success": True}
+    )
+    return staging
+
+
+def count_validated(dq, monkeypatch):
+    rows = []
+    original = dq.validate_rows
+
+    def spy(chunk, source):
+        rows.append(len(chunk))
+        return original(chunk, source)
+
+    monkeypatch.setattr(dq, "validate_rows", spy)
+    return rows
+
+
+# -------------------------------------------------------------------
+# Config / bounds
+# -------------------------------------------------------------------
+
+def test_wilson_interval():
+    low, high = wilson_interval(0, 100)
+    assert low == 0.0 and 0.03 < high < 0.04
+
+    low, high = wilson_interval(10, 100)
+    assert low < 0.1 < high
+
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_sampling_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("DQ_SAMPLE_FRACTION", raising=False)
+    assert SamplingConfig.from_env() is None
+
+    monkeypatch.setenv("DQ_SAMPLE_FRACTION", "0.05")
+    monkeypatch.setenv("DQ_SAMPLE_SOURCES", "infoclimat, wunderground")
+    config = SamplingConfig.from_env()
+    assert config.fraction == 0.05
+    assert config.sources == ("infoclimat", "wunderground")
+
+
+def test_sample_size():
+    config = SamplingConfig(fraction=0.1, min_rows=100, max_failure_rate=0.05)
+    assert config.sample_size(10_000) == 1000
+    assert config.sample_size(500) == 100       # min_rows
+    assert config.sample_size(100) is None
+
+
+def test_sample_size_allows_accepting_a_clean_file():
+    config = SamplingConfig(fraction=0.01, min_rows=100)   # max_failure_rate=0.001
+    size = config.sample_size(100_000)
+
+    assert size == config.min_acceptable_rows() == 3838
+    assert wilson_interval(0, size, config.z)[1] <= config.max_failure_rate
+    assert wilson_interval(0, size - 1, config.z)[1] > config.max_failure_rate
+    assert config.sample_size(3000) is None
+
+    # Floors documented in SamplingConfig.from_env
+    floors = [SamplingConfig(fraction=0.1, max_failure_rate=r).min_acceptable_rows() for r in (0.01, 0.05)]
+    assert floors == [381, 73]
+
+
+def test_small_sample_with_one_failure_escalates():
+    config = SamplingConfig(fraction=0.1, min_rows=50, max_failure_rate=0.05)
+
+    decision = config.decide(failed_rows=1, sampled_rows=50, total_rows=1000)
+
+    assert decision["failure_rate"] == 0.02 < config.max_failure_rate
+    assert decision["ci_high"] > config.max_failure_rate
+    assert decision["escalated"] is True
+
+    assert config.decide(failed_rows=0, sampled_rows=100, total_rows=1000)["escalated"] is False
+
+
+# -------------------------------------------------------------------
+# Sampled validation
+# -------------------------------------------------------------------
+
+def test_clean_file_is_accepted_from_a_sample(fake_mongo, monkeypatch):
+    staging = load_file(fake_mongo, 1000)
+    dq = DataQualityValidator(
+        fake_mongo, sampling=SamplingConfig(fraction=0.1, min_rows=50, max_failure_rate=0.05)
+    )
+    validated = count_validated(dq, monkeypatch)
+
+    result = dq.validate_file(S3_KEY, "infoclimat")
+
+    assert sum(validated) == 100
+    assert result["dq_validated"] is True
+    assert staging.count_documents({"dq_checked": True}) == 1000
+
+    tracker = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+    doc = tracker.find_one({"s3_key": S3_KEY})
+    assert doc["dq_rows"] == 1000                # whole file, not the sample
+    sampling = doc["dq_sampling"]
+    assert sampling["sampled_rows"] == 100
+    assert sampling["total_rows"] == 1000
+    assert sampling["escalated"] is False
+    assert sampling["ci_low"] == 0.0 and 0 < sampling["ci_high"] < 0.05
+
+
+def test_dirty_sample_escalates_to_full_validation(fake_mongo, monkeypatch):
+    staging = load_file(fake_mongo, 1000, bad_every=10)
+    dq = DataQualityValidator(
+        fake_mongo, sampling=SamplingConfig(fraction=0.1, min_rows=50, max_failure_rate=0.05)
+    )
+    validated = count_validated(dq, monkeypatch)
+
+    result = dq.validate_file(S3_KEY, "infoclimat")
+
+    assert sum(validated) == 100 + 1000
+    assert result["invalid_rows"] == 100
+    assert staging.count_documents({"dq_checked": False, "dq_errors": "temperature_C:in_range"}) == 100
+    assert staging.count_documents({"dq_checked": True}) == 900
+
+    tracker = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+    sampling = tracker.find_one({"s3_key": S3_KEY})["dq_sampling"]
+    # The sample is random: only check what holds for any failing sample
+    assert sampling["escalated"] is True
+    assert sampling["failed_rows"] > 0
+    assert sampling["ci_low"] <= sampling["failure_rate"] <= sampling["ci_high"]
+    assert sampling["ci_high"] > sampling["max_failure_rate"]
+
+
+def test_sampled_invalid_rows_keep_their_verdict(fake_mongo):
+    staging = load_file(fake_mongo, 1000, bad_every=100)
+    dq = DataQualityValidator(
+        fake_mongo, sampling=SamplingConfig(fraction=0.5, min_rows=50, max_failure_rate=0.5)
+    )
+
+    result = dq.validate_file(S3_KEY, "infoclimat")
+
+    assert result["sampling"]["escalated"] is False
+    assert result["dq_validated"] is (result["invalid_rows"] == 0)
+    assert staging.count_documents({"dq_checked": False}) == result["invalid_rows"]
+
+
+@pytest.mark.parametrize(
+    "sampling",
+    [None, SamplingConfig(fraction=0.1, min_rows=50, sources=("wunderground",))],
+)
+def test_full_validation_without_sampling(fake_mongo, monkeypatch, sampling):
+    load_file(fake_mongo, 200)
+    monkeypatch.delenv("DQ_SAMPLE_FRACTION", raising=False)
+    dq = DataQualityValidator(fake_mongo, sampling=sampling)
+    validated = count_validated(dq, monkeypatch)
+
+    result = dq.validate_file(S3_KEY, "infoclimat")
+
+    assert sum(validated) == 200
+    assert "sampling" not in result
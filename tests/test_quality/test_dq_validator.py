@@ -234,3 +234,359 @@ def test_validate_file_no_staging(dq, fake_mongo, caplog):
     # Should not throw exceptions, simply log warning
     file_rec = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).find_one({})
     assert file_rec.get("dq_validated") in (None, False)
+
+
+# -------------------------------------------------------------------
+# Sparse staging documents (absent fields not stored)
+# -------------------------------------------------------------------
+
+def test_validate_file_sparse_wunderground_row(dq, fake_mongo):
+    fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).insert_one(
+        {"s3_key": "wunderground_sparse.jsonl", "success": True}
+    )
+
+    # Only a handful of fields present, no InfoClimat fields at all
+    fake_mongo.get_collection(fake_mongo.settings.staging_collection).insert_one({
+        "s3_key": "wunderground_sparse.jsonl",
+        "source": "wunderground",
+        "id_station": "ST01",
+        "time_local": "12:04 AM",
+        "temperature_F": "50 °F",
+        "wind_speed_mph": "5 mph",
+        "wind_gust_mph": "10 mph",
+    })
+
+    dq.validate_file("wunderground_sparse.jsonl", "wunderground")
+
+    row = fake_mongo.get_collection(fake_mongo.settings.staging_collection).find_one({})
+    assert row["dq_checked"] is True
+
+
+# -------------------------------------------------------------------
+# Typed values parsed at ingest ("num" sub-document)
+# -------------------------------------------------------------------
+
+def test_validate_file_uses_typed_values(dq, fake_mongo):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).insert_one(
+        {"s3_key": "wunderground_num.jsonl", "success": True}
+    )
+
+    base = {
+        "s3_key": "wunderground_num.jsonl",
+        "source": "wunderground",
+        "id_station": "ST01",
+        "temperature_F": "50 °F",
+        "wind_speed_mph": "5 mph",
+        "wind_gust_mph": "10 mph",
+    }
+    wind = {"wind_speed_mph": 5.0, "wind_gust_mph": 10.0}
+    staging.insert_one({**base, "time_local": "12:04 AM", "num": {"temperature_F": 50.0, **wind}})
+    # Range checks read the typed value: 500 °F is out of range
+    staging.insert_one({**base, "time_local": "1:04 AM", "num": {"temperature_F": 500.0, **wind}})
+
+    dq.validate_file("wunderground_num.jsonl", "wunderground")
+
+    rows = {r["time_local"]: r for r in staging.find({})}
+    assert rows["12:04 AM"]["dq_checked"] is True
+    assert rows["1:04 AM"]["error"] is True
+
+
+# -------------------------------------------------------------------
+# Whole-file validation: per-row verdicts from one schema.validate call
+# -------------------------------------------------------------------
+
+def wunderground_row(time_local, **extra):
+    return {
+        "s3_key": "wunderground_file.jsonl",
+        "id_station": "ST01",
+        "time_local": time_local,
+        "temperature_F": "50 °F",
+        "wind_speed_mph": "5 mph",
+        "wind_gust_mph": "10 mph",
+        **extra,
+    }
+
+
+def test_validate_file_whole_file_verdicts(dq, fake_mongo, monkeypatch):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).insert_one(
+        {"s3_key": "wunderground_file.jsonl", "success": True}
+    )
+
+    staging.insert_many([
+        wunderground_row("12:04 AM"),
+        wunderground_row("1:04 AM", temperature_F="500 °F"),      # out of range
+        wunderground_row("2:04 AM"),
+        wunderground_row("3:04 AM", wind_gust_mph="1 mph"),       # gust < speed
+    ])
+
+    calls = []
+    original = dq.validate_rows_individually
+    monkeypatch.setattr(dq, "validate_rows_individually", lambda *a: calls.append(a) or original(*a))
+
+    dq.validate_file("wunderground_file.jsonl", "wunderground")
+
+    verdicts = {r["time_local"]: r["dq_checked"] for r in staging.find({})}
+    assert verdicts == {"12:04 AM": True, "1:04 AM": False, "2:04 AM": True, "3:04 AM": False}
+    assert calls == []   # no row-by-row fallback needed
+
+
+def test_validate_file_flags_duplicates_across_file(dq, fake_mongo):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection).insert_one(
+        {"s3_key": "wunderground_file.jsonl", "success": True}
+    )
+
+    staging.insert_many([
+        wunderground_row("12:04 AM"),
+        wunderground_row("12:04 AM"),
+        wunderground_row("1:04 AM"),
+    ])
+
+    dq.validate_file("wunderground_file.jsonl", "wunderground")
+
+    assert staging.count_documents({"time_local": "12:04 AM", "error": True}) == 2
+    assert staging.find_one({"time_local": "1:04 AM"})["dq_checked"] is True
+
+    file_rec = fake_mongo.get_collection(
+        fake_mongo.settings.ingestion_tracker_collection
+    ).find_one({"s3_key": "wunderground_file.jsonl"})
+    assert file_rec["dq_validated"] is False
+
+
+def test_raw_value_formats_are_not_checked(dq):
+    rows = [
+        {"dh_utc": datetime(2024, 1, 1, h), "id_station": "IC001", "temperature_C": raw}
+        for h, raw in enumerate(["12.5", "", None, "1.2.3", "12 °C"])
+    ]
+
+    # regex= only selects columns by name: malformed values are not failures
+    # (they parse to null and skip the range checks)
+    assert dq.validate_rows(rows, "infoclimat") == {}
+
+
+def test_validate_rows_falls_back_on_frame_level_failure(dq):
+    # temperature_F given as numbers for every row → int64 column,
+    # dtype failure cannot be mapped to a row
+    rows = [wunderground_row("12:04 AM", temperature_F=50), wunderground_row("1:04 AM")]
+    rows[1]["temperature_F"] = 51
+
+    failures = dq.validate_rows(rows, "wunderground")
+    assert set(failures) == {0, 1}
+
+
+# -------------------------------------------------------------------
+# Bulk verdict writes
+# -------------------------------------------------------------------
+
+def test_write_verdicts_batches_update_many(fake_mongo):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    ids = staging.insert_many([{"s3_key": "k", "n": i} for i in range(5)]).inserted_ids
+
+    dq = DataQualityValidator(fake_mongo, write_batch_size=2)
+    round_trips = dq.write_verdicts(ids[:3], ids[3:])
+
+    assert round_trips == 3   # 2 batches of valid ids + 1 batch of invalid ids
+    assert staging.count_documents({"dq_checked": True, "error": None}) == 3
+    assert staging.count_documents({"dq_checked": False, "error": True}) == 2
+
+
+def test_validate_file_no_per_row_updates(dq, fake_mongo, monkeypatch):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    staging.insert_many([wunderground_row(f"{h}:04 AM") for h in range(1, 11)])
+
+    monkeypatch.setattr(
+        dq.staging, "update_one",
+        lambda *a, **k: pytest.fail("per-row update_one must not be used"),
+        raising=False,
+    )
+
+    dq.validate_file("wunderground_file.jsonl", "wunderground")
+
+    assert staging.count_documents({"dq_checked": True}) == 10
+
+
+# -------------------------------------------------------------------
+# Parallel DQ across files
+# -------------------------------------------------------------------
+
+def test_run_parallel_combines_file_results(dq, fake_mongo, monkeypatch):
+    """
+    The process pool is replaced by threads sharing the fake Mongo:
+    workers only write row verdicts, the parent writes the tracker.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import quality.dq_validator as dq_module
+
+    class ThreadPool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+            super().__init__(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+    monkeypatch.setattr(dq_module, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(dq_module, "_init_worker", lambda config: setattr(dq_module, "_WORKER", dq))
+
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    tracker = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+
+    for name, temp in (("a", "50 °F"), ("b", "500 °F"), ("c", "51 °F")):
+        key = f"wunderground_{name}.jsonl"
+        tracker.insert_one({"s3_key": key, "success": True})
+        staging.insert_one({**wunderground_row("12:04 AM", temperature_F=temp), "s3_key": key})
+
+    dq.run(workers=3)
+
+    verdicts = {d["s3_key"]: d["dq_validated"] for d in tracker.find({})}
+    assert verdicts == {
+        "wunderground_a.jsonl": True,
+        "wunderground_b.jsonl": False,
+        "wunderground_c.jsonl": True,
+    }
+    assert staging.count_documents({"dq_checked": True}) == 2
+
+
+def test_pool_workers_inherit_validator_settings(fake_mongo, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    import quality.dq_validator as dq_module
+    from quality.dq_cache import VerdictCache
+    from quality.dq_sampling import SamplingConfig
+
+    class ThreadPool(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+            super().__init__(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+    class Client:
+        def __init__(self, settings):
+            self.settings = fake_mongo.settings
+
+        def connect(self):
+            pass
+
+        def close(self):
+            pass
+
+        def get_database(self):
+            return fake_mongo.get_database()
+
+    monkeypatch.setattr(dq_module, "ProcessPoolExecutor", ThreadPool)
+    monkeypatch.setattr(dq_module.MongoSettings, "from_env", classmethod(lambda cls: None))
+    monkeypatch.setattr(dq_module, "MongoDBClient", Client)
+    monkeypatch.setattr(dq_module, "_WORKER", None)
+    # The environment says otherwise: settings must come from the parent
+    monkeypatch.setenv("DQ_CHUNK_SIZE", "10000")
+    monkeypatch.setenv("DQ_SAMPLE_FRACTION", "1")
+
+    parent = DataQualityValidator(
+        fake_mongo,
+        chunk_size=7,
+        write_batch_size=3,
+        engine="compiled",
+        cache=VerdictCache(fake_mongo.get_database()["dq_cache_pool"], ttl_days=5, engine="compiled"),
+        sampling=SamplingConfig(fraction=0.2, min_rows=10),
+    )
+    parent.run_parallel([("wunderground_a.jsonl", "wunderground"), ("wunderground_b.jsonl", "wunderground")], 2)
+
+    worker = dq_module._WORKER
+    assert worker is not parent
+    assert (worker.chunk_size, worker.write_batch_size, worker.engine) == (7, 3, "compiled")
+    assert worker.cache.collection.name == "dq_cache_pool" and worker.cache.ttl_days == 5
+    assert worker.cache.versions == parent.cache.versions
+    assert worker.sampling == parent.sampling
+
+
+# -------------------------------------------------------------------
+# Chunked, projected streaming
+# -------------------------------------------------------------------
+
+def test_projection_limited_to_schema_fields():
+    from quality.dq_validator import projection
+
+    fields = projection("wunderground")
+    assert {"temperature_F", "time_local", "id_station", "num"} <= set(fields)
+    assert "ingested_at" not in fields and "source" not in fields
+    assert not any(f.startswith("num__") for f in fields)
+
+
+def test_validate_file_chunks_carry_uniqueness(fake_mongo):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    tracker = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+    tracker.insert_one({"s3_key": "wunderground_file.jsonl", "success": True})
+
+    # chunk_size=2 → chunks [1, 2] [3, 1(dup)] [4]
+    staging.insert_many([
+        wunderground_row("1:04 AM"),
+        wunderground_row("2:04 AM"),
+        wunderground_row("3:04 AM"),
+        wunderground_row("1:04 AM"),
+        wunderground_row("4:04 AM"),
+    ])
+
+    dq = DataQualityValidator(fake_mongo, chunk_size=2)
+    chunks = []
+    original = dq.validate_rows
+    dq.validate_rows = lambda rows, source: chunks.append(len(rows)) or original(rows, source)
+
+    result = dq.validate_file("wunderground_file.jsonl", "wunderground")
+
+    assert chunks == [2, 2, 1]
+    assert result["rows"] == 5 and result["invalid_rows"] == 2
+    # Both rows of the duplicated key are invalid, even across chunks
+    assert staging.count_documents({"time_local": "1:04 AM", "error": True}) == 2
+    assert staging.count_documents({"dq_checked": True}) == 3
+    assert tracker.find_one({})["dq_validated"] is False
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 10])
+def test_duplicate_failing_another_check_across_chunks(fake_mongo, chunk_size):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    tracker = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+    tracker.insert_one({"s3_key": "wunderground_file.jsonl", "success": True})
+
+    # The later copy of 1:04 AM is also out of range
+    staging.insert_many([
+        wunderground_row("1:04 AM"),
+        wunderground_row("2:04 AM"),
+        wunderground_row("1:04 AM", temperature_F="500 °F"),
+    ])
+
+    result = DataQualityValidator(fake_mongo, chunk_size=chunk_size).validate_file(
+        "wunderground_file.jsonl", "wunderground"
+    )
+
+    # Same verdicts wherever the chunks split
+    assert result["invalid_rows"] == 2
+    assert staging.count_documents({"time_local": "1:04 AM", "error": True}) == 2
+    assert staging.find_one({"time_local": "2:04 AM"})["dq_checked"] is True
+    late = staging.find_one({"time_local": "1:04 AM", "temperature_F": "500 °F"})
+    assert set(late["dq_errors"]) == {"temperature_F:in_range", "unique"}
+
+
+# -------------------------------------------------------------------
+# Compact failure summaries
+# -------------------------------------------------------------------
+
+def test_validate_file_stores_failure_summary(dq, fake_mongo):
+    staging = fake_mongo.get_collection(fake_mongo.settings.staging_collection)
+    tracker = fake_mongo.get_collection(fake_mongo.settings.ingestion_tracker_collection)
+    tracker.insert_one({"s3_key": "wunderground_file.jsonl", "success": True})
+
+    staging.insert_many([
+        wunderground_row("1:04 AM", temperature_F="500 °F"),
+        wunderground_row("2:04 AM", temperature_F="600 °F"),
+        wunderground_row("3:04 AM"),
+    ])
+
+    dq.validate_file("wunderground_file.jsonl", "wunderground")
+
+    bad = staging.find_one({"time_local": "1:04 AM"})
+    assert bad["dq_errors"] == ["temperature_F:in_range"]
+    assert "dq_errors" not in staging.find_one({"time_local": "3:04 AM"})
+
+    rec = tracker.find_one({})
+    assert rec["dq_rows"] == 3 and rec["dq_invalid_rows"] == 2
+    assert rec["dq_failures"][0]["check"] == "temperature_F:in_range"
+    assert rec["dq_failures"][0]["count"] == 2
+    assert [s["value"] for s in rec["dq_failures"][0]["samples"]] == [500.0, 600.0]
+
+    # Cheap operator query, no re-validation needed
+    assert tracker.count_documents({"dq_failures.check": "temperature_F:in_range"}) == 1
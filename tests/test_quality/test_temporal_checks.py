@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+
+from quality.temporal_checks import (
+    TemporalDQ,
+    TemporalRules,
+    anomaly_codes,
+    detect_anomalies,
+)
+
+
+# -------------------------------------------------------------------
+# Helpers
+# -------------------------------------------------------------------
+
+START = datetime(2024, 1, 1)
+
+
+def series(station, temperatures, pressures=None, start=START):
+    n = len(temperatures)
+    pressures = pressures if pressures is not None else 1013 + np.sin(np.arange(n) / 5)
+    return pd.DataFrame({
+        "id_station": station,
+        "dh_utc": [start + timedelta(hours=h) for h in range(n)],
+        "temperature_C": temperatures,
+        "pression_hPa": pressures,
+    })
+
+
+def smooth(n, base=10.0):
+    # Daily cycle + small noise: never flagged
+    rng = np.random.default_rng(0)
+    return base + 5 * np.sin(np.arange(n) * 2 * np.pi / 24) + rng.normal(0, 0.2, n)
+
+
+def flagged(df, code):
+    return list(df.index[detect_anomalies(df)[code]])
+
+
+# -------------------------------------------------------------------
+# Checks
+# -------------------------------------------------------------------
+
+def test_smooth_series_has_no_flags():
+    df = series("ST01", smooth(24 * 14))
+    assert not detect_anomalies(df).to_numpy().any()
+
+
+def test_spike_against_rolling_median():
+    temps = smooth(96)
+    temps[50] += 15
+    df = series("ST01", temps)
+
+    assert flagged(df, "temperature_C:spike") == [50]
+    # A +15 °C jump in one hour is also an impossible step (in and out)
+    assert flagged(df, "temperature_C:step") == [50, 51]
+
+
+def test_flatline():
+    temps = smooth(72)
+    temps[20:35] = 7.0   # 15 identical hourly readings
+    df = series("ST01", temps)
+
+    assert flagged(df, "temperature_C:flatline") == list(range(20, 35))
+
+
+def test_flatline_breaks_on_gap_and_station():
+    df = pd.concat([
+        series("ST01", [7.0] * 8),
+        series("ST01", [7.0] * 8, start=START + timedelta(days=2)),
+        series("ST02", [7.0] * 8, start=START + timedelta(hours=8)),
+    ], ignore_index=True)
+
+    assert not detect_anomalies(df)["temperature_C:flatline"].any()
+
+
+def test_pressure_step_only_between_consecutive_hours():
+    pressures = np.full(30, 1013.0) + np.arange(30) * 0.1
+    pressures[10:] += 8          # sudden +8 hPa (max_step = 6)
+    df = series("ST01", smooth(30), pressures)
+
+    assert flagged(df, "pression_hPa:step") == [10]
+
+    # Same jump across a 5 h gap is not a one-hour step
+    df.loc[10:, "dh_utc"] += timedelta(hours=5)
+    assert flagged(df, "pression_hPa:step") == []
+
+
+def test_stations_are_independent_and_order_does_not_matter():
+    a = series("ST01", smooth(48, base=0.0))
+    b = series("ST02", smooth(48, base=30.0))
+    df = pd.concat([a, b], ignore_index=True).sample(frac=1, random_state=1)
+
+    # No step between ST01's last and ST02's first reading
+    assert not detect_anomalies(df).to_numpy().any()
+
+
+def test_nulls_are_ignored():
+    temps = smooth(48)
+    temps[[5, 6, 30]] = np.nan
+    df = series("ST01", temps)
+
+    assert not detect_anomalies(df).to_numpy().any()
+
+
+def test_anomaly_codes():
+    temps = smooth(96)
+    temps[50] += 15
+    codes = anomaly_codes(detect_anomalies(series("ST01", temps)))
+
+    assert codes.to_dict() == {
+        50: ["temperature_C:spike", "temperature_C:step"],
+        51: ["temperature_C:step"],
+    }
+
+
+def test_rules_are_configurable():
+    temps = smooth(72)
+    temps[20:26] = 7.0
+    df = series("ST01", temps)
+
+    assert not detect_anomalies(df)["temperature_C:flatline"].any()
+    assert detect_anomalies(df, TemporalRules(flatline_hours=6))["temperature_C:flatline"].sum() == 6
+
+
+# -------------------------------------------------------------------
+# Stage over hourly_measurements
+# -------------------------------------------------------------------
+
+class FinalSettings:
+    final_collection = "hourly_measurements"
+
+
+@pytest.fixture
+def final(fake_mongo):
+    fake_mongo.settings = FinalSettings()
+    return fake_mongo.get_collection("hourly_measurements")
+
+
+def test_temporal_dq_flags_final_rows(fake_mongo, final):
+    temps = smooth(96)
+    temps[50] += 15
+    final.insert_many(series("ST01", temps).to_dict("records"))
+    final.insert_many(series("ST02", smooth(96)).to_dict("records"))
+
+    flagged_rows = TemporalDQ(fake_mongo, TemporalRules()).run()
+
+    assert flagged_rows == {"ST01": 2, "ST02": 0}
+    spike = final.find_one({"dq_flags": "temperature_C:spike"})
+    assert spike["dh_utc"] == START + timedelta(hours=50)
+    assert final.count_documents({"dq_flags": {"$exists": True}}) == 2
+
+
+def test_temporal_dq_since_keeps_earlier_flags(fake_mongo, final):
+    temps = smooth(96)
+    temps[10] += 15
+    temps[80] += 15
+    final.insert_many(series("ST01", temps).to_dict("records"))
+    stage = TemporalDQ(fake_mongo, TemporalRules())
+    stage.run()
+
+    # Fix the late spike, then re-check only the last day
+    final.update_one(
+        {"dh_utc": START + timedelta(hours=80)},
+        {"$set": {"temperature_C": float(smooth(96)[80])}},
+    )
+    assert stage.run(since=START + timedelta(hours=72)) == {"ST01": 0}
+
+    remaining = [d["dh_utc"] for d in final.find({"dq_flags": {"$exists": True}})]
+    assert remaining == [START + timedelta(hours=10), START + timedelta(hours=11)]
@@ -0,0 +1,158 @@
+# tests/test_transformations/test_batch_transform.py
+
+import random
+from datetime import datetime
+
+import pytest
+
+from ingest.numeric_values import extract_numeric
+from transform.batch_transform import (
+    safe_float2_series,
+    transform_document_batch,
+    transform_infoclimat_batch,
+)
+from transform.transformations import safe_float2, transform_document, transform_infoclimat
+
+import pandas as pd
+
+
+# -------------------------------------------------------------------
+# Reference: the scalar functions, one document at a time
+# -------------------------------------------------------------------
+
+def scalar(fn, docs):
+    records, errors = [], []
+    for i, doc in enumerate(docs):
+        try:
+            records.append(fn(doc))
+        except Exception:
+            records.append(None)
+            errors.append(i)
+    return records, errors
+
+
+def assert_parity(batch_fn, scalar_fn, docs):
+    assert batch_fn(docs) == scalar(scalar_fn, docs)
+
+
+# -------------------------------------------------------------------
+# Documents of the existing transformation tests
+# -------------------------------------------------------------------
+
+INFOCLIMAT_DOCS = [
+    {
+        "id_station": "IC001",
+        "dh_utc": "2024-01-01T12:00:00Z",
+        "temperature_C": "14,2",
+        "vent_moyen_kmh": "15",
+        "nebulosite_okta": "4",
+    },
+    {"id_station": "IC001"},
+]
+
+WUNDERGROUND_DOCS = [
+    {
+        "id_station": "WU01",
+        "s3_key": "/Ichtegem_011024/",
+        "time_local": "01:30 AM",
+        "temperature_F": "50",
+        "wind_speed_mph": "10",
+    },
+]
+
+
+def test_parity_existing_infoclimat_docs():
+    assert_parity(transform_infoclimat_batch, transform_infoclimat, INFOCLIMAT_DOCS)
+
+
+def test_parity_existing_wunderground_docs():
+    assert_parity(transform_document_batch, transform_document, WUNDERGROUND_DOCS)
+
+
+def test_empty_batch():
+    assert transform_infoclimat_batch([]) == ([], [])
+    assert transform_document_batch([]) == ([], [])
+
+
+# -------------------------------------------------------------------
+# Generated staging documents
+# -------------------------------------------------------------------
+
+NUMBERS = ["12.4", "12,4", " 14.02 ", "▓13.5", "-5.2", "- 5.2", "12W/m2", "1.2.3",
+           "abc", "", "-", "0", "1013.2 hPa", "50 °F", "29.92 in", "10 mph", None]
+
+
+def infoclimat_doc(rng):
+    doc = {
+        "id_station": rng.choice(["IC001", "IC002"]),
+        "dh_utc": datetime(2024, 1, 1, rng.randint(0, 23)),
+        "s3_key": "InfoClimat/2024.jsonl",
+        "nebulosite_okta": rng.choice(["4", "8", " 3 ", "x", "-1", "", None]),
+        "temps_omm_code": rng.choice(["61", "SKC", "", None]),
+    }
+    for field in ("temperature_C", "pression_hPa", "humidite_pct", "point_de_rosee_C",
+                  "visibilite_m", "vent_moyen_kmh", "vent_rafales_kmh", "vent_direction_deg",
+                  "pluie_3h_mm", "pluie_1h_mm", "neige_au_sol_cm", "uv_index", "solar_wm2"):
+        if rng.random() < 0.8:
+            doc[field] = rng.choice(NUMBERS)
+    if rng.random() < 0.5:
+        doc["num"] = extract_numeric(doc) or None
+    return doc
+
+
+def wunderground_doc(rng):
+    doc = {
+        "id_station": "ILAMAD25",
+        "s3_key": rng.choice([
+            "dataset_meteo/La_Madeleine_011024/a.jsonl",
+            "dataset_meteo/Ichtegem_290324/b.jsonl",   # DST day in Paris
+            "no_date/c.jsonl",
+        ]),
+        "time_local": rng.choice(["12:04 AM", "2:30 AM", "11:59 PM", "13:00", "BAD", "", None]),
+        "wind_direction_text": rng.choice(["WSW", "North", "Calm", "", "0", None]),
+    }
+    for field in ("temperature_F", "dew_point_F", "humidity_pct", "wind_speed_mph",
+                  "wind_gust_mph", "pressure_inHg", "precip_rate_in", "precip_accum_in",
+                  "uv_index", "solar_wm2"):
+        if rng.random() < 0.8:
+            doc[field] = rng.choice(NUMBERS)
+    if rng.random() < 0.5:
+        doc["num"] = extract_numeric(doc) or None
+    return doc
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parity_generated_infoclimat(seed):
+    rng = random.Random(seed)
+    docs = [infoclimat_doc(rng) for _ in range(200)]
+    assert_parity(transform_infoclimat_batch, transform_infoclimat, docs)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_parity_generated_wunderground(seed):
+    rng = random.Random(seed)
+    docs = [wunderground_doc(rng) for _ in range(200)]
+    assert_parity(transform_document_batch, transform_document, docs)
+
+
+def test_rows_failing_in_scalar_path_are_reported():
+    docs = [
+        {"id_station": "W", "s3_key": "/Ichtegem_011024/", "wind_direction_text": "180"},
+        {"id_station": "W", "s3_key": "/Ichtegem_011024/", "temperature_F": 50},
+        {"id_station": "W", "s3_key": "/Ichtegem_011024/", "temperature_F": "50"},
+    ]
+    records, errors = transform_document_batch(docs)
+
+    assert errors == [0, 1]
+    assert records[:2] == [None, None]
+    assert records[2]["temperature_C"] == pytest.approx(10.0)
+    assert_parity(transform_document_batch, transform_document, docs)
+
+
+def test_safe_float2_series_matches_scalar():
+    values = pd.Series(NUMBERS, dtype=object)
+    parsed, errors = safe_float2_series(values)
+
+    expected = [safe_float2(v) for v in NUMBERS]
+    assert [None if p != p else p for p in parsed.tolist()] == expected
+    assert not errors.any()
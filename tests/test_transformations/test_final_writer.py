@@ -0,0 +1,111 @@
+# tests/test_transformations/test_final_writer.py
+
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from transform.final_writer import FinalWriter
+
+
+@pytest.fixture
+def final():
+    collection = mongomock.MongoClient()["weather"]["hourly_measurements"]
+    collection.create_index(
+        [("id_station", 1), ("dh_utc", 1), ("s3_key", 1)],
+        unique=True,
+        name="unique_measurement_key",
+    )
+    return collection
+
+
+def record(hour, station="ST01", **extra):
+    return {"id_station": station, "dh_utc": datetime(2024, 1, 1, hour), "s3_key": "k", **extra}
+
+
+def test_records_are_written_in_batches(final):
+    writer = FinalWriter(final, batch_size=10)
+    for hour in range(24):
+        writer.add(record(hour))
+    writer.close()
+
+    assert final.count_documents({}) == 24
+    assert writer.inserted == 24
+    assert writer.round_trips == 3
+
+
+def test_duplicates_do_not_fail_the_batch(final):
+    final.insert_one(record(3))
+
+    writer = FinalWriter(final, batch_size=100)
+    for hour in range(6):
+        writer.add(record(hour))
+    writer.add(record(5))          # duplicate inside the batch too
+    writer.close()
+
+    assert final.count_documents({}) == 6
+    assert (writer.inserted, writer.duplicates, writer.failed) == (5, 2, 0)
+
+
+def test_other_write_errors_are_counted(final, monkeypatch):
+    from pymongo.errors import BulkWriteError
+
+    def failing_insert_many(docs, ordered):
+        assert ordered is False
+        raise BulkWriteError({
+            "nInserted": 1,
+            "writeErrors": [
+                {"index": 1, "code": 121, "errmsg": "Document failed validation", "op": docs[1]},
+            ],
+        })
+
+    monkeypatch.setattr(final, "insert_many", failing_insert_many)
+    writer = FinalWriter(final, batch_size=2)
+    writer.add(record(0))
+    writer.add(record(1))
+
+    assert (writer.inserted, writer.duplicates, writer.failed) == (1, 0, 1)
+
+
+def test_batch_size_from_env(final, monkeypatch):
+    monkeypatch.setenv("TRANSFORM_WRITE_BATCH_SIZE", "7")
+    assert FinalWriter(final).batch_size == 7
+
+
+def test_written_staging_rows_are_marked(final):
+    staging = mongomock.MongoClient()["weather"]["staging"]
+    staging.insert_many([{"_id": i} for i in range(4)])
+    staging.update_one({"_id": 0}, {"$set": {"transform_error": "earlier failure"}})
+    final.insert_one(record(1))
+
+    writer = FinalWriter(final, batch_size=100, staging=staging)
+    writer.add(record(0), staging_id=0)
+    writer.add(record(1), staging_id=1)    # duplicate: already written
+    writer.reject(2, "boom")                # transform error: retried later
+    writer.close()
+
+    marked = sorted(d["_id"] for d in staging.find({"transformed_at": {"$ne": None}}))
+    assert marked == [0, 1]
+    assert "transform_error" not in staging.find_one({"_id": 0})
+    assert staging.find_one({"_id": 2})["transform_error"] == "boom"
+
+
+def test_failed_writes_are_not_marked(final, monkeypatch):
+    from pymongo.errors import BulkWriteError
+
+    staging = mongomock.MongoClient()["weather"]["staging"]
+    staging.insert_many([{"_id": i} for i in range(2)])
+
+    def failing_insert_many(docs, ordered):
+        raise BulkWriteError({
+            "nInserted": 1,
+            "writeErrors": [{"index": 1, "code": 121, "errmsg": "validation", "op": docs[1]}],
+        })
+
+    monkeypatch.setattr(final, "insert_many", failing_insert_many)
+    writer = FinalWriter(final, batch_size=100, staging=staging)
+    writer.add(record(0), staging_id=0)
+    writer.add(record(1), staging_id=1)
+    writer.close()
+
+    assert [d["_id"] for d in staging.find({"transformed_at": {"$ne": None}})] == [0]
@@ -0,0 +1,214 @@
+# tests/test_transformations/test_pushdown.py
+
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+import transform.run_hourly_transform as rht
+from models.hourly_measurements_model import HourlyMeasurementsModel
+from transform.pushdown import infoclimat_pipeline, run_infoclimat_pushdown, without_infoclimat
+from transform.transformations import transform_infoclimat
+
+from tests.test_transformations.test_run_hourly_transform import db, staging_docs  # noqa: F401
+
+
+# ----------------------------------------------------------
+# Routing (mongomock: no $merge)
+# ----------------------------------------------------------
+def test_pushdown_mode_leaves_only_other_sources_to_python(db, monkeypatch):
+    db["staging"].insert_many(staging_docs())
+
+    def fake_pushdown(staging, final, query):
+        calls.append(query)
+        return 1
+
+    calls = []
+    monkeypatch.setattr(rht, "run_infoclimat_pushdown", fake_pushdown)
+    rht.run_hourly_transform(pushdown=True)
+
+    assert calls == [{"dq_checked": True, "$or": [{"error": None}, {"error": False}], "transformed_at": None}]
+    assert {d["id_station"] for d in db["hourly_measurements"].find()} == {"WU01"}
+    assert db["staging"].count_documents({"id_station": "IC001", "transformed_at": {"$ne": None}}) == 0
+
+
+def test_without_infoclimat_keeps_the_file_filter():
+    query = without_infoclimat({"s3_key": {"$in": ["InfoClimat/a.jsonl", "x/Ichtegem.jsonl"]}})
+    assert query["s3_key"] == {"$in": ["InfoClimat/a.jsonl", "x/Ichtegem.jsonl"], "$not": {"$regex": "InfoClimat"}}
+
+
+def test_pipeline_merges_on_the_unique_key():
+    pipeline = infoclimat_pipeline({"dq_checked": True}, "hourly_measurements")
+
+    assert pipeline[-1]["$merge"] == {
+        "into": "hourly_measurements",
+        "on": ["id_station", "dh_utc", "s3_key"],
+        "whenMatched": "keepExisting",
+        "whenNotMatched": "insert",
+    }
+    assert list(pipeline[1]["$project"])[1:] == list(HourlyMeasurementsModel.model_fields)
+
+
+def test_failed_pushdown_releases_only_its_own_rows(fake_mongo, monkeypatch):
+    import transform.pushdown as pushdown
+
+    now = datetime(2024, 6, 1, 12, 0, 0, 123000)
+
+    class FixedClock:
+        @staticmethod
+        def now(tz=None):
+            return now.replace(tzinfo=tz)
+
+    monkeypatch.setattr(pushdown, "datetime", FixedClock)
+
+    db = fake_mongo.get_database()
+    staging = db["staging"]
+    staging.insert_many([
+        {"s3_key": "InfoClimat/a.jsonl", "id_station": "IC001", "dq_checked": True, "error": None},
+        # Stamped by another run in the same millisecond
+        {"s3_key": "dataset_meteo/Ichtegem_011024/a.jsonl", "dq_checked": True, "transformed_at": now},
+    ])
+
+    def failing_aggregate(pipeline):
+        raise RuntimeError("$merge failed")
+
+    monkeypatch.setattr(type(staging), "aggregate", lambda self, pipeline: failing_aggregate(pipeline))
+
+    query = {"dq_checked": True, "$or": [{"error": None}, {"error": False}], "transformed_at": None}
+    with pytest.raises(RuntimeError):
+        run_infoclimat_pushdown(staging, db["hourly_measurements"], query)
+
+    assert staging.find_one({"id_station": "IC001"})["transformed_at"] is None
+    assert staging.find_one({"s3_key": {"$regex": "Ichtegem"}})["transformed_at"] == now
+
+
+def test_rows_rejected_by_the_model_are_not_marked(fake_mongo, monkeypatch):
+    db = fake_mongo.get_database()
+    staging = db["staging"]
+    staging.insert_many([
+        {"s3_key": "InfoClimat/a.jsonl", "id_station": "IC001", "dh_utc": datetime(2024, 1, 1), "dq_checked": True},
+        {"s3_key": "InfoClimat/a.jsonl", "id_station": "IC002", "dq_checked": True},   # no dh_utc
+    ])
+    # mongomock has no $merge: only the staging marking is checked here
+    monkeypatch.setattr(type(staging), "aggregate", lambda self, pipeline: iter(()))
+
+    assert run_infoclimat_pushdown(staging, db["hourly_measurements"], {"transformed_at": None}) == 1
+
+    rejected = staging.find_one({"id_station": "IC002"})
+    assert rejected["transformed_at"] is None
+    assert rejected["transform_error"] == "validation failed: ValidationError"
+    assert staging.find_one({"id_station": "IC001"})["transformed_at"] is not None
+
+
+# ----------------------------------------------------------
+# Parity with transform_infoclimat (real mongod)
+# ----------------------------------------------------------
+@pytest.fixture
+def mongod():
+    uri = os.getenv("MONGODB_TEST_URI", "mongodb://localhost:27017")
+    client = MongoClient(uri, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        # CI provides a mongod service: there, a missing server is a failure
+        if os.getenv("MONGODB_TEST_REQUIRED", "false").lower() == "true":
+            pytest.fail(f"no mongod at {uri} (MONGODB_TEST_REQUIRED=true)")
+        pytest.skip(f"no mongod at {uri}")
+
+    name = f"pushdown_{uuid.uuid4().hex[:8]}"
+    yield client[name]
+    client.drop_database(name)
+    client.close()
+
+
+RAW_VALUES = [
+    None, "", "   ", "abc", "14,2", " -3.2 °C", "1.2.3", "-", "--5", "5-",
+    "1.", ".5", "-.5", "007", "1 013,25 hPa", "12 km", "0", "-0",
+]
+INT_VALUES = [None, "", " ", "x", "4", " 8 ", "-1", "4.0", "007", "1-2", "-", "3 okta"]
+
+
+def parity_docs():
+    docs = []
+    for i, raw in enumerate(RAW_VALUES):
+        docs.append({
+            "s3_key": "InfoClimat/raw.jsonl", "id_station": "IC001", "dh_utc": datetime(2024, 1, 1, i),
+            "temperature_C": raw, "pression_hPa": raw, "vent_direction_deg": raw,
+            "nebulosite_okta": INT_VALUES[i % len(INT_VALUES)],
+            "temps_omm_code": INT_VALUES[(i + 3) % len(INT_VALUES)],
+        })
+
+    # "num" wins over the raw strings; a missing key is null
+    docs += [
+        {
+            "s3_key": "InfoClimat/num.jsonl", "id_station": "IC002", "dh_utc": datetime(2024, 1, 2, 0),
+            "temperature_C": "garbage", "num": {"temperature_C": 3.5, "pression_hPa": None, "humidite_pct": 80},
+        },
+        {
+            "s3_key": "InfoClimat/num.jsonl", "id_station": "IC002", "dh_utc": datetime(2024, 1, 2, 1),
+            "temperature_C": "12", "num": {},
+        },
+        # Rejected by HourlyMeasurementsModel (no dh_utc)
+        {"s3_key": "InfoClimat/num.jsonl", "id_station": "IC003", "temperature_C": "1"},
+    ]
+    for doc in docs:
+        doc.update(dq_checked=True, error=None)
+    return docs
+
+
+def expected_records(docs):
+    records = []
+    for doc in docs:
+        try:
+            records.append(HourlyMeasurementsModel(**transform_infoclimat(doc)).model_dump())
+        except ValidationError:
+            continue
+    return records
+
+
+def test_pushdown_matches_python_transform(mongod):
+    staging, final = mongod["staging"], mongod["hourly_measurements"]
+    final.create_index([("id_station", 1), ("dh_utc", 1), ("s3_key", 1)], unique=True, name="unique_measurement_key")
+    docs = parity_docs()
+    staging.insert_many([dict(doc) for doc in docs])
+
+    query = {"dq_checked": True, "$or": [{"error": None}, {"error": False}], "transformed_at": None}
+    assert run_infoclimat_pushdown(staging, final, query) == len(docs) - 1
+
+    def key(record):
+        return record["id_station"], record["dh_utc"]
+
+    got = sorted(final.find({}, {"_id": 0}), key=key)
+    expected = sorted(expected_records(docs), key=key)
+
+    assert len(got) == len(expected) == len(docs) - 1
+    for record, reference in zip(got, expected):
+        assert list(record) == list(reference)
+        assert record == reference, key(reference)
+        assert all(
+            type(record[f]) is type(reference[f]) for f in reference
+        ), key(reference)
+
+    # Every written row is marked; the rejected one is left for the next run
+    assert [d["id_station"] for d in staging.find({"transformed_at": None})] == ["IC003"]
+    assert staging.find_one({"id_station": "IC003"})["transform_error"].startswith("validation failed")
+    assert run_infoclimat_pushdown(staging, final, query) == 0
+    assert final.count_documents({}) == len(docs) - 1
+
+
+def test_pushdown_keeps_existing_measurements(mongod):
+    staging, final = mongod["staging"], mongod["hourly_measurements"]
+    final.create_index([("id_station", 1), ("dh_utc", 1), ("s3_key", 1)], unique=True, name="unique_measurement_key")
+
+    doc = parity_docs()[4]
+    final.insert_one({"id_station": "IC001", "dh_utc": doc["dh_utc"], "s3_key": doc["s3_key"], "temperature_C": 99.0})
+    staging.insert_one(doc)
+
+    run_infoclimat_pushdown(staging, final, {"dq_checked": True})
+
+    assert final.count_documents({}) == 1
+    assert final.find_one()["temperature_C"] == 99.0
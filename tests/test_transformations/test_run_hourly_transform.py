@@ -0,0 +1,145 @@
+# tests/test_transformations/test_run_hourly_transform.py
+
+from datetime import datetime
+
+import pytest
+
+import transform.run_hourly_transform as rht
+
+
+class TransformSettings:
+    database = "weather"
+    staging_collection = "staging"
+    final_collection = "hourly_measurements"
+    ingestion_tracker_collection = "ingestion_tracker"
+
+
+@pytest.fixture
+def db(fake_mongo, monkeypatch):
+    class Client:
+        settings = TransformSettings()
+
+        def __init__(self, settings=None):
+            pass
+
+        def get_database(self):
+            return fake_mongo.get_database()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(rht.MongoSettings, "from_env", classmethod(lambda cls: TransformSettings()))
+    monkeypatch.setattr(rht, "MongoDBClient", Client)
+    return fake_mongo.get_database()
+
+
+def staging_docs():
+    return [
+        {
+            "s3_key": "InfoClimat/2024.jsonl", "id_station": "IC001",
+            "dh_utc": datetime(2024, 1, 1, 12), "temperature_C": "14,2",
+            "nebulosite_okta": "4", "dq_checked": True, "error": None,
+        },
+        {
+            "s3_key": "dataset_meteo/Ichtegem_011024/a.jsonl", "id_station": "WU01",
+            "time_local": "1:30 AM", "temperature_F": "50 °F", "num": {"temperature_F": 50.0},
+            "dq_checked": True, "error": None,
+        },
+        # Raises in transform_document (numeric wind direction)
+        {
+            "s3_key": "dataset_meteo/Ichtegem_011024/a.jsonl", "id_station": "WU01",
+            "time_local": "2:30 AM", "wind_direction_text": "180",
+            "dq_checked": True, "error": None,
+        },
+        # Not DQ-valid / unknown source: ignored
+        {"s3_key": "InfoClimat/2024.jsonl", "id_station": "IC001", "dq_checked": False},
+        {"s3_key": "other/x.jsonl", "id_station": "X", "dq_checked": True, "error": None},
+    ]
+
+
+@pytest.mark.parametrize("batch_size", ["1", "1000"])
+def test_run_hourly_transform_batches(db, monkeypatch, batch_size):
+    monkeypatch.setenv("TRANSFORM_BATCH_SIZE", batch_size)
+    db["staging"].insert_many(staging_docs())
+
+    rht.run_hourly_transform()
+
+    final = {d["id_station"]: d for d in db["hourly_measurements"].find()}
+    assert set(final) == {"IC001", "WU01"}
+    assert final["IC001"]["temperature_C"] == 14.2
+    assert final["IC001"]["nebulosite_okta"] == 4
+    assert final["WU01"]["temperature_C"] == pytest.approx(10.0)
+    assert final["WU01"]["dh_utc"] == datetime(2024, 9, 30, 23, 30)
+
+
+def test_rerun_skips_duplicates_per_item(db):
+    db["hourly_measurements"].create_index(
+        [("id_station", 1), ("dh_utc", 1), ("s3_key", 1)],
+        unique=True,
+        name="unique_measurement_key",
+    )
+    db["staging"].insert_many(staging_docs())
+
+    rht.run_hourly_transform()
+    rht.run_hourly_transform()
+
+    assert db["hourly_measurements"].count_documents({}) == 2
+
+
+def count_transformed_docs(monkeypatch):
+    seen = []
+    for source, fn in list(rht.BATCH_TRANSFORMS.items()):
+        def spy(docs, fn=fn):
+            seen.extend(docs)
+            return fn(docs)
+        monkeypatch.setitem(rht.BATCH_TRANSFORMS, source, spy)
+    return seen
+
+
+def test_incremental_runs_only_read_new_rows(db, monkeypatch):
+    db["staging"].insert_many(staging_docs())
+    rht.run_hourly_transform()
+
+    # Only written rows are marked; failing / unknown-source rows keep an error
+    marked = {d["id_station"] for d in db["staging"].find({"transformed_at": {"$ne": None}})}
+    assert db["staging"].count_documents({"transformed_at": {"$ne": None}}) == 2
+    assert marked == {"IC001", "WU01"}
+    errors = {d["id_station"]: d["transform_error"] for d in db["staging"].find({"transform_error": {"$ne": None}})}
+    assert errors == {"WU01": "wunderground transform failed", "X": "unknown source"}
+
+    # The failing row is retried, the written ones are not read again
+    seen = count_transformed_docs(monkeypatch)
+    rht.run_hourly_transform()
+    assert [d["time_local"] for d in seen] == ["2:30 AM"]
+    seen.clear()
+
+    # A new file: only its rows are read
+    db["staging"].insert_one({
+        "s3_key": "InfoClimat/2025.jsonl", "id_station": "IC002",
+        "dh_utc": datetime(2025, 1, 1), "dq_checked": True, "error": None,
+    })
+    rht.run_hourly_transform()
+    assert sorted(d["id_station"] for d in seen) == ["IC002", "WU01"]
+
+    seen.clear()
+    rht.run_hourly_transform(reprocess=True)
+    assert len(seen) == 4    # the unknown-source row is never transformed
+
+
+def test_fixed_transform_reaches_failed_rows(db, monkeypatch):
+    db["staging"].insert_many(staging_docs())
+    rht.run_hourly_transform()
+
+    # Transform fixed: numeric wind directions no longer raise
+    fixed = rht.BATCH_TRANSFORMS["wunderground"]
+
+    def fixed_transform(docs):
+        docs = [{**d, "wind_direction_text": None} for d in docs]
+        return fixed(docs)
+
+    monkeypatch.setitem(rht.BATCH_TRANSFORMS, "wunderground", fixed_transform)
+    rht.run_hourly_transform()
+
+    failed = db["staging"].find_one({"time_local": "2:30 AM"})
+    assert failed["transformed_at"] is not None and "transform_error" not in failed
+    assert db["hourly_measurements"].count_documents({"id_station": "WU01"}) == 2
@@ -0,0 +1,71 @@
+# tests/test_transformations/test_unit_conversions.py
+
+import numpy as np
+import pytest
+
+import transform.transformations as tr
+from transform.transformations import (
+    Q_,
+    conversion,
+    convert_units,
+    f_to_c,
+    inches_to_mm,
+    inhg_to_hpa,
+    mph_to_kmh,
+)
+
+CASES = [
+    (f_to_c, "degF", "degC"),
+    (mph_to_kmh, "mile/hour", "kilometer/hour"),
+    (inhg_to_hpa, "inHg", "hectopascal"),
+    (inches_to_mm, "inch", "millimeter"),
+]
+
+VALUES = np.concatenate([np.linspace(-100, 150, 501), [0.0, 1e-6, 1e6, 32.0, 212.0]])
+
+
+def assert_matches(actual, expected):
+    # Relative on real values; pint's own rounding leaves ~1e-14 at 32 °F
+    if abs(expected) > 1e-12:
+        assert actual == pytest.approx(expected, rel=1e-12, abs=0)
+    else:
+        assert abs(actual) <= 1e-12
+
+
+@pytest.mark.parametrize("fn, source, target", CASES)
+def test_scalar_matches_pint(fn, source, target):
+    for v in VALUES:
+        assert_matches(fn(float(v)), Q_(float(v), source).to(target).magnitude)
+
+
+def test_fahrenheit_reference_points():
+    assert f_to_c(212) == pytest.approx(100.0, rel=1e-15)
+    assert abs(f_to_c(32)) < 1e-13
+    assert f_to_c(-40) == pytest.approx(-40.0, rel=1e-15)
+
+
+@pytest.mark.parametrize("fn, source, target", CASES)
+def test_array_matches_pint_and_scalar(fn, source, target):
+    converted = convert_units(VALUES, source, target)
+
+    for actual, expected in zip(converted, Q_(VALUES, source).to(target).magnitude):
+        assert_matches(actual, expected)
+    assert converted.tolist() == [fn(float(v)) for v in VALUES]
+
+
+def test_nan_passes_through_arrays():
+    out = convert_units(np.array([np.nan, 32.0]), "degF", "degC")
+    assert np.isnan(out[0]) and out[1] == pytest.approx(0.0)
+
+
+def test_pint_is_queried_once_per_conversion(monkeypatch):
+    conversion.cache_clear()
+    calls = []
+    monkeypatch.setattr(tr, "Q_", lambda *a: calls.append(a) or Q_(*a))
+
+    for v in range(1000):
+        f_to_c(v)
+
+    assert len(calls) == 3   # 0, CONVERSION_SPAN and the affinity probe
+    assert conversion.cache_info().hits == 999
+
@@ -0,0 +1,252 @@
+# batch_transform.py
+"""
+Transformation par lots (colonnes) des documents staging vers
+hourly_measurements.
+
+Même résultat que transform_infoclimat / transform_document appliqués
+document par document, mais :
+    - valeurs typées lues dans doc["num"] ; pour les documents sans
+      "num", safe_float2 vectorisé (pandas .str) sur les seules chaînes
+      distinctes de chaque colonne
+    - conversions d'unités appliquées à des tableaux NumPy avec les
+      coefficients (scale, offset) demandés une fois à Pint
+    - heure locale → UTC, okta / code OMM calculés une fois par valeur
+      distincte (quelques centaines par fichier)
+
+Un document sur lequel la fonction scalaire lèverait une exception est
+signalé dans `errors` (sa position) au lieu d'interrompre le lot.
+"""
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from transform.transformations import (
+    UNIT_C, UNIT_F, UNIT_HPA, UNIT_INCH, UNIT_INHG, UNIT_KMH, UNIT_MM, UNIT_MPH,
+    convert_units,
+    safe_int,
+    convert_time_local_to_utc,
+    extract_date_from_s3_key,
+)
+
+
+# ----------------------------------------------------------
+# 1) Champs : sortie hourly_measurements ← champ staging
+# ----------------------------------------------------------
+INFOCLIMAT_FLOATS = {
+    "temperature_C": "temperature_C",
+    "pression_hPa": "pression_hPa",
+    "humidite_pct": "humidite_pct",
+    "point_de_rosee_C": "point_de_rosee_C",
+    "visibilite_m": "visibilite_m",
+    "vent_moyen_kmh": "vent_moyen_kmh",
+    "vent_rafales_kmh": "vent_rafales_kmh",
+    "vent_direction_deg": "vent_direction_deg",
+    "pluie_3h_mm": "pluie_3h_mm",
+    "pluie_1h_mm": "pluie_1h_mm",
+    "neige_au_sol_cm": "neige_au_sol_cm",
+    "uv_index": "uv_index",
+    "solar_wm2": "solar_wm2",
+}
+
+INFOCLIMAT_INTS = ("nebulosite_okta", "temps_omm_code")
+
+# Ordre des clés identique à transform_infoclimat
+INFOCLIMAT_ORDER = (
+    "id_station", "dh_utc", "s3_key",
+    "temperature_C", "pression_hPa", "humidite_pct", "point_de_rosee_C", "visibilite_m",
+    "vent_moyen_kmh", "vent_rafales_kmh", "vent_direction_deg",
+    "pluie_3h_mm", "pluie_1h_mm", "neige_au_sol_cm",
+    "nebulosite_okta", "temps_omm_code",
+    "uv_index", "solar_wm2",
+)
+
+# sortie ← (champ staging, unité source, unité cible) ; None = sans conversion
+WUNDERGROUND_FLOATS = {
+    "temperature_C": ("temperature_F", UNIT_F, UNIT_C),
+    "point_de_rosee_C": ("dew_point_F", UNIT_F, UNIT_C),
+    "humidite_pct": ("humidity_pct", None, None),
+    "vent_moyen_kmh": ("wind_speed_mph", UNIT_MPH, UNIT_KMH),
+    "vent_rafales_kmh": ("wind_gust_mph", UNIT_MPH, UNIT_KMH),
+    "pression_hPa": ("pressure_inHg", UNIT_INHG, UNIT_HPA),
+    "precip_rate_mm": ("precip_rate_in", UNIT_INCH, UNIT_MM),
+    "precip_accum_mm": ("precip_accum_in", UNIT_INCH, UNIT_MM),
+    "solar_wm2": ("solar_wm2", None, None),
+    "uv_index": ("uv_index", None, None),
+}
+
+# Ordre des clés identique à transform_document
+WUNDERGROUND_ORDER = (
+    "id_station", "s3_key", "dh_utc",
+    "temperature_C", "point_de_rosee_C", "humidite_pct",
+    "vent_moyen_kmh", "vent_rafales_kmh", "vent_direction_deg",
+    "pression_hPa", "precip_rate_mm", "precip_accum_mm",
+    "solar_wm2", "uv_index",
+)
+
+
+# ----------------------------------------------------------
+# 2) Primitives vectorisées
+# ----------------------------------------------------------
+def column(docs: list, field: str) -> pd.Series:
+    return pd.Series([doc.get(field) for doc in docs], dtype=object)
+
+
+def _to_float(s):
+    try:
+        return float(s)
+    except ValueError:
+        return np.nan
+
+
+def safe_float2_series(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    safe_float2 sur une colonne : (valeurs float64, NaN = None ; masque
+    des lignes où safe_float2 lèverait une exception, i.e. non-chaînes).
+    Le nettoyage ne porte que sur les chaînes distinctes de la colonne.
+    """
+    is_str = values.map(type).eq(str).to_numpy()
+    errors = ~is_str & values.notna().to_numpy()
+
+    codes, uniques = pd.factorize(values.where(is_str))
+    cleaned = (
+        pd.Series(uniques, dtype=object)
+        .str.strip()
+        .str.replace(r"[^0-9\.,\-]", "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+
+    parsed = np.array([_to_float(c) for c in cleaned] + [np.nan], dtype=float)
+    return parsed[codes], errors   # code -1 (None) → dernier élément
+
+
+def typed_series(docs: list, num: list, field: str) -> tuple[np.ndarray, np.ndarray]:
+    """typed_value sur une colonne : doc["num"] si présent, sinon safe_float2."""
+    has_num = np.array([isinstance(n, dict) for n in num], dtype=bool)
+    values = np.array(
+        [n.get(field) if isinstance(n, dict) else None for n in num], dtype=float
+    )
+    errors = np.zeros(len(docs), dtype=bool)
+
+    # Documents ingérés avant "num" : chaîne brute
+    legacy = np.flatnonzero(~has_num)
+    if len(legacy):
+        raw, failed = safe_float2_series(column([docs[i] for i in legacy], field))
+        values[legacy] = raw
+        errors[legacy] = failed
+
+    return values, errors
+
+
+def convert(values: np.ndarray, source, target) -> np.ndarray:
+    """Conversion d'un tableau entier avec les coefficients en cache (NaN reste NaN)."""
+    if source is None:
+        return values
+    return convert_units(values, source, target)
+
+
+def map_unique(keys: pd.Series, fn: Callable) -> tuple[np.ndarray, np.ndarray]:
+    """
+    fn appliquée une fois par valeur distincte de `keys`.
+    Retourne (résultats alignés, masque des lignes où fn a levé).
+    """
+    codes, uniques = pd.factorize(keys)
+
+    results = np.empty(len(uniques) + 1, dtype=object)
+    failed = np.zeros(len(uniques) + 1, dtype=bool)
+    for i, key in enumerate(list(uniques) + [None]):
+        try:
+            results[i] = fn(key)
+        except Exception:
+            failed[i] = True
+
+    return results[codes], failed[codes]
+
+
+def to_python(values: np.ndarray) -> list:
+    """float64 → liste de float Python, NaN → None."""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def assemble(order: tuple, columns: dict, errors: np.ndarray) -> list:
+    rows = zip(*(columns[key] for key in order))
+    return [
+        None if failed else dict(zip(order, row))
+        for row, failed in zip(rows, errors.tolist())
+    ]
+
+
+# ----------------------------------------------------------
+# 3) Transformations par lot
+# ----------------------------------------------------------
+def transform_infoclimat_batch(docs: list) -> tuple[list, list]:
+    """
+    transform_infoclimat sur un lot.
+    Retourne (enregistrements alignés sur docs — None en cas d'erreur,
+    positions en erreur).
+    """
+    if not docs:
+        return [], []
+
+    num = [doc.get("num") for doc in docs]
+    errors = np.zeros(len(docs), dtype=bool)
+
+    columns = {
+        "id_station": [doc.get("id_station") for doc in docs],
+        "dh_utc": [doc.get("dh_utc") for doc in docs],
+        "s3_key": [doc.get("s3_key") for doc in docs],
+    }
+
+    for out, field in INFOCLIMAT_FLOATS.items():
+        values, failed = typed_series(docs, num, field)
+        columns[out] = to_python(values)
+        errors |= failed
+
+    for field in INFOCLIMAT_INTS:
+        values, failed = map_unique(column(docs, field), safe_int)
+        columns[field] = values.tolist()
+        errors |= failed
+
+    return assemble(INFOCLIMAT_ORDER, columns, errors), np.flatnonzero(errors).tolist()
+
+
+def transform_document_batch(docs: list) -> tuple[list, list]:
+    """
+    transform_document (Ichtegem / Madeleine) sur un lot.
+    Retourne (enregistrements alignés sur docs — None en cas d'erreur,
+    positions en erreur).
+    """
+    if not docs:
+        return [], []
+
+    num = [doc.get("num") for doc in docs]
+    errors = np.zeros(len(docs), dtype=bool)
+
+    s3_keys = column(docs, "s3_key")
+    columns = {
+        "id_station": [doc.get("id_station") for doc in docs],
+        "s3_key": s3_keys.tolist(),
+    }
+
+    # ---- DATE UTC : une conversion par (heure locale, fichier) distincts ----
+    base_dates, failed = map_unique(s3_keys, extract_date_from_s3_key)
+    errors |= failed
+    keys = pd.Series(list(zip(column(docs, "time_local"), base_dates)), dtype=object)
+    dh_utc, failed = map_unique(keys, lambda k: convert_time_local_to_utc(*k) if k else None)
+    columns["dh_utc"] = dh_utc.tolist()
+    errors |= failed
+
+    # ---- MESURES + CONVERSIONS (Pint sur tableaux) ----
+    for out, (field, source, target) in WUNDERGROUND_FLOATS.items():
+        values, failed = typed_series(docs, num, field)
+        columns[out] = to_python(convert(values, source, target))
+        errors |= failed
+
+    # ---- DIRECTION : convert_wind_direction(safe_float2(texte)) ----
+    # Comme la version scalaire : le texte passe d'abord par safe_float2,
+    # donc None (texte ou 0) ou une erreur (nombre non nul, .strip() sur float).
+    parsed, failed = safe_float2_series(column(docs, "wind_direction_text"))
+    columns["vent_direction_deg"] = [None] * len(docs)
+    errors |= failed | (~np.isnan(parsed) & (parsed != 0))
+
+    return assemble(WUNDERGROUND_ORDER, columns, errors), np.flatnonzero(errors).tolist()
@@ -0,0 +1,116 @@
+# final_writer.py
+
+import os
+from datetime import datetime, UTC
+
+from loguru import logger
+from pymongo.errors import BulkWriteError
+
+# Code MongoDB d'une violation d'index unique (unique_measurement_key)
+DUPLICATE_KEY = 11000
+
+
+class FinalWriter:
+    """
+    Écriture groupée dans hourly_measurements.
+
+    Les enregistrements validés sont mis en tampon puis écrits par
+    insert_many(ordered=False) : un aller-retour réseau par lot au lieu
+    d'un insert_one par ligne. Avec ordered=False, MongoDB insère toutes
+    les lignes valides du lot ; les doublons (unique_measurement_key)
+    sont comptés ligne par ligne sans faire échouer le lot, les autres
+    erreurs d'écriture sont journalisées.
+
+    Avec `staging`, seules les lignes staging réellement écrites (ou
+    doublons 11000) reçoivent transformed_at après l'écriture de leur
+    lot, pour que le prochain run ne les relise pas. Une ligne rejetée
+    (reject : erreur de transformation ou de validation) reçoit
+    transform_error sans transformed_at : elle est reprise à chaque run,
+    donc une correction de la transformation l'atteint. Une ligne dont
+    l'écriture échoue n'est pas marquée et sera reprise.
+    """
+
+    def __init__(self, collection, batch_size=None, staging=None):
+        self.collection = collection
+        self.batch_size = batch_size or int(os.getenv("TRANSFORM_WRITE_BATCH_SIZE", 1000))
+        self.staging = staging
+
+        self.buffer = []
+        self.buffer_ids = []     # _id staging de chaque enregistrement du tampon
+        self.rejected = {}       # _id staging → erreur (aucun enregistrement à écrire)
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.round_trips = 0
+
+    # ------------------------------------------------------
+    def add(self, record: dict, staging_id=None):
+        self.buffer.append(record)
+        self.buffer_ids.append(staging_id)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def reject(self, staging_id, error: str):
+        """Ligne staging sans enregistrement : transform_error, pas transformed_at."""
+        self.rejected[staging_id] = error
+
+    def flush(self):
+        batch, self.buffer = self.buffer, []
+        ids, self.buffer_ids = self.buffer_ids, []
+        failed_positions = set()
+
+        if batch:
+            self.round_trips += 1
+            try:
+                result = self.collection.insert_many(batch, ordered=False)
+                self.inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                details = e.details
+                self.inserted += details.get("nInserted", 0)
+
+                for error in details.get("writeErrors", []):
+                    if error.get("code") == DUPLICATE_KEY:
+                        self.duplicates += 1
+                        continue
+
+                    self.failed += 1
+                    failed_positions.add(error.get("index"))
+                    op = error.get("op") or {}
+                    logger.bind(id_station=op.get("id_station"), s3_key=op.get("s3_key")).error(
+                        f"❌ Insert failed in hourly_measurements: {error.get('errmsg')}"
+                    )
+
+        done = [i for pos, i in enumerate(ids) if pos not in failed_positions and i is not None]
+        self.mark_transformed(done)
+
+        rejected, self.rejected = self.rejected, {}
+        self.mark_rejected(rejected)
+
+    def mark_transformed(self, staging_ids: list):
+        if self.staging is None or not staging_ids:
+            return
+        self.staging.update_many(
+            {"_id": {"$in": staging_ids}},
+            {
+                "$set": {"transformed_at": datetime.now(UTC).replace(tzinfo=None)},
+                "$unset": {"transform_error": ""},
+            },
+        )
+
+    def mark_rejected(self, errors: dict):
+        """transform_error par ligne ; un seul update_many par message distinct."""
+        if self.staging is None or not errors:
+            return
+        by_error = {}
+        for staging_id, error in errors.items():
+            by_error.setdefault(error, []).append(staging_id)
+        for error, staging_ids in by_error.items():
+            self.staging.update_many(
+                {"_id": {"$in": staging_ids}},
+                {"$set": {"transform_error": error}},
+            )
+
+    def close(self):
+        self.flush()
+        if self.duplicates:
+            logger.info(f"↩ {self.duplicates} duplicate measurement(s) skipped (unique_measurement_key)")
@@ -0,0 +1,190 @@
+# pushdown.py
+"""
+Transformation InfoClimat exécutée côté serveur (pipeline d'agrégation).
+
+transform_infoclimat ne fait que typer et copier des champs : le même
+calcul s'exprime en opérateurs d'agrégation, et $merge écrit le
+résultat dans hourly_measurements sur unique_measurement_key. Aucun
+document ne transite par le conteneur.
+
+Équivalences avec le chemin Python (mêmes règles de null) :
+    - typed_value : doc["num"][champ] si "num" est un objet (absent →
+      null), sinon safe_float2 sur la chaîne brute
+    - safe_float2 : seuls [0-9.,-] sont gardés ($regexFindAll), "," → "."
+      puis $convert en double ; null, "" ou texte invalide → null
+    - safe_int (okta, code OMM) : seuls [0-9-] sont gardés, puis $convert
+      en int ; invalide → null
+    - HourlyMeasurementsModel : id_station / s3_key chaînes et dh_utc date
+      obligatoires, sinon la ligne n'est pas écrite : elle reçoit
+      transform_error et reste à traiter (transformed_at null)
+    - doublon sur unique_measurement_key : la ligne existante est gardée
+
+Le schéma staging n'admet que des chaînes pour les champs bruts ; une
+autre valeur (que le chemin Python rejetterait en erreur) donne null.
+
+Expérimental, désactivé par défaut (TRANSFORM_PUSHDOWN=false) : la parité
+avec le chemin Python dépend des règles de $convert du serveur ("5.",
+".5", "-0"…). Elle est vérifiée par tests/test_transformations/test_pushdown.py
+contre un mongod réel (service MongoDB de la CI, MONGODB_TEST_URI).
+"""
+from datetime import datetime, UTC
+
+from loguru import logger
+
+from transform.batch_transform import INFOCLIMAT_FLOATS, INFOCLIMAT_INTS
+from models.hourly_measurements_model import HourlyMeasurementsModel
+
+# Clé de $merge : champs de unique_measurement_key (index unique requis)
+MERGE_KEY = ["id_station", "dh_utc", "s3_key"]
+
+# Même sélection que route() : "InfoClimat" dans s3_key
+INFOCLIMAT_KEY = {"$regex": "InfoClimat"}
+
+# Champs obligatoires de HourlyMeasurementsModel (types BSON)
+MODEL_REQUIRED = {
+    "id_station": {"$type": "string"},
+    "dh_utc": {"$type": "date"},
+    "s3_key": {"$type": "string"},
+}
+
+
+# ----------------------------------------------------------
+# 1) Expressions d'agrégation (une par fonction Python)
+# ----------------------------------------------------------
+def _to(value, target: str) -> dict:
+    return {"$convert": {"input": value, "to": target, "onError": None, "onNull": None}}
+
+
+def _keep_chars(value, pattern: str) -> dict:
+    """re.sub(r"[^...]", "", value) : concatène les caractères autorisés."""
+    return {
+        "$reduce": {
+            "input": {"$regexFindAll": {"input": value, "regex": pattern}},
+            "initialValue": "",
+            "in": {"$concat": ["$$value", "$$this.match"]},
+        }
+    }
+
+
+def _if_string(value, expr) -> dict:
+    return {"$cond": [{"$eq": [{"$type": value}, "string"]}, expr, None]}
+
+
+def safe_float2_expr(field: str) -> dict:
+    raw = f"${field}"
+    cleaned = {"$replaceAll": {"input": _keep_chars(raw, r"[0-9.,\-]"), "find": ",", "replacement": "."}}
+    return _if_string(raw, _to(cleaned, "double"))
+
+
+def safe_int_expr(field: str) -> dict:
+    raw = f"${field}"
+    return _if_string(raw, _to(_keep_chars(raw, r"[0-9\-]"), "int"))
+
+
+def typed_value_expr(field: str) -> dict:
+    return {
+        "$cond": [
+            {"$eq": [{"$type": "$num"}, "object"]},
+            _to(f"$num.{field}", "double"),
+            safe_float2_expr(field),
+        ]
+    }
+
+
+# ----------------------------------------------------------
+# 2) Pipeline
+# ----------------------------------------------------------
+def infoclimat_pipeline(query: dict, final_collection: str) -> list:
+    """
+    Pipeline transform_infoclimat + HourlyMeasurementsModel + écriture.
+    Les champs sont projetés dans l'ordre de HourlyMeasurementsModel
+    (comme model_dump()), ceux absents d'InfoClimat valent null.
+    """
+    ints = set(INFOCLIMAT_INTS)
+    projection = {"_id": 0}
+    for field in HourlyMeasurementsModel.model_fields:
+        if field in MERGE_KEY:
+            projection[field] = f"${field}"
+        elif field in ints:
+            projection[field] = safe_int_expr(field)
+        elif field in INFOCLIMAT_FLOATS:
+            projection[field] = typed_value_expr(INFOCLIMAT_FLOATS[field])
+        else:
+            projection[field] = {"$literal": None}
+
+    return [
+        {"$match": {"$and": [query, MODEL_REQUIRED]}},
+        {"$project": projection},
+        {
+            "$merge": {
+                "into": final_collection,
+                "on": MERGE_KEY,
+                "whenMatched": "keepExisting",
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+
+
+def run_infoclimat_pushdown(staging, final, query: dict) -> int:
+    """
+    Transforme côté serveur les lignes InfoClimat de `query`.
+
+    Les lignes sont d'abord réservées (transformed_at posé), puis le
+    pipeline ne lit que cette réservation : les lignes arrivées pendant
+    le run attendent le suivant. Si le pipeline échoue, la réservation
+    est annulée et les lignes seront reprises. Les lignes rejetées par
+    le modèle sont libérées avec transform_error, comme dans le chemin
+    Python.
+    Retourne le nombre de lignes staging écrites (ou doublons).
+    """
+    # Précision milliseconde de BSON : la valeur relue est identique
+    now = datetime.now(UTC).replace(tzinfo=None)
+    claim = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    selected = infoclimat_only(query)
+    result = staging.update_many(
+        selected, {"$set": {"transformed_at": claim}, "$unset": {"transform_error": ""}}
+    )
+    if not result.modified_count:
+        return 0
+
+    claimed = {**selected, "transformed_at": claim}
+    try:
+        staging.aggregate(infoclimat_pipeline(claimed, final.name))
+    except Exception:
+        # Only this run's rows: another run may have stamped the same millisecond
+        staging.update_many(claimed, {"$set": {"transformed_at": None}})
+        logger.exception("❌ InfoClimat pushdown failed, rows released for the next run")
+        raise
+
+    # Non écrites par $merge : pas de transformed_at, reprises au prochain run
+    rejected = staging.update_many(
+        {"$and": [claimed, {"$nor": [MODEL_REQUIRED]}]},
+        {"$set": {"transformed_at": None, "transform_error": "validation failed: ValidationError"}},
+    )
+
+    written = result.modified_count - rejected.modified_count
+    logger.info(f"⚙ {written} InfoClimat row(s) transformed server-side ($merge)")
+    return written
+
+
+# ----------------------------------------------------------
+# 3) Partage de la requête entre pushdown et chemin Python
+# ----------------------------------------------------------
+def _s3_key_condition(query: dict) -> dict:
+    """Condition existante sur s3_key (ex. {"$in": [...]}) sous forme d'opérateurs."""
+    value = query.get("s3_key")
+    if value is None:
+        return {}
+    if isinstance(value, dict):
+        return dict(value)
+    return {"$eq": value}
+
+
+def infoclimat_only(query: dict) -> dict:
+    return {**query, "s3_key": {**_s3_key_condition(query), **INFOCLIMAT_KEY}}
+
+
+def without_infoclimat(query: dict) -> dict:
+    return {**query, "s3_key": {**_s3_key_condition(query), "$not": INFOCLIMAT_KEY}}
@@ -1,15 +1,67 @@
 # run_hourly_transform.py
 
+import os
+
 from loguru import logger
 from datetime import datetime, UTC
 from connectors.mongodb_client import MongoSettings, MongoDBClient
-from transform.transformations import transform_infoclimat , transform_document
+from ingest.ingestion_tracker import IngestionTracker
+from transform.batch_transform import transform_infoclimat_batch, transform_document_batch
+from transform.final_writer import FinalWriter
+from transform.pushdown import run_infoclimat_pushdown, without_infoclimat
 from models.hourly_measurements_model import HourlyMeasurementsModel
 
 from dotenv import load_dotenv
 load_dotenv()
 
-def run_hourly_transform():
+# ----- CAS 1 : InfoClimat (copie typée) / CAS 2 : Ichtegem / Madeleine (conversion)
+BATCH_TRANSFORMS = {
+    "infoclimat": transform_infoclimat_batch,
+    "wunderground": transform_document_batch,
+}
+
+
+def route(s3_key):
+    if "InfoClimat" in s3_key:
+        return "infoclimat"
+    if any(x in s3_key for x in ["Ichtegem", "Madeleine"]):
+        return "wunderground"
+    return None
+
+
+def iter_batches(cursor, size):
+    """Streams a cursor as lists of at most `size` documents."""
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_hourly_transform(station_id=None, start=None, end=None, reprocess=False, pushdown=None):
+    """
+    Transform DQ-valid staging rows into hourly_measurements.
+
+    Only rows not yet transformed are read (no transformed_at): each run
+    costs the new data only. reprocess=True reads every DQ-valid row
+    again (duplicates are then skipped by unique_measurement_key).
+    Rows that fail (transform error, validation, unknown source) are
+    not stamped: they get transform_error and are retried by every run,
+    so a fix of the transform reaches them without reprocess.
+
+    station_id / start / end (optional) restrict the run — e.g. for a
+    backfill — to the files whose ingestion manifest overlaps them, so
+    other files are pruned without scanning hourly_staging.
+
+    pushdown=True (or TRANSFORM_PUSHDOWN=true; experimental, off by
+    default) transforms InfoClimat rows
+    inside MongoDB with an aggregation pipeline ending in $merge (see
+    transform.pushdown): they never travel to the container, and the
+    Python loop below only handles the other sources.
+    """
     start_time = datetime.now(UTC)
 
     logger.info("🚀 Starting HOURLY transformation job")
@@ -43,64 +95,84 @@ def run_hourly_transform():
         "$or": [{"error": None}, {"error": False}]
     }
 
+    if not reprocess:
+        # null matches missing: served by the pending_transform index
+        query["transformed_at"] = None
+
+    if station_id is not None or start is not None or end is not None:
+        s3_keys = IngestionTracker(client).find_files(station_id=station_id, start=start, end=end)
+        query["s3_key"] = {"$in": s3_keys}
+        if station_id is not None:
+            query["id_station"] = station_id
+
+    if pushdown is None:
+        pushdown = os.getenv("TRANSFORM_PUSHDOWN", "false").lower() == "true"
+
+    count_info = 0
+    if pushdown:
+        count_info += run_infoclimat_pushdown(staging, final, query)
+        query = without_infoclimat(query)
+
     total_to_process = staging.count_documents(query)
     logger.info(f"📥 Documents matching query: {total_to_process}")
 
-    cursor = staging.find(query)
+    batch_size = int(os.getenv("TRANSFORM_BATCH_SIZE", 1000))
+    cursor = staging.find(query).batch_size(batch_size)
 
-    count_info = 0
     count_transformed = 0
     count_errors = 0
 
+    # Écritures groupées (insert_many non ordonné), voir FinalWriter
+    writer = FinalWriter(final, staging=staging)
+
     # ------------------------------------------------------
-    # 3) Boucle de traitement
+    # 3) Boucle de traitement, par lots de documents
     # ------------------------------------------------------
-    for doc in cursor:
-        try:
-            s3_key = doc.get("s3_key", "UNKNOWN")
-
-            # Logger enrichi avec contexte
-            doc_logger = logger.bind(
-                id_station=doc.get("id_station"),
-                s3_key=s3_key
-            )
-            
-            # ----- CAS 1 : InfoClimat  
-            if "InfoClimat" in s3_key:
-                transformed = transform_infoclimat(doc)
-                
-                try:
-                    record = HourlyMeasurementsModel(**transformed)
-                    final.insert_one(record.model_dump())
-                    #doc_logger.debug("Inserted validated Pydantic record.")
-                except Exception as e:
-                    doc_logger.exception("❌ Pydantic validation failed")
+    for docs in iter_batches(cursor, batch_size):
+        groups = {"infoclimat": [], "wunderground": []}
+        for doc in docs:
+            source = route(doc.get("s3_key") or "UNKNOWN")
+            if source is not None:
+                groups[source].append(doc)
+            else:
+                # Source inconnue : rien à écrire, reprise au prochain run
+                writer.reject(doc["_id"], "unknown source")
+
+        for source, group in groups.items():
+            if not group:
+                continue
 
-                count_info += 1
+            records, errors = BATCH_TRANSFORMS[source](group)
 
-                doc_logger.debug("📄 Copied InfoClimat document to final collection.")
-                continue
+            for i in errors:
+                count_errors += 1
+                writer.reject(group[i]["_id"], f"{source} transform failed")
+                logger.bind(id_station=group[i].get("id_station"), s3_key=group[i].get("s3_key")).error(
+                    "❌ Error processing document."
+                )
 
-            # ----- CAS 2 : Ichtegem / Madeleine → transformation -----
-            if any(x in s3_key for x in ["Ichtegem", "Madeleine"]):
-                transformed = transform_document(doc)
+            for doc, transformed in zip(group, records):
+                if transformed is None:
+                    continue
 
                 try:
                     record = HourlyMeasurementsModel(**transformed)
-                    final.insert_one(record.model_dump())
-                    #doc_logger.debug("Inserted validated Pydantic record.")
                 except Exception as e:
-                    doc_logger.exception("❌ Pydantic validation failed")
-                
+                    logger.bind(id_station=doc.get("id_station"), s3_key=doc.get("s3_key")).exception(
+                        "❌ Pydantic validation failed"
+                    )
+                    writer.reject(doc["_id"], f"validation failed: {type(e).__name__}")
+                    continue
 
-                count_transformed += 1
+                writer.add(record.model_dump(), staging_id=doc["_id"])
 
-                doc_logger.debug("🔄 Transformed & inserted Ichtegem/Madeleine document.")
-                continue
+            if source == "infoclimat":
+                count_info += len(group) - len(errors)
+            else:
+                count_transformed += len(group) - len(errors)
 
-        except Exception as e:
-            count_errors += 1
-            doc_logger.exception("❌ Error processing document.")
+    writer.close()
+    count_errors += writer.failed
 
     # ------------------------------------------------------
     # 4) Résumé final
@@ -111,6 +183,8 @@ def run_hourly_transform():
         f"🏁 HOURLY transform finished in {duration:.2f}s — "
         f"{count_info} copied (InfoClimat), "
         f"{count_transformed} transformed (Ichtegem/Madeleine), "
+        f"{writer.inserted} inserted in {writer.round_trips} batch(es), "
+        f"{writer.duplicates} duplicates, "
         f"{count_errors} errors."
     )
 
@@ -1,6 +1,10 @@
 # transformations.py
+import math
 import re
+import sys
+import time
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 from pint import UnitRegistry
 
@@ -94,6 +98,18 @@ def safe_float2(value):
 
 
 
+def typed_value(doc, field):
+    """
+    Valeur numérique d'un champ staging.
+    Utilise la valeur typée parsée à l'ingestion (doc["num"]) si présente,
+    sinon parse la chaîne brute (documents ingérés avant "num").
+    """
+    num = doc.get("num")
+    if isinstance(num, dict):
+        return num.get(field)
+    return safe_float2(doc.get(field))
+
+
 def safe_okta(value):
     """OKTA = 0 à 8. Chaîne vide => None."""
     if value in ("", None):
@@ -104,11 +120,50 @@ def safe_okta(value):
 # ----------------------------------------------------------
 # 2) Conversions physiques (Pint)
 # ----------------------------------------------------------
+# Unités staging → unités finales
+UNIT_F, UNIT_C = "degF", "degC"
+UNIT_MPH, UNIT_KMH = "mile/hour", "kilometer/hour"
+UNIT_INHG, UNIT_HPA = "inHg", "hectopascal"
+UNIT_INCH, UNIT_MM = "inch", "millimeter"
+
+
+# Écart sur lequel la pente d'une conversion est mesurée
+CONVERSION_SPAN = 1000.0
+
+
+@lru_cache(maxsize=None)
+def conversion(source, target):
+    """
+    Coefficients (scale, offset) de la conversion affine source → target :
+        target = value * scale + offset
+    Demandés une seule fois à Pint (puis en cache) au lieu de construire
+    une Quantity par valeur.
+
+    La pente est mesurée sur un grand écart (CONVERSION_SPAN) : f(1) - f(0)
+    perd ~13 chiffres par cancellation quand l'offset est grand (°F → °C).
+    """
+    offset = float(Q_(0.0, source).to(target).magnitude)
+    scale = (float(Q_(CONVERSION_SPAN, source).to(target).magnitude) - offset) / CONVERSION_SPAN
+
+    # Seules les conversions linéaires / affines sont réductibles
+    probe = float(Q_(1.0, source).to(target).magnitude)
+    if not math.isclose(probe, scale + offset, rel_tol=1e-9, abs_tol=1e-9):
+        raise ValueError(f"Conversion {source} → {target} is not affine")
+
+    return scale, offset
+
+
+def convert_units(value, source, target):
+    """Applique la conversion en cache à un float ou à un tableau NumPy."""
+    scale, offset = conversion(source, target)
+    return value * scale + offset
+
+
 def f_to_c(value):
     if value in (None, "", "null"):
         return None
     try:
-        return float((Q_(float(value), ureg.degF)).to("degC").magnitude)
+        return float(convert_units(float(value), UNIT_F, UNIT_C))
     except:
         return None
 
@@ -117,7 +172,7 @@ def mph_to_kmh(value):
     if value in (None, "", "null"):
         return None
     try:
-        return float((Q_(float(value), ureg.mile/ureg.hour)).to(ureg.kilometer/ureg.hour).magnitude)
+        return float(convert_units(float(value), UNIT_MPH, UNIT_KMH))
     except:
         return None
 
@@ -126,7 +181,7 @@ def inhg_to_hpa(value):
     if value in (None, "", "null"):
         return None
     try:
-        return float((Q_(float(value), ureg.inHg)).to(ureg.hectopascal).magnitude)
+        return float(convert_units(float(value), UNIT_INHG, UNIT_HPA))
     except:
         return None
 
@@ -135,7 +190,7 @@ def inches_to_mm(value):
     if value in (None, "", "null"):
         return None
     try:
-        return float((Q_(float(value), ureg.inch)).to(ureg.millimeter).magnitude)
+        return float(convert_units(float(value), UNIT_INCH, UNIT_MM))
     except:
         return None
 
@@ -200,7 +255,8 @@ def convert_time_local_to_utc(time_local_str, base_date):
 def transform_infoclimat(doc):
     """
     Transforme un document InfoClimat vers le schéma final hourly_measurements.
-    Toutes les valeurs sont en string → converties safe_float ou safe_int.
+    Les valeurs numériques viennent de doc["num"] (parsées à l'ingestion),
+    les codes entiers (okta, OMM) restent convertis via safe_int.
     """
 
     return {
@@ -211,29 +267,29 @@ def transform_infoclimat(doc):
         "s3_key": doc.get("s3_key"),
 
         # Champs météo principaux
-        "temperature_C": safe_float2(doc.get("temperature_C")),
-        "pression_hPa": safe_float2(doc.get("pression_hPa")),
-        "humidite_pct": safe_float2(doc.get("humidite_pct")),
-        "point_de_rosee_C": safe_float2(doc.get("point_de_rosee_C")),
-        "visibilite_m": safe_float2(doc.get("visibilite_m")),
+        "temperature_C": typed_value(doc, "temperature_C"),
+        "pression_hPa": typed_value(doc, "pression_hPa"),
+        "humidite_pct": typed_value(doc, "humidite_pct"),
+        "point_de_rosee_C": typed_value(doc, "point_de_rosee_C"),
+        "visibilite_m": typed_value(doc, "visibilite_m"),
 
         # Vent
-        "vent_moyen_kmh": safe_float2(doc.get("vent_moyen_kmh")),
-        "vent_rafales_kmh": safe_float2(doc.get("vent_rafales_kmh")),
-        "vent_direction_deg": safe_float2(doc.get("vent_direction_deg")),
+        "vent_moyen_kmh": typed_value(doc, "vent_moyen_kmh"),
+        "vent_rafales_kmh": typed_value(doc, "vent_rafales_kmh"),
+        "vent_direction_deg": typed_value(doc, "vent_direction_deg"),
 
         # Précipitations
-        "pluie_3h_mm": safe_float2(doc.get("pluie_3h_mm")),
-        "pluie_1h_mm": safe_float2(doc.get("pluie_1h_mm")),
-        "neige_au_sol_cm": safe_float2(doc.get("neige_au_sol_cm")),
+        "pluie_3h_mm": typed_value(doc, "pluie_3h_mm"),
+        "pluie_1h_mm": typed_value(doc, "pluie_1h_mm"),
+        "neige_au_sol_cm": typed_value(doc, "neige_au_sol_cm"),
 
         # Ciel
         "nebulosite_okta": safe_int(doc.get("nebulosite_okta")),
         "temps_omm_code": safe_int(doc.get("temps_omm_code")),
 
         # Champs optionnels (peuvent exister dans staging)
-        "uv_index": safe_float2(doc.get("uv_index")),
-        "solar_wm2": safe_float2(doc.get("solar_wm2")),
+        "uv_index": typed_value(doc, "uv_index"),
+        "solar_wm2": typed_value(doc, "solar_wm2"),
     }
 
 
@@ -256,23 +312,57 @@ def transform_document(doc):
         ),
 
         # ---- TEMPÉRATURE & HUMIDITÉ ----
-        "temperature_C": f_to_c(safe_float2(doc.get("temperature_F"))),
-        "point_de_rosee_C": f_to_c(safe_float2(doc.get("dew_point_F"))),
-        "humidite_pct": safe_float2(doc.get("humidity_pct")),
+        "temperature_C": f_to_c(typed_value(doc, "temperature_F")),
+        "point_de_rosee_C": f_to_c(typed_value(doc, "dew_point_F")),
+        "humidite_pct": typed_value(doc, "humidity_pct"),
 
         # ---- VENT ----
-        "vent_moyen_kmh": mph_to_kmh(safe_float2(doc.get("wind_speed_mph"))),
-        "vent_rafales_kmh": mph_to_kmh(safe_float2(doc.get("wind_gust_mph"))),
+        "vent_moyen_kmh": mph_to_kmh(typed_value(doc, "wind_speed_mph")),
+        "vent_rafales_kmh": mph_to_kmh(typed_value(doc, "wind_gust_mph")),
         "vent_direction_deg": convert_wind_direction(safe_float2(doc.get("wind_direction_text"))),
 
         # ---- PRESSION ----
-        "pression_hPa": inhg_to_hpa(safe_float2(doc.get("pressure_inHg"))),
+        "pression_hPa": inhg_to_hpa(typed_value(doc, "pressure_inHg")),
 
         # ---- PRÉCIPITATIONS via Pint ----
-        "precip_rate_mm": inches_to_mm(safe_float2(doc.get("precip_rate_in"))),
-        "precip_accum_mm": inches_to_mm(safe_float2(doc.get("precip_accum_in"))),
+        "precip_rate_mm": inches_to_mm(typed_value(doc, "precip_rate_in")),
+        "precip_accum_mm": inches_to_mm(typed_value(doc, "precip_accum_in")),
 
         # ---- RAYONNEMENT ----
-        "solar_wm2": safe_float2(doc.get("solar_wm2")),
-        "uv_index": safe_float2(doc.get("uv_index")),
+        "solar_wm2": typed_value(doc, "solar_wm2"),
+        "uv_index": typed_value(doc, "uv_index"),
     }
+
+
+# ----------------------------------------------------------
+# MICROBENCHMARK (python -m transform.transformations [n])
+# ----------------------------------------------------------
+def benchmark_conversions(n=100_000):
+    """
+    Temps par valeur (µs) : Pint Quantity.to() par valeur vs coefficients
+    en cache, sur n températures °F → °C.
+    """
+    values = [float(i % 200 - 40) for i in range(n)]
+
+    start = time.perf_counter()
+    for v in values:
+        Q_(v, ureg.degF).to("degC").magnitude
+    pint_us = (time.perf_counter() - start) / n * 1e6
+
+    conversion(UNIT_F, UNIT_C)
+    start = time.perf_counter()
+    for v in values:
+        convert_units(v, UNIT_F, UNIT_C)
+    cached_us = (time.perf_counter() - start) / n * 1e6
+
+    return {"pint_us_per_value": pint_us, "cached_us_per_value": cached_us}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    stats = benchmark_conversions(n)
+    print(
+        f"{n} values: pint {stats['pint_us_per_value']:.2f} µs/value, "
+        f"cached {stats['cached_us_per_value']:.3f} µs/value "
+        f"({stats['pint_us_per_value'] / stats['cached_us_per_value']:.0f}x faster)"
+    )